@@ -1,25 +1,40 @@
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, has_request_context
 from datetime import timedelta, datetime  # datetime eklendi
-import sqlite3
 import random
-import smtplib
-import ssl
-from email.message import EmailMessage
-import requests
+import heapq
 import json
 import os
+import threading
 from dotenv import load_dotenv
 from oauthlib.oauth2 import WebApplicationClient
 import hashlib
 import base64
 import urllib.parse
 from config import Config
-import time
-import psycopg2
+from catalog import CatalogRegistry
+from search_index import build_index, query_tokens
+from fanout import FanOut
+from deadline import Deadline
+from rate_limit import make_bucket
+from http_client import get_client, connection_stats, configure_breakers, is_available
+from response_cache import ResponseCache
+import vector_scoring
+from itertools import islice
 from psycopg2.extras import RealDictCursor  # Bu da eklendi
-from urllib.parse import urlparse, quote_plus
+from db import Database, PostgresPool, SQLiteConnections, postgres_dsn
+from migrations import MigrationRunner
+from users import UserRepository
+from profiles import Profile, ProfileCache
+from ttl_store import make_ttl_store
+from email_outbox import EmailOutbox, SMTPTransport, LogTransport, MemoryTransport
+from server_session import ServerSessionInterface
+from spotify_resolver import SpotifyResolver, split_song
+from jobs import JobQueue
+from topk import TopK
+from pipeline import RecommendationPipeline, CategorySpec, age_allowed, quota_mix
+from spotify_tokens import SpotifyTokenManager, SpotifyTokenError
 
 # Güvenli olmayan bağlantılar için OAuth2 kütüphanesine izin ver
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
@@ -31,6 +46,16 @@ app = Flask(__name__)
 # Secret key ortam değişkeninden alınır
 app.secret_key = config.SECRET_KEY
 app.permanent_session_lifetime = timedelta(days=30)
+# Çerezde yalnızca imzalı oturum kimliği; veri sunucuda, oturum ömrü kadar saklanır
+app.session_interface = ServerSessionInterface(
+    make_ttl_store('oturum', url=config.SESSION_STORE_URL,
+                   path=config.SESSION_STORE_PATH or os.path.join(app.instance_path, 'sessions.db'),
+                   default_ttl=int(app.permanent_session_lifetime.total_seconds()),
+                   sweep_interval=config.CODE_STORE_SWEEP_INTERVAL,
+                   logger=app.logger),
+    max_entries=config.SESSION_CACHE_MAX_ENTRIES,
+    logger=app.logger,
+)
 
 # Google Login Ayarları
 GOOGLE_CLIENT_ID = config.GOOGLE_CLIENT_ID
@@ -51,130 +76,133 @@ SPOTIFY_REDIRECT_URI = os.getenv('SPOTIFY_REDIRECT_URI', 'https://listoria-ai.on
 SPOTIFY_SCOPE = 'playlist-modify-public playlist-modify-private'
 
 def get_google_provider_cfg():
-    return requests.get(GOOGLE_DISCOVERY_URL).json()
+    return get_client('google').get(GOOGLE_DISCOVERY_URL).json()
 
-def get_db_connection():
-    # Render ortamında (DATABASE_URL varsa)
+def create_database():
+    # Render ortamında (DATABASE_URL varsa) PostgreSQL bağlantı havuzu
     if 'DATABASE_URL' in os.environ:
-        try:
-            url = urlparse(os.environ['DATABASE_URL'])
-            password = quote_plus(url.password)
-            port = url.port if url.port else 5432
-            
-            new_url = f"postgresql://{url.username}:{password}@{url.hostname}:{port}{url.path}?sslmode=require"
-
-            # RealDictCursor eklendi - bu önemli!
-            conn = psycopg2.connect(new_url, cursor_factory=RealDictCursor)
-            conn.autocommit = False 
-            return conn
-            
-        except Exception as e:
-            app.logger.error(f"PostgreSQL bağlantı hatası: {e}")
-            return None 
-            
-    # Yerel geliştirme ortamındaysa SQLite'a bağlan
-    else:
-        conn = sqlite3.connect('database.db')
-        conn.row_factory = sqlite3.Row
-        return conn
-
-def create_db_table():
-    conn = get_db_connection()
-    if conn:
-        try:
-            # PostgreSQL için cursor (imleç) kullanılır
-            cur = conn.cursor() 
-            
-            # Tabloyu oluşturma sorgusu
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS kullanicilar (
-                    id SERIAL PRIMARY KEY,
-                    email TEXT NOT NULL UNIQUE,
-                    kullanici_adi TEXT,
-                    sifre TEXT NOT NULL,
-                    dogum_tarihi TEXT
-                );
-            ''')
-            
-            # İşlemi onayla (commit)
-            conn.commit()
-            
-        except Exception as e:
-            app.logger.error(f"Veritabanı tablosu oluşturulurken hata: {e}")
-            conn.rollback() 
-            
-        finally:
-            # Cursor'ı kapatmayı garanti et
-            if 'cur' in locals() and cur:
-                 cur.close()
-            conn.close()
-
-create_db_table()
+        pool = PostgresPool(
+            postgres_dsn(os.environ['DATABASE_URL']),
+            minconn=config.DB_POOL_MIN,
+            maxconn=config.DB_POOL_MAX,
+            timeout=config.DB_POOL_TIMEOUT,
+            health_check_interval=config.DB_HEALTH_CHECK_INTERVAL,
+            max_lifetime=config.DB_MAX_LIFETIME,
+            logger=app.logger,
+            cursor_factory=RealDictCursor,  # RealDictCursor - bu önemli!
+        )
+        return Database(pool, 'postgres')
+    
+    # Yerel geliştirme / tek sunucu: thread başına WAL modunda SQLite bağlantısı
+    sqlite = SQLiteConnections(
+        config.SQLITE_PATH,
+        busy_timeout=config.SQLITE_BUSY_TIMEOUT,
+        synchronous=config.SQLITE_SYNCHRONOUS,
+        mmap_size=config.SQLITE_MMAP_SIZE,
+        cache_size_kb=config.SQLITE_CACHE_SIZE_KB,
+    )
+    return Database(sqlite, 'sqlite')
+
+database = create_database()
+user_repository = UserRepository(database)
+profile_cache = ProfileCache(user_repository,
+                             ttl=config.PROFILE_CACHE_TTL,
+                             max_entries=config.PROFILE_CACHE_MAX_ENTRIES)
+
+
+def remember_profile(profile):
+    """Girişte profili oturuma ve önbelleğe yaz"""
+    session['profil'] = profile.to_session()
+    profile_cache.put(profile)
+
+
+def current_profile():
+    """Oturumdaki kullanıcının profili; önce oturum, sonra önbellek, en son veritabanı"""
+    kullanici_adi = session.get('kullanici_adi')
+    cached = session.get('profil')
+    if cached and cached.get('kullanici_adi') == kullanici_adi:
+        return Profile.build(**cached)
+    profile = profile_cache.get(kullanici_adi)
+    if profile is not None:
+        session['profil'] = profile.to_session()
+    return profile
+
+def run_migrations():
+    """Bekleyen şema geçişlerini uygula (tablo, indeksler)"""
+    try:
+        MigrationRunner(database, logger=app.logger).run()
+    except Exception as e:
+        app.logger.error(f"Veritabanı şema geçişi sırasında hata: {e}")
+
+run_migrations()
+
+# Kodlar tüm worker'ların gördüğü süreli depoda; süresi dolanlar kendiliğinden silinir
+code_store_path = config.CODE_STORE_PATH or os.path.join(app.instance_path, 'codes.db')
+verification_codes = make_ttl_store('dogrulama', url=config.CODE_STORE_URL, path=code_store_path,
+                                    default_ttl=config.VERIFICATION_CODE_TTL,
+                                    sweep_interval=config.CODE_STORE_SWEEP_INTERVAL,
+                                    logger=app.logger)
+password_reset_codes = make_ttl_store('sifre_sifirlama', url=config.CODE_STORE_URL, path=code_store_path,
+                                      default_ttl=config.PASSWORD_RESET_CODE_TTL,
+                                      sweep_interval=config.CODE_STORE_SWEEP_INTERVAL,
+                                      logger=app.logger)
+
+def build_email_transport():
+    """Giden kutusunun kullanacağı taşıyıcı (gönderici thread'inde bir kez kurulur)"""
+    if config.EMAIL_TRANSPORT == 'memory':
+        return MemoryTransport()
+    if config.EMAIL_TRANSPORT == 'log' or not config.has_email_config:
+        return LogTransport(app.logger)
+    # SendGrid SMTP: smtp.sendgrid.net, port 2525 - kullanıcı adı 'apikey', parola API key
+    if config.has_sendgrid:
+        return SMTPTransport('smtp.sendgrid.net', 2525, 'apikey', config.SENDGRID_API_KEY,
+                             config.SENDGRID_FROM_EMAIL, idle_timeout=config.EMAIL_SMTP_IDLE_TIMEOUT,
+                             logger=app.logger)
+    # Eski sistem (Gmail SMTP) - artık kullanılmayacak ama backup olarak kalsın
+    return SMTPTransport('smtp.gmail.com', 587, config.SENDER_EMAIL, config.SENDER_PASSWORD,
+                         config.SENDER_EMAIL, idle_timeout=config.EMAIL_SMTP_IDLE_TIMEOUT,
+                         logger=app.logger)
+
+email_outbox = EmailOutbox(
+    config.EMAIL_OUTBOX_PATH or os.path.join(app.instance_path, 'email_outbox.db'),
+    build_email_transport,
+    batch_size=config.EMAIL_BATCH_SIZE,
+    max_attempts=config.EMAIL_MAX_ATTEMPTS,
+    backoff_base=config.EMAIL_BACKOFF_BASE,
+    logger=app.logger,
+)
+# Önceki çalıştırmadan kalan (pending / sahibi ölmüş sending) mesajlar yeni kayıt beklemeden gönderilsin
+email_outbox.start()
 
-verification_codes = {}
-password_reset_codes = {}
+@app.before_request
+def ensure_email_sender():
+    # Gunicorn fork'undan sonra her worker kendi gönderici thread'ini başlatır (zaten çalışıyorsa maliyetsiz)
+    email_outbox.start()
 
 def send_email(receiver_email, subject, body):
-    # E-posta ayarları zorunlu kontrol
-    if not config.has_email_config:
-        app.logger.warning("E-posta ayarları eksik. Geliştirme modu için kod konsola yazdırılıyor.")
-        app.logger.info(f"Email: {receiver_email}")
-        app.logger.info(f"Konu: {subject}")
-        app.logger.info(f"İçerik: {body}")
-        print(f"\n{'='*50}")
-        print(f"EMAIL GÖNDERİLEMEDİ - GELİŞTİRME MODU")
-        print(f"Alıcı: {receiver_email}")
-        print(f"Konu: {subject}")
-        print(f"İçerik:\n{body}")
-        print(f"{'='*50}\n")
-        return True
-    
-    # SendGrid SMTP ile gönder (port 2525)
-    if config.has_sendgrid:
-        try:
-            msg = EmailMessage()
-            msg.set_content(body)
-            msg['Subject'] = subject
-            msg['From'] = config.SENDGRID_FROM_EMAIL
-            msg['To'] = receiver_email
-            
-            # SendGrid SMTP: smtp.sendgrid.net, port 2525
-            with smtplib.SMTP('smtp.sendgrid.net', 2525) as smtp:
-                smtp.starttls()  # TLS başlat
-                smtp.login('apikey', config.SENDGRID_API_KEY)  # Username: 'apikey', Password: API key
-                smtp.send_message(msg)
-            
-            app.logger.info(f"SendGrid SMTP ile e-posta başarıyla gönderildi: {receiver_email}")
-            return True
-            
-        except smtplib.SMTPException as e:
-            app.logger.error(f"SendGrid SMTP hatası: {str(e)}")
-            return False
-        except Exception as e:
-            app.logger.error(f"SendGrid e-posta gönderme hatası: {str(e)}")
-            return False
-    
-    # Eski sistem (Gmail SMTP) - artık kullanılmayacak ama backup olarak kalsın
+    """E-postayı giden kutusuna yaz; mesaj kimliğini (kuyruğa yazılamazsa None) döndür"""
     try:
-        msg = EmailMessage()
-        msg.set_content(body)
-        msg['Subject'] = subject
-        msg['From'] = config.SENDER_EMAIL
-        msg['To'] = receiver_email
-        
-        context = ssl.create_default_context()
-        # Port 587 deneyelim (Gmail için alternatif)
-        with smtplib.SMTP('smtp.gmail.com', 587) as smtp:
-            smtp.starttls(context=context)
-            smtp.login(config.SENDER_EMAIL, config.SENDER_PASSWORD)
-            smtp.send_message(msg)
-        
-        app.logger.info(f"Gmail SMTP ile e-posta başarıyla gönderildi: {receiver_email}")
-        return True
-        
+        mesaj_id = email_outbox.enqueue(receiver_email, subject, body)
     except Exception as e:
-        app.logger.error(f"Gmail SMTP e-posta gönderme hatası: {str(e)}")
-        return False
+        app.logger.error(f"E-posta kuyruğa yazılamadı ({receiver_email}): {e}")
+        return None
+    if has_request_context():
+        # Durum yalnızca mesajı kuyruğa yazan oturuma gösterilir (son 10 mesaj)
+        session['eposta_mesajlari'] = (session.get('eposta_mesajlari', []) + [mesaj_id])[-10:]
+    return mesaj_id
+
+@app.route('/eposta-durumu/<int:mesaj_id>')
+def eposta_durumu(mesaj_id):
+    # Kimlikler sıralı; başka oturumların mesajları (ve alıcı adresleri) sorgulanamasın
+    if mesaj_id not in session.get('eposta_mesajlari', []):
+        return jsonify({'hata': 'Mesaj bulunamadı'}), 404
+    durum = email_outbox.status(mesaj_id)
+    if durum is None:
+        return jsonify({'hata': 'Mesaj bulunamadı'}), 404
+    # Hata metni alıcı adresini içerebilir; yanıtta yalnızca durum bilgisi döner
+    durum.pop('last_error', None)
+    return jsonify(durum)
+
 @app.route('/')
 def home():
     if 'logged_in' in session:
@@ -185,40 +213,8 @@ def home():
 def dashboard():
     if 'logged_in' in session:
         # Kullanıcı bilgisini ve yaşını şablona ilet (profil için)
-        kullanici_adi = session.get('kullanici_adi')
-        conn = get_db_connection()
-        
-        # PostgreSQL için cursor kullan, SQLite için direkt execute
-        if 'DATABASE_URL' in os.environ:
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT kullanici_adi, dogum_tarihi, email FROM kullanicilar WHERE kullanici_adi = %s', 
-                (kullanici_adi,)
-            )
-            row = cursor.fetchone()
-            cursor.close()
-        else:
-            row = conn.execute(
-                'SELECT kullanici_adi, dogum_tarihi, email FROM kullanicilar WHERE kullanici_adi = ?', 
-                (kullanici_adi,)
-            ).fetchone()
-        
-        conn.close()
-        
-        yas = None
-        if row and row['dogum_tarihi'] and row['dogum_tarihi'] != 'N/A':
-            try:
-                dogum_yili = int(str(row['dogum_tarihi']).split('-')[0])
-                yas = 2024 - dogum_yili
-            except Exception:
-                yas = None
-        
-        profil = {
-            'kullanici_adi': row['kullanici_adi'] if row else kullanici_adi,
-            'email': row['email'] if row else None,
-            'yas': yas,
-            'dogum_tarihi': row['dogum_tarihi'] if row else None,
-        }
+        profile = current_profile() or Profile.build(session.get('kullanici_adi'))
+        profil = profile._asdict()
         
         # API durumları
         api_durumu = {
@@ -245,28 +241,12 @@ def giris():
     if not email or not sifre:
         return render_template('index.html', hata="Lütfen tüm alanları doldurunuz.")
     
-    conn = get_db_connection()
-    
-    # PostgreSQL için cursor kullan, SQLite için direkt execute
-    if 'DATABASE_URL' in os.environ:
-        cursor = conn.cursor()
-        cursor.execute(
-            'SELECT * FROM kullanicilar WHERE email = %s AND sifre = %s', 
-            (email, sifre)
-        )
-        kullanici = cursor.fetchone()
-        cursor.close()
-    else:
-        kullanici = conn.execute(
-            'SELECT * FROM kullanicilar WHERE email = ? AND sifre = ?', 
-            (email, sifre)
-        ).fetchone()
-    
-    conn.close()
+    kullanici = user_repository.get_by_credentials(email, sifre)
     
     if kullanici:
         session['logged_in'] = True
-        session['kullanici_adi'] = kullanici['kullanici_adi']
+        session['kullanici_adi'] = kullanici.kullanici_adi
+        remember_profile(Profile.from_user(kullanici))
         if beni_hatirla:
             session.permanent = True
         return redirect(url_for('dashboard'))
@@ -299,24 +279,8 @@ def kayit_ol():
         except ValueError:
             return render_template('register.html', hata="Geçerli bir doğum tarihi giriniz.")
         
-        conn = get_db_connection()
-        
         # Kullanıcı var mı kontrol et
-        if 'DATABASE_URL' in os.environ:
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT * FROM kullanicilar WHERE email = %s OR kullanici_adi = %s',
-                (email, kullanici_adi)
-            )
-            mevcut_kullanici = cursor.fetchone()
-            cursor.close()
-        else:
-            mevcut_kullanici = conn.execute(
-                'SELECT * FROM kullanicilar WHERE email = ? OR kullanici_adi = ?',
-                (email, kullanici_adi)
-            ).fetchone()
-        
-        conn.close()
+        mevcut_kullanici = user_repository.get_by_email_or_username(email, kullanici_adi)
         
         if mevcut_kullanici:
             return render_template('register.html', hata="Bu e-posta veya kullanıcı adı zaten kullanılıyor!")
@@ -347,10 +311,10 @@ Listoria Ekibi
         email_sent = send_email(email, subject, body)
         
         if email_sent:
-            app.logger.info(f"Doğrulama kodu gönderildi: {email}")
+            app.logger.info(f"Doğrulama kodu e-posta kuyruğuna alındı: {email} (mesaj {email_sent})")
             return redirect(url_for('dogrulama', email=email))
         else:
-            app.logger.error(f"E-posta gönderilemedi: {email}")
+            app.logger.error(f"E-posta kuyruğa alınamadı: {email}")
             return render_template('register.html', hata="E-posta gönderimi başarısız. Lütfen e-posta adresinizi kontrol edin veya daha sonra tekrar deneyin.")
             
     except Exception as e:
@@ -361,6 +325,7 @@ Listoria Ekibi
 def cikis():
     session.pop('logged_in', None)
     session.pop('kullanici_adi', None)
+    session.pop('profil', None)
     return redirect(url_for('home'))
 
 @app.route('/dogrulama')  # Bu satır eksik
@@ -378,48 +343,29 @@ def dogrula():
     if not girilen_kod or not email:
         return render_template('verification.html', email=email, hata="Lütfen kodu giriniz.")
     
-    if email not in verification_codes:
+    # Kod önce tüketilir (atomik oku-ve-sil): aynı kodla gelen eşzamanlı iki istekten yalnızca biri kayıt açar
+    bekleyen_kayit = verification_codes.pop(email, None)
+    if bekleyen_kayit is None:
         return render_template('register.html', hata="Geçersiz doğrulama isteği. Lütfen tekrar kayıt olunuz.")
 
-    if verification_codes[email]['code'] == girilen_kod:
-        sifre = verification_codes[email]['sifre']
-        kullanici_adi = verification_codes[email]['kullanici_adi']
-        dogum_tarihi = verification_codes[email]['dogum_tarihi']
-        
-        conn = get_db_connection()
-        if conn:
-            try:
-                # PostgreSQL için cursor kullan, SQLite için direkt execute
-                if 'DATABASE_URL' in os.environ:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        'INSERT INTO kullanicilar (email, kullanici_adi, sifre, dogum_tarihi) VALUES (%s, %s, %s, %s)', 
-                        (email, kullanici_adi, sifre, dogum_tarihi)
-                    )
-                    cursor.close()
-                else:
-                    conn.execute(
-                        'INSERT INTO kullanicilar (email, kullanici_adi, sifre, dogum_tarihi) VALUES (?, ?, ?, ?)', 
-                        (email, kullanici_adi, sifre, dogum_tarihi)
-                    )
-                
-                conn.commit()
-                
-            except Exception as e:
-                app.logger.error(f"Kayıt işlemi sırasında veritabanı hatası: {e}")
-                conn.rollback()
-                return render_template('verification.html', email=email, hata="Kayıt başarısız oldu. Lütfen tekrar deneyin.")
-            
-            finally:
-                conn.close()
+    if bekleyen_kayit['code'] == girilen_kod:
+        sifre = bekleyen_kayit['sifre']
+        kullanici_adi = bekleyen_kayit['kullanici_adi']
+        dogum_tarihi = bekleyen_kayit['dogum_tarihi']
         
-        del verification_codes[email]
+        try:
+            user_repository.insert(email, kullanici_adi, sifre, dogum_tarihi)
+        except Exception as e:
+            app.logger.error(f"Kayıt işlemi sırasında veritabanı hatası: {e}")
+            # Kullanıcı tekrar deneyebilsin diye bekleyen kayıt geri konur
+            verification_codes[email] = bekleyen_kayit
+            return render_template('verification.html', email=email, hata="Kayıt başarısız oldu. Lütfen tekrar deneyin.")
         
         session['logged_in'] = True
         session['kullanici_adi'] = kullanici_adi
+        remember_profile(Profile.build(kullanici_adi, email, dogum_tarihi))
         return redirect(url_for('dashboard'))
     else:
-        verification_codes.pop(email, None)
         return render_template('verification.html', email=email, hata="Hatalı doğrulama kodu! Lütfen tekrar kayıt olunuz.")
 # ============= ÖNERİ SİSTEMİ ROUTE'LARI =============
 
@@ -428,34 +374,9 @@ def oneri_sayfasi(kategori):
     if 'logged_in' not in session:
         return redirect(url_for('home'))
     
-    # Kullanıcının yaşını al
-    conn = get_db_connection()
-    
-    if 'DATABASE_URL' in os.environ:
-        cursor = conn.cursor()
-        cursor.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = %s', 
-            (session['kullanici_adi'],)
-        )
-        kullanici = cursor.fetchone()
-        cursor.close()
-    else:
-        kullanici = conn.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = ?', 
-            (session['kullanici_adi'],)
-        ).fetchone()
-    
-    conn.close()
-    
-    # Yaş hesaplama
-    yas = None
-    if kullanici and kullanici['dogum_tarihi'] != 'N/A':
-        try:
-            from datetime import datetime
-            dogum_yili = int(kullanici['dogum_tarihi'].split('-')[0])
-            yas = datetime.now().year - dogum_yili
-        except:
-            yas = None
+    # Kullanıcının yaşı (oturumdaki profilden)
+    profile = current_profile()
+    yas = profile.yas if profile else None
     
     if kategori == 'kitap':
         son_arama = session.get('son_arama', {})
@@ -474,6 +395,9 @@ def kitap_oneri_al():
     if 'logged_in' not in session:
         return redirect(url_for('home'))
     
+    # Tüm öneri akışı için süre bütçesi; dolarsa eldeki sonuçlarla devam edilir
+    deadline = Deadline(config.RECOMMENDATION_DEADLINE)
+    
     # Form verilerini al
     kitap1 = request.form.get('kitap1')
     kitap2 = request.form.get('kitap2') 
@@ -492,37 +416,13 @@ def kitap_oneri_al():
     if len(kullanici_kitaplari) < 3:
         return render_template('kitap_oneri.html', hata="En az 3 roman girmelisiniz.", yas=None, son_arama={})
     
-    # Kullanıcının yaşını al
-    conn = get_db_connection()
-    
-    if 'DATABASE_URL' in os.environ:
-        cursor = conn.cursor()
-        cursor.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = %s', 
-            (session['kullanici_adi'],)
-        )
-        kullanici = cursor.fetchone()
-        cursor.close()
-    else:
-        kullanici = conn.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = ?', 
-            (session['kullanici_adi'],)
-        ).fetchone()
-    
-    conn.close()
-    
-    yas = None
-    if kullanici and kullanici['dogum_tarihi'] != 'N/A':
-        try:
-            from datetime import datetime
-            dogum_yili = int(kullanici['dogum_tarihi'].split('-')[0])
-            yas = datetime.now().year - dogum_yili
-        except:
-            yas = None
+    # Kullanıcının yaşı (oturumdaki profilden)
+    profile = current_profile()
+    yas = profile.yas if profile else None
     
     # Gelişmiş AI öneri algoritması
     try:
-        oneriler = generate_book_recommendations(kullanici_kitaplari, yas, tur, min_sayfa, max_sayfa, notlar)
+        oneriler = generate_book_recommendations(kullanici_kitaplari, yas, tur, min_sayfa, max_sayfa, notlar, deadline=deadline)
     except Exception as e:
         app.logger.error(f"Kitap öneri hatası: {str(e)}")
         return render_template('kitap_oneri.html', hata="Öneri oluşturulurken bir hata oluştu.", yas=yas, son_arama={})
@@ -543,13 +443,17 @@ def kitap_oneri_al():
     return render_template('kitap_sonuc.html', 
                          oneriler=oneriler,
                          kullanici_kitaplari=kullanici_kitaplari,
-                         yas=yas)
+                         yas=yas,
+                         kismi_sonuc=deadline.partial)
 
 @app.route('/film-oneri-al', methods=['POST'])
 def film_oneri_al():
     if 'logged_in' not in session:
         return redirect(url_for('home'))
     
+    # Tüm öneri akışı için süre bütçesi; dolarsa eldeki sonuçlarla devam edilir
+    deadline = Deadline(config.RECOMMENDATION_DEADLINE)
+    
     film1 = request.form.get('film1')
     film2 = request.form.get('film2')
     film3 = request.form.get('film3')
@@ -563,46 +467,27 @@ def film_oneri_al():
     if len(kullanici_filmleri) < 3:
         return render_template('film_oneri.html', hata="En az 3 film girmelisiniz.", yas=None)
     
-    # Kullanıcının yaşını al
-    conn = get_db_connection()
-    
-    if 'DATABASE_URL' in os.environ:
-        cursor = conn.cursor()
-        cursor.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = %s', 
-            (session['kullanici_adi'],)
-        )
-        kullanici = cursor.fetchone()
-        cursor.close()
-    else:
-        kullanici = conn.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = ?', 
-            (session['kullanici_adi'],)
-        ).fetchone()
-    
-    conn.close()
-    
-    yas = None
-    if kullanici and kullanici['dogum_tarihi'] != 'N/A':
-        try:
-            dogum_yili = int(kullanici['dogum_tarihi'].split('-')[0])
-            yas = 2024 - dogum_yili
-        except:
-            yas = None
+    # Kullanıcının yaşı (oturumdaki profilden)
+    profile = current_profile()
+    yas = profile.yas if profile else None
     
     try:
-        oneriler = generate_film_recommendations(kullanici_filmleri, yas, tur, notlar)
+        oneriler = generate_film_recommendations(kullanici_filmleri, yas, tur, notlar, deadline=deadline)
     except Exception as e:
         app.logger.error(f"Film öneri hatası: {str(e)}")
         return render_template('film_oneri.html', hata="Öneri oluşturulurken bir hata oluştu.", yas=yas)
     
-    return render_template('film_sonuc.html', oneriler=oneriler, kullanici_filmleri=kullanici_filmleri, yas=yas)
+    return render_template('film_sonuc.html', oneriler=oneriler, kullanici_filmleri=kullanici_filmleri, yas=yas,
+                           kismi_sonuc=deadline.partial)
 
 @app.route('/dizi-oneri-al', methods=['POST'])
 def dizi_oneri_al():
     if 'logged_in' not in session:
         return redirect(url_for('home'))
     
+    # Tüm öneri akışı için süre bütçesi; dolarsa eldeki sonuçlarla devam edilir
+    deadline = Deadline(config.RECOMMENDATION_DEADLINE)
+    
     dizi1 = request.form.get('dizi1')
     dizi2 = request.form.get('dizi2')
     dizi3 = request.form.get('dizi3')
@@ -616,46 +501,27 @@ def dizi_oneri_al():
     if len(kullanici_dizileri) < 3:
         return render_template('dizi_oneri.html', hata="En az 3 dizi girmelisiniz.", yas=None)
     
-    # Kullanıcının yaşını al
-    conn = get_db_connection()
-    
-    if 'DATABASE_URL' in os.environ:
-        cursor = conn.cursor()
-        cursor.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = %s', 
-            (session['kullanici_adi'],)
-        )
-        kullanici = cursor.fetchone()
-        cursor.close()
-    else:
-        kullanici = conn.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = ?', 
-            (session['kullanici_adi'],)
-        ).fetchone()
-    
-    conn.close()
-    
-    yas = None
-    if kullanici and kullanici['dogum_tarihi'] != 'N/A':
-        try:
-            dogum_yili = int(kullanici['dogum_tarihi'].split('-')[0])
-            yas = 2024 - dogum_yili
-        except:
-            yas = None
+    # Kullanıcının yaşı (oturumdaki profilden)
+    profile = current_profile()
+    yas = profile.yas if profile else None
     
     try:
-        oneriler = generate_series_recommendations(kullanici_dizileri, yas, tur, notlar)
+        oneriler = generate_series_recommendations(kullanici_dizileri, yas, tur, notlar, deadline=deadline)
     except Exception as e:
         app.logger.error(f"Dizi öneri hatası: {str(e)}")
         return render_template('dizi_oneri.html', hata="Öneri oluşturulurken bir hata oluştu.", yas=yas)
     
-    return render_template('dizi_sonuc.html', oneriler=oneriler, kullanici_dizileri=kullanici_dizileri, yas=yas)
+    return render_template('dizi_sonuc.html', oneriler=oneriler, kullanici_dizileri=kullanici_dizileri, yas=yas,
+                           kismi_sonuc=deadline.partial)
 
 @app.route('/muzik-oneri-al', methods=['POST'])
 def muzik_oneri_al():
     if 'logged_in' not in session:
         return redirect(url_for('home'))
     
+    # Tüm öneri akışı için süre bütçesi; dolarsa eldeki sonuçlarla devam edilir
+    deadline = Deadline(config.RECOMMENDATION_DEADLINE)
+    
     muzik1 = request.form.get('muzik1')
     muzik2 = request.form.get('muzik2')
     muzik3 = request.form.get('muzik3')
@@ -670,55 +536,76 @@ def muzik_oneri_al():
     if len(kullanici_muzikleri) < 3:
         return render_template('muzik_oneri.html', hata="En az 3 şarkı girmelisiniz.", yas=None)
     
-    # Kullanıcının yaşını al
-    conn = get_db_connection()
-    
-    if 'DATABASE_URL' in os.environ:
-        cursor = conn.cursor()
-        cursor.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = %s', 
-            (session['kullanici_adi'],)
-        )
-        kullanici = cursor.fetchone()
-        cursor.close()
-    else:
-        kullanici = conn.execute(
-            'SELECT dogum_tarihi FROM kullanicilar WHERE kullanici_adi = ?', 
-            (session['kullanici_adi'],)
-        ).fetchone()
-    
-    conn.close()
-    
-    yas = None
-    if kullanici and kullanici['dogum_tarihi'] != 'N/A':
-        try:
-            dogum_yili = int(kullanici['dogum_tarihi'].split('-')[0])
-            yas = 2024 - dogum_yili
-        except:
-            yas = None
+    # Kullanıcının yaşı (oturumdaki profilden)
+    profile = current_profile()
+    yas = profile.yas if profile else None
     
     try:
-        oneriler = generate_music_recommendations(kullanici_muzikleri, yas, tur, notlar)
+        oneriler = generate_music_recommendations(kullanici_muzikleri, yas, tur, notlar, deadline=deadline)
         
         # Tüm şarkıları birleştir (hem kullanıcı şarkıları hem öneriler)
         all_tracks = kullanici_muzikleri + [f"{o['baslik']} - {o['sanatci']}" for o in oneriler]
         
-        # Spotify playlist oluştur (eğer playlist modu seçildiyse)
+        # Spotify playlist işini başlat (eğer playlist modu seçildiyse); sayfa ilerlemeyi sorgular
         playlist_data = None
+        playlist_job_id = None
         if oneri_turu == 'spotify_playlist':
-            playlist_data = create_spotify_playlist(all_tracks, tur)
+            playlist_job_id, playlist_data = submit_spotify_playlist(all_tracks, tur)
         
         return render_template('muzik_sonuc.html', 
                              oneriler=oneriler, 
                              kullanici_muzikleri=kullanici_muzikleri, 
                              yas=yas,
                              spotify_playlist=playlist_data,
-                             oneri_turu=oneri_turu)
+                             playlist_job_id=playlist_job_id,
+                             oneri_turu=oneri_turu,
+                             kismi_sonuc=deadline.partial)
     except Exception as e:
         app.logger.error(f"Müzik öneri hatası: {str(e)}")
         return render_template('muzik_oneri.html', hata=f"Öneri oluşturulurken bir hata oluştu: {str(e)}", yas=yas)
 # ============= API ENTEGRASYONLARı =============
 
+# Sağlayıcı başına devre kesici ve p95'e göre uyarlanan timeout
+configure_breakers(
+    window=config.BREAKER_WINDOW,
+    min_calls=config.BREAKER_MIN_CALLS,
+    error_threshold=config.BREAKER_ERROR_THRESHOLD,
+    consecutive_failures=config.BREAKER_CONSECUTIVE_FAILURES,
+    open_seconds=config.BREAKER_OPEN_SECONDS,
+    min_timeout=config.ADAPTIVE_TIMEOUT_MIN,
+    timeout_factor=config.ADAPTIVE_TIMEOUT_FACTOR,
+)
+
+def provider_degraded(provider, deadline=None):
+    """Sağlayıcı devresi açık ya da süre bütçesi dolduğu için API sonuçları eksik mi"""
+    return not is_available(provider) or bool(deadline and deadline.partial)
+
+# Terim başına sağlayıcı istekleri bu havuzda eşzamanlı çalışır
+provider_fanout = FanOut(max_workers=config.PROVIDER_MAX_WORKERS, logger=app.logger)
+
+# Sabit sleep yerine sağlayıcı başına token-bucket (RATE_LIMIT_DB ile worker'lar arası ortak)
+provider_limiters = {
+    'google_books': make_bucket('google_books', config.GOOGLE_BOOKS_RATE_LIMIT,
+                                config.GOOGLE_BOOKS_RATE_BURST, config.RATE_LIMIT_DB),
+    'tmdb': make_bucket('tmdb', config.TMDB_RATE_LIMIT, config.TMDB_RATE_BURST, config.RATE_LIMIT_DB),
+    'lastfm': make_bucket('lastfm', config.LASTFM_RATE_LIMIT, config.LASTFM_RATE_BURST, config.RATE_LIMIT_DB),
+    'spotify': make_bucket('spotify', config.SPOTIFY_RATE_LIMIT, config.SPOTIFY_RATE_BURST, config.RATE_LIMIT_DB),
+}
+
+# Sağlayıcı aramaları: süreç içi LRU + worker'lar arası paylaşılan SQLite önbelleği
+response_cache = ResponseCache(
+    path=config.PROVIDER_CACHE_PATH or os.path.join(app.instance_path, 'provider_cache.db'),
+    ttls={
+        'google_books': config.GOOGLE_BOOKS_CACHE_TTL,
+        'tmdb': config.TMDB_CACHE_TTL,
+        'lastfm': config.LASTFM_CACHE_TTL,
+    },
+    max_entries=config.PROVIDER_CACHE_MAX_ENTRIES,
+    lock_timeout=config.PROVIDER_LOCK_TIMEOUT,
+    logger=app.logger,
+)
+
+@response_cache.cached('google_books', 'volumes')
 def fetch_google_books_api(query, max_results=10):
     """Google Books API'den kitap verisi çeker"""
     if not config.has_google_books_api:
@@ -735,7 +622,8 @@ def fetch_google_books_api(query, max_results=10):
             'orderBy': 'relevance'
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        provider_limiters['google_books'].acquire()
+        response = get_client('google_books').get(url, params=params)
         if response.status_code == 200:
             data = response.json()
             books = []
@@ -767,6 +655,7 @@ def fetch_google_books_api(query, max_results=10):
         app.logger.error(f"Google Books API isteği başarısız: {str(e)}")
         return []
 
+@response_cache.cached('tmdb', 'search/movie')
 def fetch_tmdb_movies_api(query, max_results=10):
     """TMDB API'den film verisi çeker"""
     if not config.has_tmdb_api:
@@ -782,7 +671,8 @@ def fetch_tmdb_movies_api(query, max_results=10):
             'page': 1
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        provider_limiters['tmdb'].acquire()
+        response = get_client('tmdb').get(url, params=params)
         if response.status_code == 200:
             data = response.json()
             movies = []
@@ -813,6 +703,7 @@ def fetch_tmdb_movies_api(query, max_results=10):
         app.logger.error(f"TMDB API isteği başarısız: {str(e)}")
         return []
 
+@response_cache.cached('tmdb', 'search/tv')
 def fetch_tmdb_tv_api(query, max_results=10):
     """TMDB API'den dizi verisi çeker"""
     if not config.has_tmdb_api:
@@ -828,7 +719,8 @@ def fetch_tmdb_tv_api(query, max_results=10):
             'page': 1
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        provider_limiters['tmdb'].acquire()
+        response = get_client('tmdb').get(url, params=params)
         if response.status_code == 200:
             data = response.json()
             series = []
@@ -859,6 +751,7 @@ def fetch_tmdb_tv_api(query, max_results=10):
         app.logger.error(f"TMDB API isteği başarısız: {str(e)}")
         return []
 
+@response_cache.cached('lastfm', 'track.search')
 def fetch_lastfm_music_api(query, max_results=10):
     """Last.fm API'den müzik verisi çeker"""
     if not config.has_lastfm_api:
@@ -875,7 +768,8 @@ def fetch_lastfm_music_api(query, max_results=10):
             'limit': max_results
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        provider_limiters['lastfm'].acquire()
+        response = get_client('lastfm').get(url, params=params)
         if response.status_code == 200:
             data = response.json()
             tracks = []
@@ -928,7 +822,7 @@ def get_huggingface_ai_recommendation(user_input, content_type="book"):
         
         payload = {"inputs": prompt}
         
-        response = requests.post(url, headers=headers, json=payload, timeout=15)
+        response = get_client('huggingface').post(url, headers=headers, json=payload)
         if response.status_code == 200:
             ai_response = response.json()
             app.logger.info(f"Hugging Face AI'dan cevap alındı: {content_type}")
@@ -942,473 +836,105 @@ def get_huggingface_ai_recommendation(user_input, content_type="book"):
         return []
 
 # ============= İYİLEŞTİRİLMİŞ ÖNERİ ALGORİTMALARI (API ENTEGRELİ) =============
+# Dört kategori de ortak öneri akışında çalışır (bkz. pipeline.py ve aşağıdaki CategorySpec'ler)
 
-def generate_book_recommendations(kullanici_kitaplari, yas, tur, min_sayfa, max_sayfa, notlar):
+def generate_book_recommendations(kullanici_kitaplari, yas, tur, min_sayfa, max_sayfa, notlar, deadline=None):
     """API entegreli kitap öneri algoritması"""
-    all_recommendations = []
-    
-    # 1. API'den veri çekmeyi dene
-    if config.has_google_books_api:
-        try:
-            # Kullanıcı kitaplarından anahtar kelimeler çıkar
-            search_terms = []
-            for kitap in kullanici_kitaplari:
-                search_terms.extend(kitap.split()[:2])  # İlk 2 kelimeyi al
-            
-            # Tür bilgisini ekle
-            if tur and tur != 'hepsi':
-                search_terms.append(tur)
-            
-            # Notlardan anahtar kelimeleri ekle
-            if notlar:
-                search_terms.extend(notlar.split()[:3])
-            
-            # API'den öneriler çek
-            api_books_all = []
-            for term in search_terms[:3]:  # İlk 3 terimle arama yap
-                new_books = fetch_google_books_api(term, 5)
-                
-                # Duplicate kontrolü ile ekle
-                for new_book in new_books:
-                    new_title_lower = new_book['baslik'].lower().strip()
-                    is_duplicate = False
-                    
-                    # Mevcut API kitaplarıyla karşılaştır
-                    for existing_book in api_books_all:
-                        existing_title_lower = existing_book['baslik'].lower().strip()
-                        if (calculate_similarity(new_title_lower, existing_title_lower) > 0.8 or
-                            new_title_lower == existing_title_lower):
-                            is_duplicate = True
-                            break
-                    
-                    # Kullanıcı kitaplarıyla karşılaştır
-                    for user_book in kullanici_kitaplari:
-                        user_book_lower = user_book.lower().strip()
-                        if (calculate_similarity(new_title_lower, user_book_lower) > 0.8 or
-                            user_book_lower in new_title_lower):
-                            is_duplicate = True
-                            break
-                    
-                    if not is_duplicate:
-                        api_books_all.append(new_book)
-                
-                time.sleep(0.3)  # API rate limit için
-            
-            all_recommendations.extend(api_books_all)
-            
-            app.logger.info(f"API'den {len(all_recommendations)} kitap önerisi alındı")
-            
-        except Exception as e:
-            app.logger.error(f"API kitap önerisi hatası: {str(e)}")
-    
-    # Manuel veritabanından da öneri al (çeşitlilik için)
-    manual_books = get_all_books_database()
-    
-    # Yaş filtreleme (13+ için gençler)
-    if yas and yas < 13:
-        manual_books = [k for k in manual_books if k.get('yas_uygun', True)]
-    
-    # Girilen kitapları çıkar (daha akıllı eşleştirme)
-    girilen_kitaplar_lower = [kitap.lower().strip() for kitap in kullanici_kitaplari]
-    filtered_manual = []
-    
-    for book in manual_books:
-        is_duplicate = False
-        book_title_lower = book['baslik'].lower().strip()
-        book_author_lower = book.get('yazar', '').lower().strip()
-        
-        # API sonuçlarıyla çakışma kontrolü
-        for api_book in all_recommendations:
-            api_title_lower = api_book['baslik'].lower().strip()
-            if (calculate_similarity(book_title_lower, api_title_lower) > 0.8 or 
-                book_title_lower == api_title_lower):
-                is_duplicate = True
-                break
-        
-        # Kullanıcı kitaplarıyla çakışma kontrolü
-        for girilen in girilen_kitaplar_lower:
-            if (calculate_similarity(girilen, book_title_lower) > 0.8 or
-                girilen in book_title_lower or book_title_lower in girilen or
-                (book_author_lower and girilen in book_author_lower)):
-                is_duplicate = True
-                break
-        
-        # Zaten listedeki kitaplarla çakışma kontrolü
-        for existing_book in filtered_manual:
-            existing_title_lower = existing_book['baslik'].lower().strip()
-            if (calculate_similarity(book_title_lower, existing_title_lower) > 0.8 or
-                book_title_lower == existing_title_lower):
-                is_duplicate = True
-                break
-        
-        if not is_duplicate:
-            filtered_manual.append(book)
-    
-    # Tür filtreleme (manuel veriler için)
-    if tur and tur != 'hepsi':
-        filtered_manual = [b for b in filtered_manual if b.get('tur', '').lower() == tur.lower()]
-    
-    # Sayfa filtreleme (manuel veriler için)
-    if min_sayfa or max_sayfa:
-        page_filtered = []
-        for book in filtered_manual:
-            pages = book.get('sayfa', 0)
-            if min_sayfa and pages < int(min_sayfa):
-                continue
-            if max_sayfa and pages > int(max_sayfa):
-                continue
-            page_filtered.append(book)
-        filtered_manual = page_filtered
-    
-    # Manuel önerileri ekle
-    all_recommendations.extend(filtered_manual[:10])  # En fazla 10 manuel öneri
-    
-    # 3. Akıllı puanlama ve sıralama
-    scored_recommendations = calculate_smart_book_similarity(all_recommendations, kullanici_kitaplari, notlar, yas)
-    
-    # 4. Çeşitlilik sağla: API ve manuel karışımı (duplicate kontrolle)
-    final_recommendations = []
-    used_titles = set()  # Başlıkları takip et
-    api_count = 0
-    manual_count = 0
-    
-    for book in scored_recommendations:
-        if len(final_recommendations) >= 8:
-            break
-            
-        book_title_lower = book['baslik'].lower().strip()
-        
-        # Başlık tekrarını kontrol et
-        if book_title_lower in used_titles:
-            continue
-            
-        # Kullanıcı kitaplarıyla son bir kez kontrol et
-        is_user_book = False
-        for user_book in kullanici_kitaplari:
-            user_book_lower = user_book.lower().strip()
-            if (calculate_similarity(book_title_lower, user_book_lower) > 0.8 or
-                user_book_lower in book_title_lower or book_title_lower in user_book_lower):
-                is_user_book = True
-                break
-        
-        if is_user_book:
-            continue
-            
-        if book.get('api_source') == 'google_books' and api_count < 7:
-            final_recommendations.append(book)
-            used_titles.add(book_title_lower)
-            api_count += 1
-        elif book.get('api_source') != 'google_books' and manual_count < 1:
-            final_recommendations.append(book)
-            used_titles.add(book_title_lower)
-            manual_count += 1
-    
-    # Eğer yeterli öneri yoksa, kalan yerleri doldur
-    if len(final_recommendations) < 8:
-        remaining = 8 - len(final_recommendations)
-        for book in scored_recommendations:
-            if book not in final_recommendations and remaining > 0:
-                final_recommendations.append(book)
-                remaining -= 1
-    
-    app.logger.info(f"Toplam {len(final_recommendations)} kitap önerisi hazırlandı (API: {api_count}, Manuel: {manual_count})")
-    return final_recommendations[:15]
-
-def generate_film_recommendations(kullanici_filmleri, yas, tur, notlar):
+    return recommendation_pipeline.run('kitap', kullanici_kitaplari, yas, tur, notlar, deadline=deadline,
+                                       min_sayfa=min_sayfa, max_sayfa=max_sayfa)
+
+def generate_film_recommendations(kullanici_filmleri, yas, tur, notlar, deadline=None):
     """API entegreli film öneri algoritması"""
-    all_recommendations = []
-    
-    # 1. TMDB API'den veri çekmeyi dene
-    if config.has_tmdb_api:
-        try:
-            # Kullanıcı filmlerinden anahtar kelimeler çıkar
-            search_terms = []
-            for film in kullanici_filmleri:
-                search_terms.extend(film.split()[:2])
-            
-            # Tür ve notları ekle
-            if tur and tur != 'hepsi':
-                search_terms.append(tur)
-            if notlar:
-                search_terms.extend(notlar.split()[:3])
-            
-            # API'den öneriler çek
-            for term in search_terms[:3]:
-                api_movies = fetch_tmdb_movies_api(term, 5)
-                all_recommendations.extend(api_movies)
-                time.sleep(0.3)
-            
-            app.logger.info(f"TMDB API'den {len(all_recommendations)} film önerisi alındı")
-            
-        except Exception as e:
-            app.logger.error(f"API film önerisi hatası: {str(e)}")
-    
-    # 2. Manuel veritabanından öneri al
-    manual_movies = get_all_films_database()
-    
-    # Yaş filtreleme (13+ gençler için)
-    if yas and yas < 13:
-        manual_movies = [film for film in manual_movies if film.get('yas_uygun', True)]
-    
-    # Kullanıcı filmlerini çıkar
-    kullanici_filmleri_lower = [film.lower().strip() for film in kullanici_filmleri]
-    filtered_manual = []
-    
-    for movie in manual_movies:
-        is_duplicate = False
-        movie_title_lower = movie['baslik'].lower().strip()
-        
-        # API sonuçlarıyla çakışma kontrolü
-        for api_movie in all_recommendations:
-            api_title_lower = api_movie['baslik'].lower().strip()
-            if (calculate_similarity(movie_title_lower, api_title_lower) > 0.8 or 
-                movie_title_lower == api_title_lower):
-                is_duplicate = True
-                break
-        
-        # Kullanıcı filmleriyle çakışma kontrolü
-        for user_film in kullanici_filmleri_lower:
-            if (calculate_similarity(movie_title_lower, user_film) > 0.8 or
-                user_film in movie_title_lower or movie_title_lower in user_film):
-                is_duplicate = True
-                break
-        
-        # Önceki önerilerle çakışma kontrolü
-        for existing_movie in filtered_manual:
-            existing_title_lower = existing_movie['baslik'].lower().strip()
-            if (calculate_similarity(movie_title_lower, existing_title_lower) > 0.8 or
-                movie_title_lower == existing_title_lower):
-                is_duplicate = True
-                break
-        
-        if not is_duplicate:
-            filtered_manual.append(movie)
-    
-    # Tür filtreleme
-    if tur and tur != 'hepsi':
-        filtered_manual = [film for film in filtered_manual if film.get('tur', '') == tur]
-    
-    # Manuel önerileri ekle (7:1 oranı için az sayıda)
-    all_recommendations.extend(filtered_manual[:2])  # En fazla 2 manuel film
-    
-    # AI skorlama
-    scored_oneriler = calculate_film_similarity_scores(all_recommendations, kullanici_filmleri, notlar)
-    
-    return scored_oneriler[:12]
-
-def generate_series_recommendations(kullanici_dizileri, yas, tur, notlar):
+    return recommendation_pipeline.run('film', kullanici_filmleri, yas, tur, notlar, deadline=deadline)
+
+def generate_series_recommendations(kullanici_dizileri, yas, tur, notlar, deadline=None):
     """API entegreli dizi öneri algoritması"""
-    all_recommendations = []
-    
-    # 1. TMDB API'den dizi verisi çek
-    if config.has_tmdb_api:
-        try:
-            search_terms = []
-            for dizi in kullanici_dizileri:
-                search_terms.extend(dizi.split()[:2])
-            
-            if tur and tur != 'hepsi':
-                search_terms.append(tur)
-            if notlar:
-                search_terms.extend(notlar.split()[:3])
-            
-            for term in search_terms[:3]:
-                api_series = fetch_tmdb_tv_api(term, 5)
-                all_recommendations.extend(api_series)
-                time.sleep(0.3)
-            
-            app.logger.info(f"TMDB API'den {len(all_recommendations)} dizi önerisi alındı")
-            
-        except Exception as e:
-            app.logger.error(f"API dizi önerisi hatası: {str(e)}")
-    
-    # 2. Manuel veritabanı
-    manual_series = get_all_series_database()
-    
-    # Yaş filtreleme (13+ gençler için)
-    if yas and yas < 13:
-        manual_series = [dizi for dizi in manual_series if dizi.get('yas_uygun', True)]
-    
-    # Kullanıcı dizilerini çıkar
-    kullanici_dizileri_lower = [dizi.lower() for dizi in kullanici_dizileri]
-    filtered_manual = []
-    
-    for serie in manual_series:
-        is_duplicate = False
-        serie_title_lower = serie['baslik'].lower()
-        
-        # API sonuçlarıyla çakışma kontrolü
-        for api_serie in all_recommendations:
-            if calculate_similarity(serie_title_lower, api_serie['baslik'].lower()) > 0.7:
-                is_duplicate = True
-                break
-        
-        if serie_title_lower not in kullanici_dizileri_lower and not is_duplicate:
-            filtered_manual.append(serie)
-    
-    # Tür filtreleme
-    if tur and tur != 'hepsi':
-        filtered_manual = [dizi for dizi in filtered_manual if dizi.get('tur', '') == tur]
-    
-    # Manuel önerileri ekle (7:1 oranı için az sayıda)
-    all_recommendations.extend(filtered_manual[:2])  # En fazla 2 manuel dizi
-    
-    # AI skorlama
-    scored_oneriler = calculate_series_similarity_scores(all_recommendations, kullanici_dizileri, notlar)
-    
-    return scored_oneriler[:12]
+    return recommendation_pipeline.run('dizi', kullanici_dizileri, yas, tur, notlar, deadline=deadline)
 
-def generate_music_recommendations(kullanici_muzikleri, yas, tur, notlar):
+def generate_music_recommendations(kullanici_muzikleri, yas, tur, notlar, deadline=None):
     """API entegreli müzik öneri algoritması"""
-    all_recommendations = []
-    
-    # 1. Last.fm API'den müzik verisi çek
-    if config.has_lastfm_api:
-        try:
-            search_terms = []
-            for muzik in kullanici_muzikleri:
-                # Şarkı adından sanatçı ayırma dene
-                if ' - ' in muzik:
-                    track, artist = muzik.split(' - ', 1)
-                    search_terms.append(track.strip())
-                    search_terms.append(artist.strip())
-                else:
-                    search_terms.extend(muzik.split()[:2])
-            
-            if tur and tur != 'hepsi':
-                search_terms.append(tur)
-            if notlar:
-                search_terms.extend(notlar.split()[:3])
-            
-            for term in search_terms[:3]:
-                api_music = fetch_lastfm_music_api(term, 5)
-                all_recommendations.extend(api_music)
-                time.sleep(0.3)
-            
-            app.logger.info(f"Last.fm API'den {len(all_recommendations)} şarkı önerisi alındı")
-            
-        except Exception as e:
-            app.logger.error(f"API müzik önerisi hatası: {str(e)}")
-    
-    # 2. Manuel veritabanından öneri al
-    manual_music = get_all_music_database()
-    
-    # Yaş filtreleme (13+ gençler için)
-    if yas and yas < 13:
-        manual_music = [muzik for muzik in manual_music if muzik.get('yas_uygun', True)]
-    
-    # Kullanıcı müziklerini çıkar
-    kullanici_muzikleri_lower = [muzik.lower().strip() for muzik in kullanici_muzikleri]
-    filtered_manual = []
-    
-    for music in manual_music:
-        is_duplicate = False
-        music_title_lower = music['baslik'].lower().strip()
-        music_artist_lower = music.get('sanatci', '').lower().strip()
-        
-        # API sonuçlarıyla çakışma kontrolü
-        for api_music in all_recommendations:
-            api_title_lower = api_music['baslik'].lower().strip()
-            api_artist_lower = api_music.get('sanatci', '').lower().strip()
-            
-            if (calculate_similarity(music_title_lower, api_title_lower) > 0.8 or 
-                music_title_lower == api_title_lower or
-                (music_artist_lower and api_artist_lower and 
-                 calculate_similarity(music_artist_lower, api_artist_lower) > 0.8)):
-                is_duplicate = True
-                break
-        
-        # Kullanıcı müzikleriyle çakışma kontrolü
-        for user_music in kullanici_muzikleri_lower:
-            if (calculate_similarity(music_title_lower, user_music) > 0.8 or
-                user_music in music_title_lower or music_title_lower in user_music or
-                (music_artist_lower and user_music in music_artist_lower)):
-                is_duplicate = True
-                break
-        
-        # Önceki önerilerle çakışma kontrolü
-        for existing_music in filtered_manual:
-            existing_title_lower = existing_music['baslik'].lower().strip()
-            existing_artist_lower = existing_music.get('sanatci', '').lower().strip()
-            
-            if (calculate_similarity(music_title_lower, existing_title_lower) > 0.8 or
-                music_title_lower == existing_title_lower or
-                (music_artist_lower and existing_artist_lower and
-                 music_artist_lower == existing_artist_lower)):
-                is_duplicate = True
-                break
-        
-        if not is_duplicate:
-            filtered_manual.append(music)
-    
-    # Tür filtreleme
-    if tur and tur != 'hepsi':
-        filtered_manual = [muzik for muzik in filtered_manual if muzik.get('tur', '') == tur]
-    
-    # Eğer filtrelenmiş öneri yoksa, tüm müzikleri kullan
-    if not filtered_manual and not all_recommendations:
-        filtered_manual = manual_music[:4]  # Acil durum için 4 adet
-    
-    # Manuel önerileri ekle (7:1 oranı için az sayıda)
-    all_recommendations.extend(filtered_manual[:2])  # En fazla 2 manuel müzik
-    
-    # AI skorlama
-    scored_oneriler = calculate_music_similarity_scores(all_recommendations, kullanici_muzikleri, notlar)
-    
-    return scored_oneriler[:20]
+    return recommendation_pipeline.run('muzik', kullanici_muzikleri, yas, tur, notlar, deadline=deadline)
 
 # ============= SPOTIFY PLAYLIST =============
+# Şarkı -> track URI çözümlemesi: kalıcı önbellek + sınırlı eşzamanlı arama
+spotify_resolver = SpotifyResolver(
+    make_ttl_store('spotify_sarki',
+                   path=config.SPOTIFY_RESOLVE_CACHE_PATH or os.path.join(app.instance_path, 'spotify_tracks.db'),
+                   logger=app.logger),
+    FanOut(max_workers=config.SPOTIFY_RESOLVE_WORKERS, logger=app.logger),
+    limiter=provider_limiters['spotify'],
+    found_ttl=config.SPOTIFY_TRACK_TTL,
+    not_found_ttl=config.SPOTIFY_NOT_FOUND_TTL,
+    logger=app.logger,
+)
+
 def search_spotify_track(sp, sarki_adi, sanatci=''):
-    """Spotify'da şarkı ara ve track URI'sini bul"""
-    try:
-        # Şarkı adı ve sanatçıyı temizle
-        query = f"{sarki_adi} {sanatci}".strip()
-        
-        # Spotify'da ara
-        results = sp.search(q=query, type='track', limit=3)
-        
-        if results['tracks']['items']:
-            # En iyi eşleşmeyi bul
-            best_match = results['tracks']['items'][0]
-            
-            return {
-                'uri': best_match['uri'],
-                'id': best_match['id'],
-                'name': best_match['name'],
-                'artist': best_match['artists'][0]['name'],
-                'album': best_match['album']['name'],
-                'image': best_match['album']['images'][0]['url'] if best_match['album']['images'] else None,
-                'preview_url': best_match.get('preview_url')
-            }
-        
-        return None
-        
-    except Exception as e:
-        app.logger.error(f"Spotify şarkı arama hatası: {str(e)}")
+    """Spotify'da şarkı ara ve track URI'sini bul (önbellekli)"""
+    return spotify_resolver.resolve(sp, sarki_adi, sanatci)
+
+TOKEN_EXPIRED = {
+    'error': 'token_expired',
+    'message': 'Spotify oturumunuz sona erdi. Lütfen tekrar bağlanın.',
+    'demo': True,
+    'login_url': '/spotify-login'
+}
+
+# Kullanıcı başına yeniden kullanılan, token'ı kendiliğinden yenilenen Spotify istemcisi
+spotify_tokens = SpotifyTokenManager(
+    SPOTIFY_CLIENT_ID,
+    SPOTIFY_CLIENT_SECRET,
+    refresh_margin=config.SPOTIFY_TOKEN_REFRESH_MARGIN,
+    proactive_window=config.SPOTIFY_TOKEN_PROACTIVE_WINDOW,
+    logger=app.logger,
+)
+
+def spotify_session_token():
+    """Oturumdaki Spotify token'ı; yönetici arada yenilediyse yenisi oturuma yazılır"""
+    if 'spotify_token' not in session:
         return None
+    info = spotify_tokens.remember(session.get('kullanici_adi'), {
+        'access_token': session['spotify_token'],
+        'refresh_token': session.get('spotify_refresh_token'),
+        'expires_at': session.get('spotify_expires_at'),
+    })
+    if info['access_token'] != session['spotify_token']:
+        session['spotify_token'] = info['access_token']
+        session['spotify_refresh_token'] = info.get('refresh_token')
+        session['spotify_expires_at'] = info.get('expires_at')
+    return info
+
+def forget_spotify_token():
+    session.pop('spotify_token', None)
+    session.pop('spotify_refresh_token', None)
+    session.pop('spotify_expires_at', None)
+    spotify_tokens.forget(session.get('kullanici_adi'))
+
+def spotify_playlist_preflight(sarkilar):
+    """Playlist işi başlatılamıyorsa hata sözlüğü, yoksa None - EN AZ 15 ŞARKI"""
+    # Spotify token kontrolü
+    if 'spotify_token' not in session:
+        return {
+            'error': 'spotify_not_connected',
+            'message': 'Spotify hesabınızı bağlamanız gerekiyor',
+            'demo': True,
+            'login_url': '/spotify-login'
+        }
+    
+    # En az 15 şarkı kontrolü
+    if len(sarkilar) < 15:
+        return {
+            'error': 'not_enough_tracks',
+            'message': f'En az 15 şarkı gerekli. Şu an {len(sarkilar)} şarkı var.',
+            'demo': True
+        }
+    return None
 
-def create_spotify_playlist(sarkilar, tur=None):
-    """Gerçek Spotify playlist oluştur - EN AZ 15 ŞARKI"""
+def create_spotify_playlist(job, user, token_info, sarkilar, tur=None):
+    """Gerçek Spotify playlist oluştur (arka plan işi; ilerleme job.progress ile yazılır)"""
     try:
-        # Spotify token kontrolü
-        if 'spotify_token' not in session:
-            return {
-                'error': 'spotify_not_connected',
-                'message': 'Spotify hesabınızı bağlamanız gerekiyor',
-                'demo': True,
-                'login_url': '/spotify-login'
-            }
-        
-        # En az 15 şarkı kontrolü
-        if len(sarkilar) < 15:
-            return {
-                'error': 'not_enough_tracks',
-                'message': f'En az 15 şarkı gerekli. Şu an {len(sarkilar)} şarkı var.',
-                'demo': True
-            }
-        
-        # Spotify client oluştur
-        sp = spotipy.Spotify(auth=session['spotify_token'])
+        # Kullanıcının paylaşılan Spotify client'ı; token bitmek üzereyse çağrıdan önce yenilenir
+        sp = spotify_tokens.client(user, token_info)
+        job.progress(asama='hazirlaniyor', toplam=len(sarkilar), bulunan=0, bulunamayan=0)
         
         # Kullanıcı bilgilerini al
         try:
@@ -1416,49 +942,32 @@ def create_spotify_playlist(sarkilar, tur=None):
             user_id = user_info['id']
         except spotipy.exceptions.SpotifyException as e:
             if 'token' in str(e).lower() or 'unauthorized' in str(e).lower():
-                session.pop('spotify_token', None)
-                return {
-                    'error': 'token_expired',
-                    'message': 'Spotify oturumunuz sona erdi. Lütfen tekrar bağlanın.',
-                    'demo': True,
-                    'login_url': '/spotify-login'
-                }
+                return TOKEN_EXPIRED
             raise
         
         # Playlist adı oluştur
         playlist_name = f"Listoria - {tur.title() if tur and tur != 'hepsi' else 'Karışık'} Mix 🎵"
         playlist_description = f"Listoria AI tarafından özel olarak sizin için oluşturuldu • {len(sarkilar)} şarkı"
         
-        # Yeni playlist oluştur
-        playlist = sp.user_playlist_create(
-            user=user_id,
-            name=playlist_name,
-            public=True,
-            description=playlist_description
-        )
+        # Şarkıları Spotify'da ara ve URI'leri topla
+        app.logger.info(f"Toplam {len(sarkilar)} şarkı aranıyor...")
+        job.progress(asama='araniyor')
+        sayac = {'bulunan': 0, 'bulunamayan': 0}
+        sayac_lock = threading.Lock()
         
-        playlist_id = playlist['id']
+        def sarki_cozuldu(idx, track_info):
+            with sayac_lock:
+                sayac['bulunan' if track_info else 'bulunamayan'] += 1
+                job.progress(**sayac)
+        
+        # Şarkı adı ve sanatçıyı ayır, hepsini birlikte çözümle (önbellek + eşzamanlı arama)
+        cozumler = spotify_resolver.resolve_all(sp, [split_song(sarki) for sarki in sarkilar],
+                                                on_result=sarki_cozuldu)
         
-        # Şarkıları Spotify'da ara ve URI'leri topla
         track_uris = []
         found_tracks = []
         not_found = []
-        
-        app.logger.info(f"Toplam {len(sarkilar)} şarkı aranıyor...")
-        
-        for idx, sarki in enumerate(sarkilar, 1):
-            # Şarkı adı ve sanatçıyı ayır
-            if ' - ' in sarki:
-                parts = sarki.split(' - ', 1)
-                sarki_adi = parts[0].strip()
-                sanatci = parts[1].strip() if len(parts) > 1 else ''
-            else:
-                sarki_adi = sarki.strip()
-                sanatci = ''
-            
-            # Spotify'da ara
-            track_info = search_spotify_track(sp, sarki_adi, sanatci)
-            
+        for idx, (sarki, track_info) in enumerate(zip(sarkilar, cozumler), 1):
             if track_info:
                 track_uris.append(track_info['uri'])
                 found_tracks.append(track_info)
@@ -1466,10 +975,6 @@ def create_spotify_playlist(sarkilar, tur=None):
             else:
                 not_found.append(sarki)
                 app.logger.warning(f"[{idx}/{len(sarkilar)}] Bulunamadı: {sarki}")
-            
-            # Rate limiting için kısa bekleme
-            if idx % 10 == 0:
-                time.sleep(0.3)
         
         # En az 15 şarkı bulundu mu kontrol et
         if len(track_uris) < 15:
@@ -1481,6 +986,17 @@ def create_spotify_playlist(sarkilar, tur=None):
                 'demo': True
             }
         
+        # Yeni playlist oluştur (yeterli şarkı bulunduktan sonra - boş playlist kalmasın)
+        job.progress(asama='ekleniyor')
+        playlist = sp.user_playlist_create(
+            user=user_id,
+            name=playlist_name,
+            public=True,
+            description=playlist_description
+        )
+        
+        playlist_id = playlist['id']
+        
         # Playlist'e şarkıları ekle (100'lük gruplar halinde - Spotify API limiti)
         for i in range(0, len(track_uris), 100):
             batch = track_uris[i:i+100]
@@ -1502,17 +1018,15 @@ def create_spotify_playlist(sarkilar, tur=None):
             'image': playlist.get('images', [{}])[0].get('url') if playlist.get('images') else None
         }
         
+    except SpotifyTokenError as e:
+        app.logger.warning(f"Spotify token yenilenemedi: {str(e)}")
+        return TOKEN_EXPIRED
+        
     except spotipy.exceptions.SpotifyException as e:
         app.logger.error(f"Spotify API hatası: {str(e)}")
         
         if 'token' in str(e).lower() or 'unauthorized' in str(e).lower():
-            session.pop('spotify_token', None)
-            return {
-                'error': 'token_expired',
-                'message': 'Spotify oturumunuz sona erdi. Lütfen tekrar bağlanın.',
-                'demo': True,
-                'login_url': '/spotify-login'
-            }
+            return TOKEN_EXPIRED
         
         return {
             'error': 'spotify_error',
@@ -1527,6 +1041,25 @@ def create_spotify_playlist(sarkilar, tur=None):
             'message': f'Playlist oluşturulamadı: {str(e)}',
             'demo': True
         }
+
+# Playlist oluşturma worker'ı meşgul etmesin: iş kuyruğu, durum tüm worker'larca okunur
+playlist_jobs = JobQueue(
+    config.JOB_STORE_PATH or os.path.join(app.instance_path, 'jobs.db'),
+    max_workers=config.PLAYLIST_JOB_WORKERS,
+    logger=app.logger,
+)
+playlist_jobs.register('spotify_playlist', create_spotify_playlist)
+
+def submit_spotify_playlist(sarkilar, tur=None):
+    """Playlist işini başlat; (iş kimliği, None) ya da (None, hata sözlüğü)"""
+    hata = spotify_playlist_preflight(sarkilar)
+    if hata:
+        return None, hata
+    user = session.get('kullanici_adi')
+    job_id = playlist_jobs.submit('spotify_playlist', owner=user, user=user,
+                                  token_info=spotify_session_token(), sarkilar=sarkilar, tur=tur)
+    return job_id, None
+
 # ============= PUANLAMA ALGORİTMALARI =============
 
 def calculate_similarity(str1, str2):
@@ -1534,17 +1067,29 @@ def calculate_similarity(str1, str2):
     from difflib import SequenceMatcher
     return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
 
-def calculate_smart_book_similarity(kitaplar, kullanici_kitaplari, notlar, yas):
-    """Akıllı kitap benzerlik puanlaması - API olmadan"""
+def use_vector_scoring():
+    """SCORING_BACKEND=numpy ise (ve numpy kuruluysa) vektörel puanlama motorunu kullan"""
+    return config.SCORING_BACKEND == 'numpy' and vector_scoring.available
+
+if config.SCORING_BACKEND == 'numpy' and not vector_scoring.available:
+    app.logger.warning("SCORING_BACKEND=numpy ama numpy kurulu değil, Python puanlama kullanılıyor")
+
+def calculate_smart_book_similarity(kitaplar, kullanici_kitaplari, notlar, yas, limit=None):
+    """Akıllı kitap benzerlik puanlaması - API olmadan; limit verilirse yalnızca ilk `limit` kitap"""
+    if use_vector_scoring():
+        return vector_scoring.score_books(kitaplar, kullanici_kitaplari, notlar, yas, limit=limit)
+    
     import random
     from datetime import datetime
     
+    puanlar = []
+    
     for kitap in kitaplar:
         puan = 0
         
         # Gerekli anahtarların varlığını kontrol et
         if not all(key in kitap for key in ['baslik', 'tur']):
-            kitap['puan'] = 0
+            puanlar.append(0)
             continue
             
         # 1. Notlar analizi (en önemli - %50)
@@ -1603,165 +1148,113 @@ def calculate_smart_book_similarity(kitaplar, kullanici_kitaplari, notlar, yas):
         
         # Toplam puan hesaplama
         toplam_puan = notlar_puani + tercih_puani + yas_puani + ceситlilik_puani
-        kitap['puan'] = round(toplam_puan, 2)
+        puanlar.append(round(toplam_puan, 2))
     
-    # Puana göre sırala
-    return sorted(kitaplar, key=lambda x: x.get('puan', 0), reverse=True)
+    # Puana göre sırala; limit verilirse tüm liste yerine ilk `limit` kitap heap ile seçilir
+    if limit is not None:
+        sira = heapq.nlargest(limit, range(len(kitaplar)), key=puanlar.__getitem__)
+    else:
+        sira = sorted(range(len(kitaplar)), key=puanlar.__getitem__, reverse=True)
+    
+    # Katalog kayıtları istekler arasında paylaşılıyor; puanı yalnızca döndürülen kopyalara yaz
+    return [dict(kitaplar[i], puan=puanlar[i]) for i in sira]
 
-def calculate_film_similarity_scores(filmler, kullanici_filmleri, notlar):
-    scored_filmler = []
+def calculate_media_similarity_scores(ogeler, kullanici_girdileri, notlar, tarz_alani, limit=None):
+    """
+    Film/dizi/müzik benzerlik skorları; sıralı öğeleri döndürür. limit verilirse
+    ilk `limit` öğe TopK heap'iyle seçilir ve üst sınırı heap'e giremeyecek
+    öğelerin kesin puanı hiç hesaplanmaz.
+    """
+    if use_vector_scoring():
+        return vector_scoring.score_media(ogeler, kullanici_girdileri, notlar, tarz_alani, limit=limit)
     
-    for film in filmler:
-        # Gerekli anahtarların varlığını kontrol et
-        if not all(key in film for key in ['baslik', 'tur']):
-            continue
-            
-        score = 0
-        
-        # Ek notlar en önemli faktör
-        if notlar and notlar.strip():
-            notlar_lower = notlar.lower()
-            film_tema = ' '.join(film.get('tema', [])).lower()
-            film_yonetmen_tarzi = film.get('yonetmen_tarzi', '').lower()
-            film_neden = film.get('neden', '').lower()
-            
-            notlar_kelimeleri = notlar_lower.split()
-            for kelime in notlar_kelimeleri:
-                if kelime in film_tema:
-                    score += 15
-                if kelime in film_yonetmen_tarzi:
-                    score += 10
-                if kelime in film_neden:
-                    score += 20
-                if kelime in film['baslik'].lower():
-                    score += 25
-        
-        # Tema benzerliği
-        for user_film in kullanici_filmleri:
-            user_film_lower = user_film.lower()
-            if any(tema in user_film_lower for tema in film.get('tema', [])):
-                score += 5
-        
-        # Rastgele çeşitlilik
-        import random
-        score += random.randint(1, 8)
-        
-        scored_filmler.append((film, score))
+    import random
     
-    # Skora göre sırala
-    scored_filmler.sort(key=lambda x: x[1], reverse=True)
-    return [film for film, score in scored_filmler]
-
-def calculate_series_similarity_scores(diziler, kullanici_dizileri, notlar):
-    scored_diziler = []
+    notlar_kelimeleri = notlar.lower().split() if notlar and notlar.strip() else []
+    top = TopK(limit) if limit is not None else None
+    scored = []
     
-    for dizi in diziler:
+    for oge in ogeler:
         # Gerekli anahtarların varlığını kontrol et
-        if not all(key in dizi for key in ['baslik', 'tur']):
+        if not all(key in oge for key in ['baslik', 'tur']):
             continue
-            
-        score = 0
+        
+        # Rastgele çeşitlilik: limit olsun olmasın aynı sayılar çekilsin diye her öğe için önce çekilir
+        score = random.randint(1, 8)
+        temalar = oge.get('tema', [])
+        if notlar_kelimeleri:
+            oge_tema = ' '.join(temalar).lower()
+            oge_tarzi = oge.get(tarz_alani, '').lower()
+            oge_neden = oge.get('neden', '').lower()
+            oge_baslik = oge['baslik'].lower()
+        
+        if top is not None:
+            # Üst sınır: tema benzerliği en fazla girdi başına 5, dört alandan birinde
+            # geçen not kelimesi en fazla 15+10+20+25 puan getirir
+            bound = score + (5 * len(kullanici_girdileri) if temalar else 0)
+            if notlar_kelimeleri:
+                metin = '\n'.join((oge_tema, oge_tarzi, oge_neden, oge_baslik))
+                bound += 70 * sum(1 for kelime in notlar_kelimeleri if kelime in metin)
+            if not top.can_enter(bound):
+                continue
         
         # Ek notlar en önemli faktör
-        if notlar and notlar.strip():
-            notlar_lower = notlar.lower()
-            dizi_tema = ' '.join(dizi.get('tema', [])).lower()
-            dizi_yapimci_tarzi = dizi.get('yapimci_tarzi', '').lower()
-            dizi_neden = dizi.get('neden', '').lower()
-            
-            notlar_kelimeleri = notlar_lower.split()
-            for kelime in notlar_kelimeleri:
-                if kelime in dizi_tema:
-                    score += 15
-                if kelime in dizi_yapimci_tarzi:
-                    score += 10
-                if kelime in dizi_neden:
-                    score += 20
-                if kelime in dizi['baslik'].lower():
-                    score += 25
+        for kelime in notlar_kelimeleri:
+            if kelime in oge_tema:
+                score += 15
+            if kelime in oge_tarzi:
+                score += 10
+            if kelime in oge_neden:
+                score += 20
+            if kelime in oge_baslik:
+                score += 25
         
         # Tema benzerliği
-        for user_dizi in kullanici_dizileri:
-            user_dizi_lower = user_dizi.lower()
-            if any(tema in user_dizi_lower for tema in dizi.get('tema', [])):
+        for girdi in kullanici_girdileri:
+            girdi_lower = girdi.lower()
+            if any(tema in girdi_lower for tema in temalar):
                 score += 5
         
-        # Rastgele çeşitlilik
-        import random
-        score += random.randint(1, 8)
-        
-        scored_diziler.append((dizi, score))
+        if top is not None:
+            top.push(score, oge)
+        else:
+            scored.append((oge, score))
+    
+    if top is not None:
+        return top.items()
     
     # Skora göre sırala
-    scored_diziler.sort(key=lambda x: x[1], reverse=True)
-    return [dizi for dizi, score in scored_diziler]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [oge for oge, score in scored]
+
+def calculate_film_similarity_scores(filmler, kullanici_filmleri, notlar, limit=None):
+    return calculate_media_similarity_scores(filmler, kullanici_filmleri, notlar, 'yonetmen_tarzi', limit)
+
+def calculate_series_similarity_scores(diziler, kullanici_dizileri, notlar, limit=None):
+    return calculate_media_similarity_scores(diziler, kullanici_dizileri, notlar, 'yapimci_tarzi', limit)
 
-def calculate_music_similarity_scores(muzikler, kullanici_muzikleri, notlar):
+def calculate_music_similarity_scores(muzikler, kullanici_muzikleri, notlar, limit=None):
     """Müzik benzerlik skorları"""
-    scored_muzikler = []
-    
-    for muzik in muzikler:
-        # Gerekli anahtarların varlığını kontrol et
-        if not all(key in muzik for key in ['baslik', 'tur']):
-            continue
-            
-        score = 0
-        
-        # Ek notlar en önemli faktör
-        if notlar and notlar.strip():
-            notlar_lower = notlar.lower()
-            muzik_tema = ' '.join(muzik.get('tema', [])).lower()
-            muzik_sanatci_tarzi = muzik.get('sanatci_tarzi', '').lower()
-            muzik_neden = muzik.get('neden', '').lower()
-            
-            notlar_kelimeleri = notlar_lower.split()
-            for kelime in notlar_kelimeleri:
-                if kelime in muzik_tema:
-                    score += 15
-                if kelime in muzik_sanatci_tarzi:
-                    score += 10
-                if kelime in muzik_neden:
-                    score += 20
-                if kelime in muzik['baslik'].lower():
-                    score += 25
-        
-        # Tema benzerliği
-        for user_muzik in kullanici_muzikleri:
-            user_muzik_lower = user_muzik.lower()
-            if any(tema in user_muzik_lower for tema in muzik.get('tema', [])):
-                score += 5
-        
-        # Rastgele çeşitlilik
-        import random
-        score += random.randint(1, 8)
-        
-        scored_muzikler.append((muzik, score))
-    
-    # Skora göre sırala
-    scored_muzikler.sort(key=lambda x: x[1], reverse=True)
-    return [muzik for muzik, score in scored_muzikler]
+    return calculate_media_similarity_scores(muzikler, kullanici_muzikleri, notlar, 'sanatci_tarzi', limit)
 
 # ============= VERİTABANI FONKSİYONLARI =============
 
+def iter_catalog_candidates(kategori, kullanici_girdileri, notlar, tur=None):
+    """
+    Katalog kayıtlarını ters indeks sırasıyla üretir: önce kullanıcının başlık ve
+    notlarıyla en çok token paylaşanlar, ardından (gerekirse) kalanlar. Çağıran
+    yeterli öneri bulduğunda döngüyü kırar; tüm katalog taranmaz.
+    """
+    snapshot = catalog_registry.snapshot(kategori)
+    index = snapshot.derived('index', build_index)
+    tokens = query_tokens(list(kullanici_girdileri) + [notlar or ''])
+    tur_filtresi = tur if tur and tur != 'hepsi' else None
+    for item_id in index.iter_candidates(tokens, tur=tur_filtresi):
+        yield snapshot.items[item_id]
+
 def get_all_books_database():
-    """Kitap veritabanı - API hazır olduğunda JSON dosyasından okuyacak"""
-    try:
-        # JSON dosyasından oku (eğer varsa)
-        json_path = os.path.join(os.path.dirname(__file__), 'data', 'books.json')
-        
-        if os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf-8') as f:
-                books = json.load(f)
-                app.logger.info(f"JSON'dan {len(books)} kitap yüklendi")
-                return books
-        
-        # JSON yoksa manuel veri (API entegrasyonuna kadar)
-        app.logger.warning("JSON kitap dosyası bulunamadı, manuel veri kullanılıyor")
-        return get_temp_books_for_demo()
-        
-    except Exception as e:
-        app.logger.error(f"Kitap veritabanı yükleme hatası: {e}")
-        return get_temp_books_for_demo()
+    """Kitap veritabanı - data/books.json bellekteki katalogdan sunulur"""
+    return list(catalog_registry.items('kitap'))
 
 def get_temp_books_for_demo():
     """Gençlere yönelik demo kitapları - API'lar hazır olduğunda silinecek"""
@@ -1800,7 +1293,11 @@ def get_temp_books_for_demo():
     ]
 
 def get_all_films_database():
-    """Film veritabanı"""
+    """Film veritabanı - data/movies.json yoksa demo verisi"""
+    return list(catalog_registry.items('film'))
+
+def get_temp_films_for_demo():
+    """Demo film verisi - ingestion çıktısı olmadığında kullanılır"""
     return [
         # Aksiyon
         {'baslik': 'The Dark Knight', 'yonetmen': 'Christopher Nolan', 'dakika': 152, 'tur': 'Aksiyon', 'yas_uygun': False, 'tema': ['super kahraman', 'adalet', 'kaos'], 'yonetmen_tarzi': 'karmaşık_anlatım', 'neden': 'Batman ve Joker arasındaki psikolojik savaş'},
@@ -1826,7 +1323,11 @@ def get_all_films_database():
     ]
 
 def get_all_series_database():
-    """Dizi veritabanı"""
+    """Dizi veritabanı - data/series.json yoksa demo verisi"""
+    return list(catalog_registry.items('dizi'))
+
+def get_temp_series_for_demo():
+    """Demo dizi verisi - ingestion çıktısı olmadığında kullanılır"""
     return [
         # Drama
         {'baslik': 'Breaking Bad', 'yaratici': 'Vince Gilligan', 'sezon': 5, 'tur': 'Drama', 'yas_uygun': False, 'tema': ['uyuşturucu', 'dönüşüm', 'aile'], 'yapimci_tarzi': 'karanlık_drama', 'neden': 'Kimya öğretmeninin uyuşturucu baronuna dönüşümü'},
@@ -1848,7 +1349,11 @@ def get_all_series_database():
     ]
 
 def get_all_music_database():
-    """Müzik veritabanı - Türkçe ağırlıklı"""
+    """Müzik veritabanı - data/music.json yoksa demo verisi"""
+    return list(catalog_registry.items('muzik'))
+
+def get_temp_music_for_demo():
+    """Demo müzik verisi (Türkçe ağırlıklı) - ingestion çıktısı olmadığında kullanılır"""
     return [
         # Pop Türkçe
         {'baslik': 'Aşk', 'sanatci': 'Tarkan', 'tur': 'Pop', 'dil': 'Türkçe', 'yil': 2001, 'tema': ['aşk', 'romantik'], 'sanatci_tarzi': 'pop_star', 'yas_uygun': True, 'neden': 'Türk pop müziğinin klasiği'},
@@ -1885,6 +1390,88 @@ def get_all_music_database():
         {'baslik': 'What\'s Going On', 'sanatci': 'Marvin Gaye', 'tur': 'R&B', 'dil': 'İngilizce', 'yil': 1971, 'tema': ['sosyal', 'barış', 'siyah'], 'sanatci_tarzi': 'conscious_soul', 'yas_uygun': True, 'neden': 'Sosyal bilinç ve barış mesajı'}
     ]
 
+# Kataloglar worker başına bir kez yüklenir, dosya değişince otomatik yenilenir
+catalog_registry = CatalogRegistry(check_interval=config.CATALOG_RELOAD_INTERVAL, logger=app.logger)
+catalog_registry.register('kitap', 'books.json', fallback=get_temp_books_for_demo)
+catalog_registry.register('film', 'movies.json', fallback=get_temp_films_for_demo)
+catalog_registry.register('dizi', 'series.json', fallback=get_temp_series_for_demo)
+catalog_registry.register('muzik', 'music.json', fallback=get_temp_music_for_demo)
+
+# ============= ÖNERİ AKIŞI =============
+
+def song_terms(muzik):
+    """'Şarkı - Sanatçı' girdisinden şarkı adı ve sanatçı ayrı terim olur"""
+    if ' - ' in muzik:
+        return [part for part in split_song(muzik) if part]
+    return muzik.split()[:2]
+
+def page_range_allowed(book, istek):
+    """Kitabın sayfa sayısı formdaki aralıkta mı"""
+    pages = book.get('sayfa', 0)
+    min_sayfa = istek.options.get('min_sayfa')
+    max_sayfa = istek.options.get('max_sayfa')
+    if min_sayfa and pages < int(min_sayfa):
+        return False
+    if max_sayfa and pages > int(max_sayfa):
+        return False
+    return True
+
+def music_fallback(istek):
+    """Hiç öneri çıkmazsa kataloğun başındaki (yaşa uygun) iki şarkı - acil durum için"""
+    return list(islice((m for m in catalog_registry.items('muzik') if age_allowed(m, istek)), 2))
+
+recommendation_pipeline = RecommendationPipeline(
+    provider_fanout,
+    iter_catalog_candidates,
+    degraded=provider_degraded,
+    logger=app.logger,
+)
+recommendation_pipeline.register(CategorySpec(
+    kategori='kitap',
+    provider='google_books',
+    fetch=fetch_google_books_api,
+    enabled=lambda: config.has_google_books_api,
+    score=lambda kitaplar, istek, limit: calculate_smart_book_similarity(kitaplar, istek.girdiler, istek.notlar,
+                                                                       istek.yas, limit),
+    limit=8,
+    # Katalogdan en fazla 10 aday; sonuçta 7 API + 1 katalog önerisi
+    catalog_limit=10,
+    degraded_catalog_limit=10,
+    match_field='yazar',
+    filters=(page_range_allowed,),
+    diversify=quota_mix(7, 1),
+))
+recommendation_pipeline.register(CategorySpec(
+    kategori='film',
+    provider='tmdb',
+    fetch=fetch_tmdb_movies_api,
+    enabled=lambda: config.has_tmdb_api,
+    score=lambda filmler, istek, limit: calculate_film_similarity_scores(filmler, istek.girdiler, istek.notlar, limit),
+    limit=12,
+))
+recommendation_pipeline.register(CategorySpec(
+    kategori='dizi',
+    provider='tmdb',
+    fetch=fetch_tmdb_tv_api,
+    enabled=lambda: config.has_tmdb_api,
+    score=lambda diziler, istek, limit: calculate_series_similarity_scores(diziler, istek.girdiler, istek.notlar, limit),
+    limit=12,
+    dedup_threshold=0.7,
+))
+recommendation_pipeline.register(CategorySpec(
+    kategori='muzik',
+    provider='lastfm',
+    fetch=fetch_lastfm_music_api,
+    enabled=lambda: config.has_lastfm_api,
+    score=lambda muzikler, istek, limit: calculate_music_similarity_scores(muzikler, istek.girdiler, istek.notlar, limit),
+    limit=20,
+    input_terms=song_terms,
+    degraded_catalog_limit=20,
+    match_field='sanatci',
+    unique_field='sanatci',
+    fallback=music_fallback,
+))
+
 # ============= GOOGLE LOGIN =============
 
 @app.route('/google_giris')
@@ -1924,7 +1511,7 @@ def callback():
             redirect_url=request.base_url,
             client_secret=config.GOOGLE_CLIENT_SECRET
         )
-        token_response = requests.post(
+        token_response = get_client('google').post(
             token_url,
             headers=headers,
             data=body,
@@ -1934,7 +1521,7 @@ def callback():
 
         userinfo_endpoint = google_provider_cfg["userinfo_endpoint"]
         uri, headers, body = client.add_token(userinfo_endpoint)
-        userinfo_response = requests.get(uri, headers=headers)
+        userinfo_response = get_client('google').get(uri, headers=headers)
         
         if userinfo_response.json().get("email_verified"):
             users_email = userinfo_response.json()["email"]
@@ -1943,23 +1530,23 @@ def callback():
             # Yaş kontrolü için kullanıcıdan doğum tarihi isteyebiliriz
             # Ama şimdilik Google hesabı olanların 13+ olduğunu varsayıyoruz
             
-            conn = get_db_connection()
-            user_in_db = conn.execute('SELECT 1 FROM kullanicilar WHERE email = ?', (users_email,)).fetchone()
+            user_in_db = user_repository.get_by_email(users_email)
             
             if user_in_db:
                 session['logged_in'] = True
-                session['kullanici_adi'] = users_name
-                conn.close()
+                # Profil kayıtlı kullanıcı adıyla bulunur (Google'daki ad farklı olabilir)
+                session['kullanici_adi'] = user_in_db.kullanici_adi or users_name
+                remember_profile(Profile.build(session['kullanici_adi'], users_email, user_in_db.dogum_tarihi))
                 app.logger.info(f"Google ile giriş başarılı: {users_email}")
                 return redirect(url_for('dashboard'))
             else:
                 # Yeni kullanıcı - varsayılan doğum tarihi (gençler için uygun)
-                conn.execute('INSERT INTO kullanicilar (email, kullanici_adi, sifre, dogum_tarihi) VALUES (?, ?, ?, ?)', 
-                           (users_email, users_name, 'google_login', '2000-01-01'))
-                conn.commit()
+                # Google adı başka bir kullanıcıda olabilir; kullanici_adi benzersiz olmalı
+                users_name = user_repository.available_username(users_name)
+                user_repository.insert(users_email, users_name, 'google_login', '2000-01-01')
                 session['logged_in'] = True
                 session['kullanici_adi'] = users_name
-                conn.close()
+                remember_profile(Profile.build(users_name, users_email, '2000-01-01'))
                 app.logger.info(f"Yeni Google kullanıcısı kaydedildi: {users_email}")
                 return redirect(url_for('dashboard'))
         else:
@@ -2022,7 +1609,8 @@ def api_test():
         except Exception as e:
             test_results['hugging_face'] = f'Hata: {str(e)[:50]}'
     
-    return render_template('api-test.html', test_results=test_results)
+    return render_template('api-test.html', test_results=test_results, http_stats=connection_stats(), cache_stats=response_cache.stats(),
+                           pipeline_stats=recommendation_pipeline.stats())
 
 # ============= ŞİFRE SIFIRLAMA =============
 
@@ -2037,18 +1625,7 @@ def sifre_sifirla():
     if not email:
         return render_template('sifremi-unuttum.html', hata="Lütfen bir e-posta adresi giriniz.")
     
-    conn = get_db_connection()
-    
-    # PostgreSQL için cursor kullan
-    if 'DATABASE_URL' in os.environ:
-        cursor = conn.cursor()
-        cursor.execute('SELECT 1 FROM kullanicilar WHERE email = %s', (email,))
-        kullanici = cursor.fetchone()
-        cursor.close()
-    else:
-        kullanici = conn.execute('SELECT 1 FROM kullanicilar WHERE email = ?', (email,)).fetchone()
-    
-    conn.close()
+    kullanici = user_repository.get_by_email(email)
 
     if not kullanici:
         return render_template('sifremi-unuttum.html', hata="Bu e-posta adresi sistemimizde kayıtlı değil.")
@@ -2088,13 +1665,11 @@ def yeni_sifre():
     girilen_kod = request.form['kod']
     yeni_sifre = request.form['yeni_sifre']
 
-    if email in password_reset_codes and password_reset_codes[email] == girilen_kod:
-        conn = get_db_connection()
-        conn.execute('UPDATE kullanicilar SET sifre = ? WHERE email = ?', (yeni_sifre, email))
-        conn.commit()
-        conn.close()
-        
-        del password_reset_codes[email]
+    # Kod önce tüketilir: aynı kodla gelen eşzamanlı iki istekten yalnızca biri şifreyi değiştirir
+    beklenen_kod = password_reset_codes.pop(email, None) if email else None
+    if girilen_kod and beklenen_kod == girilen_kod:
+        user_repository.update_password(email, yeni_sifre)
+        profile_cache.invalidate(email=email)
         
         return redirect(url_for('home'))
     else:
@@ -2121,13 +1696,42 @@ def spotify_playlist_olustur():
                 'message': f'En az 15 şarkı gerekli. Şu an {len(sarkilar)} şarkı var.'
             }), 400
         
-        playlist_data = create_spotify_playlist(sarkilar, tur)
-        return jsonify(playlist_data)
+        job_id, hata = submit_spotify_playlist(sarkilar, tur)
+        if hata:
+            return jsonify(hata)
+        return jsonify({
+            'job_id': job_id,
+            'status_url': url_for('playlist_durumu', job_id=job_id)
+        }), 202
         
     except Exception as e:
         app.logger.error(f"Playlist oluşturma API hatası: {str(e)}")
         return jsonify({'error': 'Playlist oluşturulamadı', 'message': str(e)}), 500
 
+@app.route('/playlist-durumu/<job_id>')
+def playlist_durumu(job_id):
+    """Playlist işinin durumu: status, progress (bulunan/bulunamayan/toplam), result"""
+    if 'logged_in' not in session:
+        return jsonify({'error': 'Giriş yapmanız gerekiyor'}), 401
+    
+    job = playlist_jobs.get(job_id)
+    if job is None or job['owner'] != session.get('kullanici_adi'):
+        return jsonify({'error': 'İş bulunamadı'}), 404
+    
+    result = job['result'] or {}
+    if result.get('error') == 'token_expired':
+        forget_spotify_token()
+    elif job['status'] == 'done':
+        # İş sırasında yenilenen token oturuma yazılsın
+        spotify_session_token()
+    
+    return jsonify({
+        'status': job['status'],
+        'progress': job['progress'],
+        'result': job['result'],
+        'error': job['error'],
+    })
+
 @app.route('/spotify-login')
 def spotify_login():
     """Spotify OAuth girişi - DÜZELTİLMİŞ"""
@@ -2189,6 +1793,8 @@ def spotify_callback():
                 session['spotify_token'] = token_info['access_token']
                 session['spotify_refresh_token'] = token_info.get('refresh_token')
                 session['spotify_expires_at'] = token_info.get('expires_at')
+                # Önceki bağlantıdan kalan token yöneticide tutulmasın
+                spotify_tokens.forget(session['kullanici_adi'])
                 
                 app.logger.info(f"✅ Spotify bağlandı: {session['kullanici_adi']}")
                 return redirect(url_for('oneri_sayfasi', kategori='muzik'))
@@ -2206,8 +1812,7 @@ def spotify_callback():
 @app.route('/spotify-disconnect')
 def spotify_disconnect():
     """Spotify bağlantısını kes"""
-    session.pop('spotify_token', None)
-    session.pop('spotify_refresh_token', None)
+    forget_spotify_token()
     
     # Cache dosyasını temizle
     cache_file = f".spotify-cache-{session.get('kullanici_adi', 'default')}"
@@ -2222,5 +1827,5 @@ def spotify_durum():
     if 'logged_in' not in session:
         return jsonify({'connected': False}), 401
     
-    connected = 'spotify_token' in session
+    connected = spotify_session_token() is not None
     return jsonify({'connected': connected})
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Katalog kayıt defteri
+
+data/*.json kataloglarını worker başına bir kez yükler ve bellekten sunar.
+Dosyanın mtime/boyut bilgisi belirli aralıklarla kontrol edilir; dosya
+değiştiyse yeni anlık görüntü (snapshot) yüklenip tek atamayla devreye alınır.
+Böylece ingestion çıktısı gunicorn yeniden başlatılmadan yayına girer.
+
+Yanında JSON'dan daha yeni bir .lcat (bkz. catalog_format) varsa katalog JSON
+ayrıştırılmadan mmap ile açılır.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from catalog_format import EXTENSION as COLUMNAR_EXTENSION, ColumnarCatalog
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+class CatalogSnapshot:
+    """Bir kategorinin belirli bir andaki değişmez görüntüsü"""
+
+    __slots__ = ('kategori', 'items', 'path', 'signature', 'loaded_at', 'source',
+                 '_derived', '_derived_lock')
+
+    def __init__(self, kategori, items, path, signature, source):
+        self.kategori = kategori
+        # Listeler değişmez tuple'a çevrilir; ColumnarCatalog zaten salt okunur
+        self.items = tuple(items) if isinstance(items, list) else items
+        self.path = path
+        self.signature = signature  # (mtime_ns, size) ya da fallback için None
+        self.loaded_at = time.time()
+        self.source = source  # 'json', 'columnar' veya 'fallback'
+        self._derived = {}
+        self._derived_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.items)
+
+    def derived(self, key, factory):
+        """
+        Snapshot'a bağlı türetilmiş yapıyı (indeks vb.) bir kez üretip sakla.
+        factory(kategori, items) çağrılır; snapshot değişince yapı da yeniden üretilir.
+        """
+        value = self._derived.get(key)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = self._derived[key] = factory(self.kategori, self.items)
+        return value
+
+
+class CatalogRegistry:
+    """Kategori -> CatalogSnapshot eşlemesini tutan, süreç genelinde tekil kayıt defteri"""
+
+    def __init__(self, data_dir=DATA_DIR, check_interval=5.0, logger=None):
+        self.data_dir = data_dir
+        self.check_interval = check_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._files = {}
+        self._fallbacks = {}
+        self._snapshots = {}
+        self._next_check = {}
+        self._lock = threading.Lock()
+
+    def register(self, kategori, filename, fallback=None):
+        """Kategoriyi JSON dosyası ve (isteğe bağlı) yedek veri fonksiyonu ile kaydet"""
+        self._files[kategori] = os.path.join(self.data_dir, filename)
+        if fallback is not None:
+            self._fallbacks[kategori] = fallback
+
+    def snapshot(self, kategori):
+        """Güncel snapshot'ı döndür; kontrol aralığı dolduysa dosyayı yeniden kontrol et"""
+        snap = self._snapshots.get(kategori)
+        if snap is not None and time.monotonic() < self._next_check.get(kategori, 0):
+            return snap
+
+        # Elimizde bir snapshot varsa başka bir thread yenilerken beklemeyiz
+        if not self._lock.acquire(blocking=snap is None):
+            return snap
+        try:
+            snap = self._snapshots.get(kategori)
+            if snap is None or time.monotonic() >= self._next_check.get(kategori, 0):
+                snap = self._refresh(kategori, snap)
+            return snap
+        finally:
+            self._lock.release()
+
+    def items(self, kategori):
+        return self.snapshot(kategori).items
+
+    def reload(self, kategori=None):
+        """Bir kategoriyi (ya da hepsini) bir sonraki erişimde yeniden kontrol ettir"""
+        kategoriler = [kategori] if kategori else list(self._files)
+        for k in kategoriler:
+            self._next_check[k] = 0
+
+    def _refresh(self, kategori, current):
+        json_path = self._files[kategori]
+        self._next_check[kategori] = time.monotonic() + self.check_interval
+        path, signature = self._select_source(json_path)
+
+        if signature is None:
+            if current is not None and current.source == 'fallback':
+                return current
+            if current is not None:
+                self.logger.warning(f"Katalog dosyası kayboldu, son yüklenen veri kullanılıyor: {path}")
+                return current
+            return self._install(self._fallback_snapshot(kategori, path))
+
+        if current is not None and current.path == path and current.signature == signature:
+            return current
+
+        try:
+            items = self._load(path)
+        except Exception as e:
+            # Yarım yazılmış dosya vb. - eski snapshot'la devam et, sonraki aralıkta tekrar dene
+            self.logger.error(f"Katalog yüklenemedi ({path}): {e}")
+            if current is not None:
+                return current
+            return self._install(self._fallback_snapshot(kategori, path))
+
+        source = 'columnar' if path.endswith(COLUMNAR_EXTENSION) else 'json'
+        snap = CatalogSnapshot(kategori, items, path, signature, source)
+        self.logger.info(f"Katalog yüklendi: {kategori} ({len(snap)} kayıt)")
+        return self._install(snap)
+
+    def _fallback_snapshot(self, kategori, path):
+        fallback = self._fallbacks.get(kategori)
+        items = fallback() if fallback else []
+        return CatalogSnapshot(kategori, items, path, None, 'fallback')
+
+    def _install(self, snap):
+        # Tek referans ataması: okuyucular ya eski ya yeni snapshot'ı görür
+        self._snapshots[snap.kategori] = snap
+        return snap
+
+    def _select_source(self, json_path):
+        """JSON'dan eski olmayan .lcat varsa onu, yoksa JSON'u seç: (yol, imza)"""
+        json_signature = self._stat(json_path)
+        columnar_path = os.path.splitext(json_path)[0] + COLUMNAR_EXTENSION
+        columnar_signature = self._stat(columnar_path)
+        if columnar_signature is not None and (
+                json_signature is None or columnar_signature[0] >= json_signature[0]):
+            return columnar_path, columnar_signature
+        return json_path, json_signature
+
+    @staticmethod
+    def _load(path):
+        if path.endswith(COLUMNAR_EXTENSION):
+            return ColumnarCatalog(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        if not isinstance(items, list):
+            raise ValueError("katalog bir JSON listesi olmalı")
+        return items
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
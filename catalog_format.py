@@ -0,0 +1,245 @@
+"""
+Sütunlu (columnar) ikili katalog formatı - .lcat
+
+data/*.json kataloglarını tek seferde derlenen kompakt bir dosyaya dönüştürür:
+
+    [8 bayt magic][4 bayt başlık uzunluğu][4 bayt boşluk][JSON başlık][bölümler...]
+
+- String tablosu: tekilleştirilmiş tüm metinler (UTF-8 blob + uint32 offset dizisi)
+- Sabit genişlikli sayısal sütunlar: sayfa/dakika/yil/sezon gibi alanlar int64
+- Liste alanları (tema, anahtar_kelimeler): uint32 offset dizisi + string id'leri
+- Eksik alanlar için sütun başına uint8 'var/yok' dizisi
+
+Uygulama dosyayı salt okunur mmap ile açar; tüm gunicorn worker'ları aynı fiziksel
+sayfaları paylaşır ve açılışta JSON ayrıştırılmaz. Satırlar erişildikçe dict'e
+dönüştürülür.
+"""
+
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections.abc import Sequence
+
+MAGIC = b'LCAT\x01\x00\x00\x00'
+EXTENSION = '.lcat'
+
+# Sütun tipleri
+STRING = 's'        # string id (uint32)
+INT = 'i'           # int64
+INT_TEXT = 'n'      # rakamlardan oluşan metin ("1997"), int64 saklanır, str döner
+FLOAT = 'f'         # float64
+BOOL = 'b'          # uint8
+STRING_LIST = 'l'   # offset (uint32) + string id listesi
+JSON_VALUE = 'j'    # diğer her şey: JSON metni olarak string tablosunda
+
+
+def _is_int_text(value):
+    return isinstance(value, str) and value.isdigit() and value.isascii() and str(int(value)) == value
+
+
+def _column_type(values):
+    present = [v for v in values if v is not None]
+    if not present:
+        return JSON_VALUE
+    if all(isinstance(v, bool) for v in present):
+        return BOOL
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        if all(-2 ** 63 <= v < 2 ** 63 for v in present):
+            return INT
+        return JSON_VALUE
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return FLOAT
+    if all(_is_int_text(v) and len(v) < 18 for v in present):
+        return INT_TEXT
+    if all(isinstance(v, str) for v in present):
+        return STRING
+    if all(isinstance(v, list) and all(isinstance(x, str) for x in v) for v in present):
+        return STRING_LIST
+    return JSON_VALUE
+
+
+class _Writer:
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def add(self, data):
+        # Her bölüm 8 bayt hizalı başlar
+        self.buffer.extend(b'\x00' * (-len(self.buffer) % 8))
+        offset = len(self.buffer)
+        self.buffer.extend(data)
+        return offset
+
+
+def compile_catalog(items, out_path):
+    """Kayıt listesini .lcat dosyasına yaz (geçici dosya + os.replace ile atomik)"""
+    fields = []
+    for item in items:
+        for key in item:
+            if key not in fields:
+                fields.append(key)
+
+    strings = {}
+
+    def sid(text):
+        return strings.setdefault(text, len(strings))
+
+    writer = _Writer()
+    columns = []
+    n = len(items)
+    for field in fields:
+        values = [item.get(field) if field in item else None for item in items]
+        missing = [field not in item for item in items]
+        col_type = _column_type(values)
+        if col_type != JSON_VALUE and any(v is None and not m for v, m in zip(values, missing)):
+            # Açıkça null verilmiş değerler tipli sütunda korunamaz
+            col_type = JSON_VALUE
+        column = {'name': field, 'type': col_type, 'present': None}
+
+        if any(missing):
+            column['present'] = writer.add(bytes(0 if m else 1 for m in missing))
+
+        if col_type in (STRING, JSON_VALUE):
+            encode = (lambda v: v) if col_type == STRING else (lambda v: json.dumps(v, ensure_ascii=False))
+            ids = array('I', (sid(encode(v)) if not m else 0 for v, m in zip(values, missing)))
+            column['values'] = writer.add(ids.tobytes())
+        elif col_type in (INT, INT_TEXT):
+            column['values'] = writer.add(array('q', (int(v) if v is not None else 0 for v in values)).tobytes())
+        elif col_type == FLOAT:
+            column['values'] = writer.add(array('d', (float(v) if v is not None else 0.0 for v in values)).tobytes())
+        elif col_type == BOOL:
+            column['values'] = writer.add(bytes(1 if v else 0 for v in values))
+        elif col_type == STRING_LIST:
+            offsets = array('I', [0])
+            ids = array('I')
+            for v in values:
+                for text in v or ():
+                    ids.append(sid(text))
+                offsets.append(len(ids))
+            column['list_offsets'] = writer.add(offsets.tobytes())
+            column['values'] = writer.add(ids.tobytes())
+        columns.append(column)
+
+    blob = bytearray()
+    string_offsets = array('I', [0])
+    for text in strings:
+        blob.extend(text.encode('utf-8'))
+        string_offsets.append(len(blob))
+    strings_section = {
+        'count': len(strings),
+        'offsets': writer.add(string_offsets.tobytes()),
+        'data': writer.add(bytes(blob)),
+        'data_len': len(blob),
+    }
+
+    header = json.dumps({
+        'rows': n,
+        'byteorder': sys.byteorder,
+        'strings': strings_section,
+        'columns': columns,
+    }, ensure_ascii=False).encode('utf-8')
+    header += b' ' * (-len(header) % 8)
+
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(4, 'little'))
+        f.write(b'\x00' * 4)
+        f.write(header)
+        f.write(writer.buffer)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def compile_json_file(json_path, out_path=None):
+    """data/x.json -> data/x.lcat"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    if not isinstance(items, list):
+        raise ValueError("katalog bir JSON listesi olmalı")
+    out_path = out_path or os.path.splitext(json_path)[0] + EXTENSION
+    return compile_catalog(items, out_path)
+
+
+class ColumnarCatalog(Sequence):
+    """mmap edilmiş .lcat dosyası üzerinde salt okunur kayıt dizisi"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mm)
+        if bytes(view[:8]) != MAGIC:
+            raise ValueError(f"geçersiz katalog dosyası: {path}")
+        header_len = int.from_bytes(view[8:12], 'little')
+        header = json.loads(bytes(view[16:16 + header_len]).decode('utf-8'))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f"katalog farklı bayt sırasıyla derlenmiş: {path}")
+
+        base = 16 + header_len
+        self._rows = header['rows']
+        n = self._rows
+
+        def section(offset, length, fmt):
+            start = base + offset
+            return view[start:start + length].cast(fmt)
+
+        strings = header['strings']
+        self._string_offsets = section(strings['offsets'], (strings['count'] + 1) * 4, 'I')
+        self._string_data = view[base + strings['data']:base + strings['data'] + strings['data_len']]
+
+        self._columns = []
+        for column in header['columns']:
+            col_type = column['type']
+            present = section(column['present'], n, 'B') if column['present'] is not None else None
+            list_offsets = None
+            if col_type in (STRING, JSON_VALUE):
+                values = section(column['values'], n * 4, 'I')
+            elif col_type in (INT, INT_TEXT):
+                values = section(column['values'], n * 8, 'q')
+            elif col_type == FLOAT:
+                values = section(column['values'], n * 8, 'd')
+            elif col_type == BOOL:
+                values = section(column['values'], n, 'B')
+            else:
+                list_offsets = section(column['list_offsets'], (n + 1) * 4, 'I')
+                values = section(column['values'], list_offsets[n] * 4, 'I')
+            self._columns.append((column['name'], col_type, present, values, list_offsets))
+
+    def __len__(self):
+        return self._rows
+
+    def _string(self, string_id):
+        start = self._string_offsets[string_id]
+        end = self._string_offsets[string_id + 1]
+        return str(self._string_data[start:end], 'utf-8')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._rows))]
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError(index)
+
+        row = {}
+        for name, col_type, present, values, list_offsets in self._columns:
+            if present is not None and not present[index]:
+                continue
+            if col_type == STRING:
+                row[name] = self._string(values[index])
+            elif col_type == INT:
+                row[name] = values[index]
+            elif col_type == INT_TEXT:
+                row[name] = str(values[index])
+            elif col_type == FLOAT:
+                row[name] = values[index]
+            elif col_type == BOOL:
+                row[name] = bool(values[index])
+            elif col_type == STRING_LIST:
+                row[name] = [self._string(values[i])
+                             for i in range(list_offsets[index], list_offsets[index + 1])]
+            else:
+                row[name] = json.loads(self._string(values[index]))
+        return row
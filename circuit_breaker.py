@@ -0,0 +1,150 @@
+"""
+Sağlayıcı başına devre kesici (circuit breaker) ve uyarlanır timeout
+
+Son `window` saniyedeki çağrıların hata oranı ve gecikmeleri tutulur:
+
+- KAPALI: çağrılar serbest. Pencerede en az `min_calls` çağrı varken hata oranı
+  `error_threshold`'u aşarsa ya da art arda `consecutive_failures` hata olursa
+  devre AÇILIR.
+- AÇIK: `open_seconds` boyunca çağrı yapılmaz (CircuitOpenError), öneri
+  fonksiyonları yerel kataloğa düşer.
+- YARI AÇIK: süre dolunca tek bir deneme çağrısına izin verilir; başarılıysa
+  devre kapanır, değilse yeniden açılır.
+
+Timeout sabit değil, başarılı çağrıların p95 gecikmesinin `timeout_factor` katıdır
+([min_timeout, max_timeout] aralığında). Yeterli örnek yoksa max_timeout kullanılır.
+"""
+
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Devre açıkken yapılan çağrı"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} devresi açık, {retry_in:.0f}s sonra yeniden denenecek")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    MAX_SAMPLES = 200
+    MIN_LATENCY_SAMPLES = 10
+
+    def __init__(self, name, window=60, min_calls=5, error_threshold=0.5, consecutive_failures=3,
+                 open_seconds=30, min_timeout=1.0, max_timeout=10.0, timeout_factor=2.0):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.consecutive_failures = consecutive_failures
+        self.open_seconds = open_seconds
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+
+        self._samples = deque(maxlen=self.MAX_SAMPLES)  # (zaman, başarılı_mı, gecikme)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._failures_in_row = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        while self._samples and self._samples[0][0] < now - self.window:
+            self._samples.popleft()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def is_open(self):
+        return self.state == OPEN
+
+    def before_call(self):
+        """Çağrıya izin verilmiyorsa CircuitOpenError fırlat"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            now = time.monotonic()
+            if self._state == OPEN:
+                remaining = self.open_seconds - (now - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                self._state = HALF_OPEN
+            # Yarı açık: aynı anda yalnızca bir deneme çağrısı
+            if self._probe_in_flight:
+                raise CircuitOpenError(self.name, 0)
+            self._probe_in_flight = True
+
+    def record_success(self, latency):
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, True, latency))
+            self._failures_in_row = 0
+            if self._state != CLOSED:
+                self._state = CLOSED
+                self._probe_in_flight = False
+                # Eski hatalar yeniden açılmaya yol açmasın
+                self._samples = deque([(now, True, latency)], maxlen=self.MAX_SAMPLES)
+
+    def record_failure(self, latency):
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, False, latency))
+            self._failures_in_row += 1
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            if self._state == OPEN:
+                return
+            self._trim(now)
+            calls = len(self._samples)
+            errors = sum(1 for _, ok, _ in self._samples if not ok)
+            if (self._failures_in_row >= self.consecutive_failures or
+                    (calls >= self.min_calls and errors / calls >= self.error_threshold)):
+                self._open(now)
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+
+    def _p95(self):
+        latencies = sorted(latency for _, ok, latency in self._samples if ok)
+        if len(latencies) < self.MIN_LATENCY_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def timeout(self):
+        """Gözlenen p95 gecikmeye göre istek timeout'u"""
+        with self._lock:
+            self._trim(time.monotonic())
+            p95 = self._p95()
+        if p95 is None:
+            return self.max_timeout
+        return max(self.min_timeout, min(self.max_timeout, p95 * self.timeout_factor))
+
+    def stats(self):
+        state = self.state
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._samples)
+            errors = sum(1 for _, ok, _ in self._samples if not ok)
+            p95 = self._p95()
+        return {
+            'state': state,
+            'calls': calls,
+            'error_rate': round(errors / calls, 3) if calls else 0.0,
+            'p95': round(p95, 3) if p95 is not None else None,
+            'timeout': round(self.timeout(), 2),
+        }
@@ -30,7 +30,110 @@ class Config:
     GOOGLE_BOOKS_API_KEY = os.getenv('GOOGLE_BOOKS_API_KEY', '')
     HUGGING_FACE_TOKEN = os.getenv('HUGGING_FACE_TOKEN', '')
     LASTFM_API_KEY = os.getenv('LASTFM_API_KEY', '')
-    
+
+    # PostgreSQL bağlantı havuzu (worker başına): boyutlar, checkout bekleme süresi,
+    # boşta kalan bağlantının sağlık kontrolü ve en uzun bağlantı ömrü - saniye
+    DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+    DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    DB_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_HEALTH_CHECK_INTERVAL', '30'))
+    DB_MAX_LIFETIME = float(os.getenv('DB_MAX_LIFETIME', '1800'))
+
+    # SQLite (DATABASE_URL yoksa): dosya, kilit bekleme süresi - saniye,
+    # synchronous seviyesi, mmap boyutu - bayt, sayfa önbelleği - KiB
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'database.db')
+    SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '5'))
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', str(64 * 1024)))
+
+    # Doğrulama / şifre sıfırlama kodları: depo (boş = worker'ların paylaştığı SQLite
+    # dosyası, redis://... = ağ deposu, memory = süreç içi), geçerlilik ve temizlik - saniye
+    CODE_STORE_URL = os.getenv('CODE_STORE_URL', '')
+    CODE_STORE_PATH = os.getenv('CODE_STORE_PATH', '')
+    VERIFICATION_CODE_TTL = int(os.getenv('VERIFICATION_CODE_TTL', '900'))
+    PASSWORD_RESET_CODE_TTL = int(os.getenv('PASSWORD_RESET_CODE_TTL', '900'))
+    CODE_STORE_SWEEP_INTERVAL = int(os.getenv('CODE_STORE_SWEEP_INTERVAL', '60'))
+
+    # Sunucu tarafı oturum: depo (boş = instance/sessions.db, redis://... = ağ deposu),
+    # worker başına bellekte tutulan en fazla oturum
+    SESSION_STORE_URL = os.getenv('SESSION_STORE_URL', '')
+    SESSION_STORE_PATH = os.getenv('SESSION_STORE_PATH', '')
+    SESSION_CACHE_MAX_ENTRIES = int(os.getenv('SESSION_CACHE_MAX_ENTRIES', '4096'))
+
+    # E-posta giden kutusu: dosya (boş = instance/email_outbox.db), taşıyıcı
+    # (boş = ayarlara göre SendGrid/Gmail/log, 'memory' = test), grup boyutu,
+    # en fazla deneme, ilk geri çekilme ve boştaki SMTP bağlantısının ömrü - saniye
+    EMAIL_OUTBOX_PATH = os.getenv('EMAIL_OUTBOX_PATH', '')
+    EMAIL_TRANSPORT = os.getenv('EMAIL_TRANSPORT', '').lower()
+    EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '20'))
+    EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+    EMAIL_BACKOFF_BASE = float(os.getenv('EMAIL_BACKOFF_BASE', '5'))
+    EMAIL_SMTP_IDLE_TIMEOUT = float(os.getenv('EMAIL_SMTP_IDLE_TIMEOUT', '30'))
+
+    # Kullanıcı profili önbelleği (worker başına): yaşam süresi - saniye, en fazla kayıt
+    PROFILE_CACHE_TTL = int(os.getenv('PROFILE_CACHE_TTL', '900'))
+    PROFILE_CACHE_MAX_ENTRIES = int(os.getenv('PROFILE_CACHE_MAX_ENTRIES', '1024'))
+
+    # Öneri isteği başına süre bütçesi - saniye (0 = sınırsız)
+    RECOMMENDATION_DEADLINE = float(os.getenv('RECOMMENDATION_DEADLINE', '1.5'))
+
+    # Katalog (data/*.json) değişiklik kontrol aralığı - saniye
+    CATALOG_RELOAD_INTERVAL = float(os.getenv('CATALOG_RELOAD_INTERVAL', '5'))
+
+    # Puanlama motoru: 'python' (referans) veya 'numpy' (vektörel)
+    SCORING_BACKEND = os.getenv('SCORING_BACKEND', 'python').lower()
+
+    # Dış API istekleri: eşzamanlı thread sayısı
+    PROVIDER_MAX_WORKERS = int(os.getenv('PROVIDER_MAX_WORKERS', '8'))
+
+    # Sağlayıcı başına token-bucket: RATE istek/saniye, BURST biriktirilebilecek en fazla istek
+    GOOGLE_BOOKS_RATE_LIMIT = float(os.getenv('GOOGLE_BOOKS_RATE_LIMIT', '5'))
+    GOOGLE_BOOKS_RATE_BURST = float(os.getenv('GOOGLE_BOOKS_RATE_BURST', '10'))
+    TMDB_RATE_LIMIT = float(os.getenv('TMDB_RATE_LIMIT', '20'))
+    TMDB_RATE_BURST = float(os.getenv('TMDB_RATE_BURST', '40'))
+    LASTFM_RATE_LIMIT = float(os.getenv('LASTFM_RATE_LIMIT', '5'))
+    LASTFM_RATE_BURST = float(os.getenv('LASTFM_RATE_BURST', '10'))
+    SPOTIFY_RATE_LIMIT = float(os.getenv('SPOTIFY_RATE_LIMIT', '10'))
+    SPOTIFY_RATE_BURST = float(os.getenv('SPOTIFY_RATE_BURST', '20'))
+
+    # Spotify şarkı çözümleme: eşzamanlı arama sayısı, çözüm önbelleği dosyası
+    # (boş = instance/spotify_tracks.db), bulunan / bulunamayan şarkı ömrü - saniye
+    SPOTIFY_RESOLVE_WORKERS = int(os.getenv('SPOTIFY_RESOLVE_WORKERS', '6'))
+    SPOTIFY_RESOLVE_CACHE_PATH = os.getenv('SPOTIFY_RESOLVE_CACHE_PATH', '')
+    SPOTIFY_TRACK_TTL = int(os.getenv('SPOTIFY_TRACK_TTL', str(30 * 86400)))
+    SPOTIFY_NOT_FOUND_TTL = int(os.getenv('SPOTIFY_NOT_FOUND_TTL', '86400'))
+
+    # Spotify token yenileme: bitişe bu kadar kala çağrıdan önce / arka planda yenile - saniye
+    SPOTIFY_TOKEN_REFRESH_MARGIN = int(os.getenv('SPOTIFY_TOKEN_REFRESH_MARGIN', '60'))
+    SPOTIFY_TOKEN_PROACTIVE_WINDOW = int(os.getenv('SPOTIFY_TOKEN_PROACTIVE_WINDOW', '300'))
+
+    # Spotify playlist işleri: iş durumu dosyası (boş = instance/jobs.db),
+    # worker başına aynı anda çalışan playlist işi
+    JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', '')
+    PLAYLIST_JOB_WORKERS = int(os.getenv('PLAYLIST_JOB_WORKERS', '2'))
+    # Doluysa kovalar bu SQLite dosyasında tutulur ve worker'lar/ingest script'leri aynı kotayı paylaşır
+    RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', '')
+
+    # Devre kesici: son BREAKER_WINDOW saniyede hata oranı eşiği aşarsa BREAKER_OPEN_SECONDS boyunca
+    # sağlayıcı atlanır. Timeout = p95 gecikme x ADAPTIVE_TIMEOUT_FACTOR (en az ADAPTIVE_TIMEOUT_MIN)
+    BREAKER_WINDOW = float(os.getenv('BREAKER_WINDOW', '60'))
+    BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', '5'))
+    BREAKER_ERROR_THRESHOLD = float(os.getenv('BREAKER_ERROR_THRESHOLD', '0.5'))
+    BREAKER_CONSECUTIVE_FAILURES = int(os.getenv('BREAKER_CONSECUTIVE_FAILURES', '3'))
+    BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', '30'))
+    ADAPTIVE_TIMEOUT_MIN = float(os.getenv('ADAPTIVE_TIMEOUT_MIN', '1.0'))
+    ADAPTIVE_TIMEOUT_FACTOR = float(os.getenv('ADAPTIVE_TIMEOUT_FACTOR', '2.0'))
+
+    # Sağlayıcı yanıt önbelleği: boş yol = instance/provider_cache.db, TTL'ler saniye (0 = kapalı)
+    PROVIDER_CACHE_PATH = os.getenv('PROVIDER_CACHE_PATH', '')
+    PROVIDER_CACHE_MAX_ENTRIES = int(os.getenv('PROVIDER_CACHE_MAX_ENTRIES', '2048'))
+    GOOGLE_BOOKS_CACHE_TTL = int(os.getenv('GOOGLE_BOOKS_CACHE_TTL', '86400'))
+    TMDB_CACHE_TTL = int(os.getenv('TMDB_CACHE_TTL', '21600'))
+    LASTFM_CACHE_TTL = int(os.getenv('LASTFM_CACHE_TTL', '43200'))
+    # Aynı sorguyu başka bir worker getirirken beklenecek en uzun süre - saniye
+    PROVIDER_LOCK_TIMEOUT = float(os.getenv('PROVIDER_LOCK_TIMEOUT', '10'))
+
     @property
     def has_email_config(self):
         # SendGrid varsa onu kullan, yoksa eski sistemi dene
@@ -0,0 +1,320 @@
+"""
+Veritabanı bağlantı sağlayıcıları
+
+PostgreSQL (Render, DATABASE_URL): thread-safe bağlantı havuzu
+- min/max bağlantı sınırları; havuz doluysa checkout en fazla `timeout` saniye bekler.
+  Her süreçteki (worker) ilk checkout `minconn` bağlantıyı önceden açar
+- checkout'ta sağlık kontrolü: kapanmış/bozuk bağlantılar atılır, uzun süre boşta
+  kalan bağlantı 'SELECT 1' ile denenir, `max_lifetime`'ı aşanlar yenilenir
+- gunicorn fork'undan sonra havuz yeniden kurulur; ebeveynden kalan bağlantılara
+  dokunulmaz (kapatmak, ebeveynin soketini sonlandırırdı)
+
+SQLite (yerel geliştirme / tek sunucu): thread başına tek bağlantı yeniden kullanılır,
+WAL ve bellek pragmalarıyla açılır.
+
+Her iki sağlayıcı da bağlantıyı bir vekil (proxy) ile verir: close() gerçek
+bağlantıyı kapatmaz, commit edilmemiş işlemi geri alıp havuza iade eder.
+Kullanıcı sorguları UserRepository (users.py) üzerinden yapılır; doğrudan
+bağlantı gerektiğinde:
+
+    with database.connection() as conn:
+        ...
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse, quote_plus
+
+try:
+    import psycopg2
+    from psycopg2 import extensions as pg_extensions
+except ImportError:  # SQLite ile yerel geliştirmede psycopg2 gerekmez
+    psycopg2 = None
+    pg_extensions = None
+
+
+def postgres_dsn(database_url):
+    """Render'ın DATABASE_URL'ini psycopg2 DSN'ine çevir (parola kaçışlı, sslmode=require)"""
+    url = urlparse(database_url)
+    password = quote_plus(url.password)
+    port = url.port if url.port else 5432
+    return f"postgresql://{url.username}:{password}@{url.hostname}:{port}{url.path}?sslmode=require"
+
+
+class PoolTimeout(Exception):
+    """Havuzda süre içinde boş bağlantı bulunamadı"""
+
+
+class PooledConnection:
+    """Gerçek bağlantıya vekil; close() bağlantıyı sağlayıcıya iade eder"""
+
+    def __init__(self, provider, conn):
+        self._provider = provider
+        self._conn = conn
+        self._returned = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def close(self):
+        if not self._returned:
+            self._returned = True
+            self._provider.putconn(self._conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        # close() unutulduysa bağlantı havuzdan sızmasın
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class PostgresPool:
+    def __init__(self, dsn, minconn=1, maxconn=10, timeout=10, health_check_interval=30,
+                 max_lifetime=1800, logger=None, **connect_kwargs):
+        if psycopg2 is None:
+            raise RuntimeError("PostgreSQL havuzu için psycopg2 gerekli")
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.max_lifetime = max_lifetime
+        self.connect_kwargs = connect_kwargs
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._cond = threading.Condition()
+        self._idle = []        # [(conn, created_at, returned_at)]
+        self._created = {}     # id(conn) -> created_at, havuza ait bağlantılar
+        self._open = 0         # açık + kurulmakta olan bağlantı sayısı
+        self._inherited = []   # fork öncesinden kalan, dokunulmayan bağlantılar
+        self._pid = os.getpid()
+        self._prefilled_pid = None  # prefill'in çalıştığı süreç
+        self._stats = {'checkouts': 0, 'created': 0, 'recycled': 0, 'waits': 0}
+
+    def _check_fork(self):
+        pid = os.getpid()
+        if pid != self._pid:
+            with self._cond:
+                if pid != self._pid:
+                    self._inherited.extend(conn for conn, _, _ in self._idle)
+                    self._idle = []
+                    self._created = {}
+                    self._open = 0
+                    self._pid = pid
+
+    def _is_broken(self, conn):
+        return conn.closed or conn.get_transaction_status() == pg_extensions.TRANSACTION_STATUS_UNKNOWN
+
+    def _discard(self, conn):
+        """Kilit tutulurken çağrılır"""
+        if self._created.pop(id(conn), None) is not None:
+            self._open -= 1
+        self._stats['recycled'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn, created_at, returned_at):
+        now = time.time()
+        if self._is_broken(conn):
+            return False
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return False
+        if now - returned_at > self.health_check_interval:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute('SELECT 1')
+                conn.rollback()
+            except Exception as e:
+                self.logger.warning(f"Havuzdaki PostgreSQL bağlantısı yanıt vermiyor, yenileniyor: {e}")
+                return False
+        return True
+
+    def getconn(self):
+        self._check_fork()
+        if self._prefilled_pid != self._pid:
+            self._prefill_once()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            entry = None
+            with self._cond:
+                while not self._idle and self._open >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"{self.timeout}s içinde boş PostgreSQL bağlantısı bulunamadı")
+                    self._stats['waits'] += 1
+                    self._cond.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    # Yeri ayır, bağlantıyı kilit dışında kur
+                    self._open += 1
+
+            if entry is not None:
+                conn, created_at, returned_at = entry
+                if self._healthy(conn, created_at, returned_at):
+                    with self._cond:
+                        self._stats['checkouts'] += 1
+                    return conn
+                with self._cond:
+                    self._discard(conn)
+                    self._cond.notify()
+                continue
+
+            try:
+                conn = psycopg2.connect(self.dsn, **self.connect_kwargs)
+                conn.autocommit = False
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._created[id(conn)] = time.time()
+                self._stats['created'] += 1
+                self._stats['checkouts'] += 1
+            return conn
+
+    def putconn(self, conn):
+        if os.getpid() != self._pid:
+            return
+        with self._cond:
+            created_at = self._created.get(id(conn))
+            if created_at is None:
+                # Havuza ait değil - kapat
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                return
+            try:
+                if not self._is_broken(conn) and conn.get_transaction_status() != pg_extensions.TRANSACTION_STATUS_IDLE:
+                    # Commit edilmemiş işlem: eski close() davranışı gibi geri al
+                    conn.rollback()
+            except Exception:
+                pass
+            if self._is_broken(conn):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at, time.time()))
+            self._cond.notify()
+
+    def _prefill_once(self):
+        """Fork sonrası ilk checkout'ta minconn bağlantıyı önceden aç (süreç başına bir kez)"""
+        with self._cond:
+            if self._prefilled_pid == self._pid:
+                return
+            self._prefilled_pid = self._pid
+        conns = []
+        try:
+            for _ in range(self.minconn - self._open):
+                conns.append(self.getconn())
+        except Exception as e:
+            # Asıl checkout kendi hatasını verir; önceden açma yalnızca bir iyileştirme
+            self.logger.warning(f"PostgreSQL havuzu önceden doldurulamadı: {e}")
+        finally:
+            for conn in conns:
+                self.putconn(conn)
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats, backend='postgres', idle=len(self._idle), open=self._open)
+
+
+class SQLiteConnections:
+    """Thread başına bir SQLite bağlantısı; close() yalnızca açık işlemi geri alır
+
+    Tek sunuculu kurulumlar için üretim profili:
+    - WAL: okuyucular yazarı, yazar okuyucuları beklemez
+    - synchronous=NORMAL: WAL'de her commit'te değil checkpoint'te fsync
+    - mmap_size / cache_size: sayfalar bellekten okunur
+    - busy_timeout: yazma kilidi doluysa hemen "database is locked" yerine bekle
+    """
+
+    def __init__(self, path, busy_timeout=5.0, synchronous='NORMAL', mmap_size=256 * 1024 * 1024,
+                 cache_size_kb=64 * 1024):
+        if str(synchronous).upper() not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+            raise ValueError(f"Geçersiz SQLite synchronous seviyesi: {synchronous}")
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.synchronous = str(synchronous).upper()
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self._local = threading.local()
+        self._journal_mode = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # journal_mode kalıcıdır (dosyaya yazılır); diğerleri bağlantı başına
+        self._journal_mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        # Negatif değer KiB cinsinden sayfa önbelleği
+        conn.execute(f'PRAGMA cache_size={-int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout * 1000)}')
+        return conn
+
+    def getconn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def putconn(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+
+    def stats(self):
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'journal_mode': self._journal_mode,
+            'synchronous': self.synchronous,
+            'busy_timeout': self.busy_timeout,
+        }
+
+
+class Database:
+    """Ortama göre PostgreSQL havuzu ya da thread başına SQLite bağlantısı"""
+
+    def __init__(self, provider, dialect):
+        self.provider = provider
+        self.dialect = dialect
+
+    @property
+    def is_postgres(self):
+        return self.dialect == 'postgres'
+
+    def getconn(self):
+        return PooledConnection(self.provider, self.provider.getconn())
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self):
+        return self.provider.stats()
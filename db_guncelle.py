@@ -1,17 +1,27 @@
-import sqlite3
+import os
+
+from config import Config
+from db import Database, PostgresPool, SQLiteConnections, postgres_dsn
+from migrations import MigrationRunner
+
+
+def veritabani():
+    # DATABASE_URL varsa PostgreSQL, yoksa yerel SQLite dosyası
+    if 'DATABASE_URL' in os.environ:
+        pool = PostgresPool(postgres_dsn(os.environ['DATABASE_URL']), minconn=1, maxconn=1)
+        return Database(pool, 'postgres')
+    return Database(SQLiteConnections(Config.SQLITE_PATH), 'sqlite')
+
 
 def guncelle():
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute("ALTER TABLE kullanicilar ADD COLUMN kullanici_adi TEXT;")
-        conn.commit()
-        print("Veritabanı başarıyla güncellendi. 'kullanici_adi' sütunu eklendi.")
-    except sqlite3.OperationalError:
-        print("Hata: 'kullanici_adi' sütunu zaten mevcut.")
-    finally:
-        conn.close()
+    runner = MigrationRunner(veritabani())
+    uygulanan = runner.run()
+    for surum, ad, uygulandi in runner.status():
+        durum = "yeni uygulandı" if surum in uygulanan else ("uygulanmış" if uygulandi else "bekliyor")
+        print(f"{surum:>3}  {ad:<35} {durum}")
+    if not uygulanan:
+        print("Veritabanı güncel, bekleyen geçiş yok.")
+
 
 if __name__ == "__main__":
-    guncelle()
\ No newline at end of file
+    guncelle()
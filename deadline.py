@@ -0,0 +1,30 @@
+"""
+İstek başına süre bütçesi
+
+Öneri isteği başında oluşturulur ve generate_*_recommendations aşamalarına
+aktarılır. Fan-out, bekleyen sağlayıcı çağrılarını en fazla kalan süre kadar
+bekler; süre dolarsa bekleme bırakılır ve sonuç 'kısmi' olarak işaretlenir.
+Geride kalan çağrılar arka planda tamamlanıp önbelleği doldurmaya devam eder.
+"""
+
+import time
+
+
+class Deadline:
+    def __init__(self, seconds):
+        # seconds <= 0: süre sınırı yok
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds and seconds > 0 else None
+        self.partial = False
+
+    def remaining(self):
+        """Kalan saniye; sınır yoksa None"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def mark_partial(self):
+        self.partial = True
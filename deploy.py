@@ -50,8 +50,10 @@ def create_database():
     print("🗄️ Initializing database...")
     try:
         # Import here to avoid import errors before dependencies are installed
-        from app import create_db_table
-        create_db_table()
+        from app import database
+        from migrations import MigrationRunner
+        # Run the migrations directly so errors are not swallowed by app.run_migrations()
+        MigrationRunner(database).run()
         print("✅ Database initialized successfully")
         return True
     except Exception as e:
@@ -0,0 +1,339 @@
+"""
+Kalıcı e-posta giden kutusu
+
+Route'lar e-postayı SMTP'ye bağlanarak göndermek yerine giden kutusuna yazar ve
+hemen döner (send_email yalnızca bir INSERT). Her worker'daki arka plan
+göndericisi kutuyu boşaltır:
+
+- mesajlar `batch_size`'lık gruplar halinde sahiplenilir (aynı sunucudaki
+  worker'lar aynı SQLite dosyasını paylaşır, bir mesajı yalnızca biri alır)
+- SMTP bağlantısı açık tutulur: STARTTLS + login bir kez yapılır, `idle_timeout`
+  saniye boşta kalınca ya da sunucu kopunca yeniden kurulur
+- geçici hatalarda üstel geri çekilmeyle (backoff) yeniden denenir; kalıcı
+  hatalar (5xx) ve `max_attempts`'i aşan mesajlar 'failed' olur
+- takılı kalan 'sending' kayıtları (worker ölürse) `lease_seconds` sonra
+  yeniden kuyruğa döner. Sahiplenme rastgele bir jetonla (claim) yapılır; süre
+  her mesaj gönderilmeden hemen önce yenilenir ve sonuç yalnızca jeton hâlâ bu
+  göndericideyse yazılır. Yavaş SMTP yüzünden süresi dolan bir gönderici, başka
+  worker'ın devraldığı mesajı ikinci kez göndermez ve durumunu ezmez (bunun için
+  `lease_seconds` tek bir gönderimin zaman aşımından uzun olmalıdır)
+
+Gönderici thread'i kutu oluşturulur oluşturulmaz (ve fork sonrası ilk istekte)
+başlatılır; böylece yeniden başlayan worker, önceki çalıştırmadan kalan mesajları
+yeni bir enqueue beklemeden gönderir.
+
+Mesaj durumu status(id) ile okunur: pending, sending, sent, failed.
+
+Taşıyıcılar (transport): SMTPTransport (SendGrid / Gmail), LogTransport (e-posta
+ayarı yokken geliştirme modu) ve MemoryTransport (testler için yerel SMTP yerine
+geçer; gönderilenleri listede tutar, istenirse hata üretir).
+"""
+
+import logging
+import os
+import random
+import smtplib
+import sqlite3
+import ssl
+import threading
+import time
+import uuid
+from email.message import EmailMessage
+
+PENDING = 'pending'
+SENDING = 'sending'
+SENT = 'sent'
+FAILED = 'failed'
+
+
+class PermanentEmailError(Exception):
+    """Yeniden denenmeyecek gönderim hatası"""
+
+
+class SMTPTransport:
+    """Kimliği doğrulanmış, yeniden kullanılan SMTP bağlantısı"""
+
+    def __init__(self, host, port, username, password, sender, starttls=True, timeout=15,
+                 idle_timeout=30, logger=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self._smtp = None
+        self._last_used = 0.0
+        self.connections = 0
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls(context=ssl.create_default_context())
+        if self.username:
+            smtp.login(self.username, self.password)
+        self.connections += 1
+        return smtp
+
+    def _connection(self):
+        if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            # Sunucu boştaki bağlantıyı çoktan kapatmış olabilir
+            self.close()
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    def send(self, recipient, subject, body):
+        msg = EmailMessage()
+        msg.set_content(body)
+        msg['Subject'] = subject
+        msg['From'] = self.sender
+        msg['To'] = recipient
+        for attempt in range(2):
+            smtp = self._connection()
+            try:
+                smtp.send_message(msg)
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected:
+                # Kopmuş bağlantı: bir kez yeniden bağlanıp dene
+                self._smtp = None
+                if attempt:
+                    raise
+            except smtplib.SMTPRecipientsRefused as e:
+                self._last_used = time.monotonic()
+                raise PermanentEmailError(f"Alıcı reddedildi: {e.recipients}")
+            except smtplib.SMTPResponseException as e:
+                self._last_used = time.monotonic()
+                if 500 <= e.smtp_code < 600:
+                    raise PermanentEmailError(f"SMTP {e.smtp_code}: {e.smtp_error!r}")
+                raise
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+class LogTransport:
+    """E-posta ayarı yokken mesajı konsola ve loga yazar (geliştirme modu)"""
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+
+    def send(self, recipient, subject, body):
+        self.logger.warning("E-posta ayarları eksik. Geliştirme modu için kod konsola yazdırılıyor.")
+        print(f"\n{'='*50}")
+        print(f"EMAIL GÖNDERİLEMEDİ - GELİŞTİRME MODU")
+        print(f"Alıcı: {recipient}")
+        print(f"Konu: {subject}")
+        print(f"İçerik:\n{body}")
+        print(f"{'='*50}\n")
+
+    def close(self):
+        pass
+
+
+class MemoryTransport:
+    """Test taşıyıcısı: gönderilenleri saklar; fail_times kadar geçici hata üretir"""
+
+    def __init__(self, fail_times=0, error=None):
+        self.sent = []
+        self.fail_times = fail_times
+        self.error = error or smtplib.SMTPServerDisconnected('test')
+
+    def send(self, recipient, subject, body):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise self.error
+        self.sent.append((recipient, subject, body))
+
+    def close(self):
+        pass
+
+
+class EmailOutbox:
+    def __init__(self, path, transport_factory, batch_size=20, max_attempts=5, backoff_base=5.0,
+                 backoff_max=600.0, poll_interval=2.0, lease_seconds=120, logger=None):
+        self.path = path
+        self.transport_factory = transport_factory
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._transport = None
+        self._stats = {'sent': 0, 'retried': 0, 'failed': 0, 'batches': 0}
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''CREATE TABLE IF NOT EXISTS email_outbox (
+                            id INTEGER PRIMARY KEY,
+                            recipient TEXT NOT NULL,
+                            subject TEXT NOT NULL,
+                            body TEXT NOT NULL,
+                            status TEXT NOT NULL,
+                            attempts INTEGER NOT NULL DEFAULT 0,
+                            next_attempt_at REAL NOT NULL,
+                            last_error TEXT,
+                            created_at REAL NOT NULL,
+                            sent_at REAL,
+                            claim TEXT)''')
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(email_outbox)').fetchall()]
+        if 'claim' not in columns:
+            # claim sütunundan önce oluşturulmuş kutu dosyası
+            conn.execute('ALTER TABLE email_outbox ADD COLUMN claim TEXT')
+        conn.execute('CREATE INDEX IF NOT EXISTS email_outbox_due ON email_outbox (status, next_attempt_at)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def enqueue(self, recipient, subject, body):
+        """Mesajı kuyruğa yaz ve kimliğini döndür; gönderim arka planda yapılır"""
+        now = time.time()
+        cursor = self._connect().execute(
+            'INSERT INTO email_outbox (recipient, subject, body, status, next_attempt_at, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (recipient, subject, body, PENDING, now, now))
+        self.start()
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def status(self, message_id):
+        row = self._connect().execute(
+            'SELECT id, status, attempts, last_error, created_at, sent_at FROM email_outbox WHERE id = ?',
+            (message_id,)).fetchone()
+        return dict(row) if row else None
+
+    def _claim(self, claim):
+        """Zamanı gelen mesajlardan bir grubu `claim` jetonuyla bu göndericiye ayır"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Sahibi ölmüş gönderimler kuyruğa geri döner
+            conn.execute('UPDATE email_outbox SET status = ? WHERE status = ? AND next_attempt_at <= ?',
+                         (PENDING, SENDING, now - self.lease_seconds))
+            rows = conn.execute(
+                'SELECT id, recipient, subject, body, attempts FROM email_outbox '
+                'WHERE status = ? AND next_attempt_at <= ? ORDER BY id LIMIT ?',
+                (PENDING, now, self.batch_size)).fetchall()
+            if rows:
+                conn.executemany('UPDATE email_outbox SET status = ?, next_attempt_at = ?, claim = ? WHERE id = ?',
+                                 [(SENDING, now, claim, row['id']) for row in rows])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return rows
+
+    def _backoff(self, attempts):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def drain_once(self):
+        """Bir grup mesaj gönder; gönderilmeye çalışılan mesaj sayısını döndür"""
+        claim = uuid.uuid4().hex
+        rows = self._claim(claim)
+        if not rows:
+            return 0
+        if self._transport is None:
+            self._transport = self.transport_factory()
+        self._stats['batches'] += 1
+        conn = self._connect()
+        for row in rows:
+            attempts = row['attempts'] + 1
+            # Kira süresini bu mesaj için yenile; süre dolup başka worker devraldıysa gönderme
+            renewed = conn.execute('UPDATE email_outbox SET next_attempt_at = ? WHERE id = ? AND status = ? AND claim = ?',
+                                   (time.time(), row['id'], SENDING, claim)).rowcount
+            if not renewed:
+                self.logger.warning(f"E-posta {row['id']} başka bir göndericiye geçti, atlanıyor")
+                continue
+            try:
+                self._transport.send(row['recipient'], row['subject'], row['body'])
+            except Exception as e:
+                permanent = isinstance(e, PermanentEmailError) or attempts >= self.max_attempts
+                status = FAILED if permanent else PENDING
+                conn.execute('UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, '
+                             'last_error = ?, claim = NULL WHERE id = ? AND status = ? AND claim = ?',
+                             (status, attempts, time.time() + self._backoff(attempts), str(e)[:500], row['id'],
+                              SENDING, claim))
+                if permanent:
+                    self._stats['failed'] += 1
+                    self.logger.error(f"E-posta gönderilemedi ({row['recipient']}), vazgeçildi: {e}")
+                else:
+                    self._stats['retried'] += 1
+                    self.logger.warning(f"E-posta gönderimi başarısız ({row['recipient']}), "
+                                        f"{attempts}. deneme, yeniden denenecek: {e}")
+                continue
+            conn.execute('UPDATE email_outbox SET status = ?, attempts = ?, sent_at = ?, last_error = NULL, '
+                         'claim = NULL WHERE id = ? AND status = ? AND claim = ?',
+                         (SENT, attempts, time.time(), row['id'], SENDING, claim))
+            self._stats['sent'] += 1
+            self.logger.info(f"E-posta gönderildi: {row['recipient']}")
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.drain_once():
+                    continue
+            except Exception as e:
+                self.logger.error(f"E-posta göndericisi hatası: {e}")
+                # Bağlantı bozulmuş olabilir; bir sonraki grupta yeniden kurulur
+                if self._transport is not None:
+                    self._transport.close()
+                    self._transport = None
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        """Bu süreçte gönderici thread'i yoksa başlat (fork sonrası da)"""
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._transport = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def stats(self):
+        counts = dict(self._connect().execute(
+            'SELECT status, COUNT(*) FROM email_outbox GROUP BY status').fetchall())
+        return dict(self._stats, queue=counts)
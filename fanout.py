@@ -0,0 +1,60 @@
+"""
+Sağlayıcı isteklerinin eşzamanlı dağıtımı (fan-out)
+
+generate_*_recommendations içindeki terim başına API çağrılarını sınırlı bir
+thread havuzunda aynı anda başlatır ve sonuçları geldikçe döndürür. Böylece
+istek süresi ardışık tur sayısı yerine en yavaş tek tura iner.
+
+Bir Deadline verilirse en fazla kalan süre kadar beklenir; süre dolduğunda
+tamamlanmamış çağrılar iptal edilmez, arka planda bitip önbelleğe yazılır.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+
+
+class FanOut:
+    """Süreç başına bir ThreadPoolExecutor; gunicorn fork'undan sonra yeniden oluşturulur"""
+
+    def __init__(self, max_workers=8, logger=None):
+        self.max_workers = max_workers
+        self.logger = logger or logging.getLogger(__name__)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    # Fork'tan miras kalan havuzun thread'leri bu süreçte yok
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='provider')
+                    self._pid = pid
+        return self._executor
+
+    def fetch_all(self, fetch, terms, *args, deadline=None):
+        """
+        fetch(term, *args) çağrılarını eşzamanlı başlat; (term, sonuç) çiftlerini
+        tamamlanma sırasıyla üret. Tekrarlanan terimler bir kez istenir, hata
+        veren çağrılar loglanıp atlanır. deadline dolarsa kalanlar beklenmez ve
+        deadline kısmi olarak işaretlenir.
+        """
+        unique_terms = list(dict.fromkeys(terms))
+        executor = self.executor()
+        futures = {executor.submit(fetch, term, *args): term for term in unique_terms}
+        timeout = deadline.remaining() if deadline is not None else None
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                term = futures[future]
+                try:
+                    yield term, future.result()
+                except Exception as e:
+                    self.logger.error(f"Sağlayıcı isteği başarısız ({term}): {e}")
+        except TimeoutError:
+            pending = [term for future, term in futures.items() if not future.done()]
+            self.logger.warning(f"Süre bütçesi doldu, {len(pending)} sağlayıcı isteği beklenmiyor: {pending}")
+            deadline.mark_partial()
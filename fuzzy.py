@@ -0,0 +1,96 @@
+"""
+Trigram indeksli bulanık tekrar (fuzzy duplicate) tespiti
+
+generate_*_recommendations içindeki "SequenceMatcher oranı > 0.8 mi?" kontrolleri
+her yeni başlığı tutulan tüm başlıklarla tek tek karşılaştırıyordu. FuzzyTitleSet
+başlıkları karakter trigram'larıyla indeksler ve kesin oran hesabından önce
+yalnızca oranın eşiği geçmesinin *mümkün* olduğu adayları bırakır:
+
+1. Uzunluk sınırı: ratio <= 2*min(la, lb) / (la + lb)   (real_quick_ratio)
+2. Trigram sayım sınırı (Dice tarzı q-gram filtresi): ratio > t ise eşleşen
+   karakter sayısı M > t*T/2, dolayısıyla ekle/sil mesafesi d = T - 2M < T*(1-t).
+   q-gram lemmasına göre iki dizi en az max(la, lb) - 2 - 3*d ortak trigram paylaşır.
+3. Karakter çoklukümesi sınırı (quick_ratio)
+
+Üç sınır da ratio() için kesin üst sınır olduğundan elenen hiçbir aday eşiği
+geçemezdi; kararlar calculate_similarity ile birebir aynıdır.
+"""
+
+import math
+from collections import Counter
+from difflib import SequenceMatcher
+
+
+def trigrams(text):
+    return Counter(text[i:i + 3] for i in range(len(text) - 2))
+
+
+class FuzzyTitleSet:
+    """Eklenen başlıklar içinde SequenceMatcher oranı eşiği aşan bir başlık arar"""
+
+    def __init__(self, titles=(), threshold=0.8):
+        self.threshold = threshold
+        self._titles = []
+        self._exact = {}
+        self._by_length = {}
+        self._postings = {}
+        for title in titles:
+            self.add(title)
+
+    def __len__(self):
+        return len(self._titles)
+
+    def add(self, title):
+        text = title.lower()
+        title_id = len(self._titles)
+        self._titles.append(text)
+        self._exact.setdefault(text, title_id)
+        self._by_length.setdefault(len(text), []).append(title_id)
+        for gram, count in trigrams(text).items():
+            self._postings.setdefault(gram, []).append((title_id, count))
+
+    def __contains__(self, title):
+        return self.find(title) is not None
+
+    def find(self, title, reverse=False):
+        """
+        Eşiği aşan ilk kayıtlı başlığı döndür (yoksa None).
+        reverse=True ise oran SequenceMatcher(kayıtlı, sorgu) sırasıyla hesaplanır;
+        SequenceMatcher simetrik olmadığı için çağıran taraf eski sırayı korur.
+        """
+        query = title.lower()
+        if query in self._exact:
+            # Aynı başlık: oran 1.0
+            return self._titles[self._exact[query]]
+
+        la = len(query)
+        t = self.threshold
+        query_grams = trigrams(query)
+
+        # Paylaşılan trigram sayısı (çoklukümesi kesişimi)
+        shared = {}
+        for gram, q_count in query_grams.items():
+            for title_id, count in self._postings.get(gram, ()):
+                shared[title_id] = shared.get(title_id, 0) + min(q_count, count)
+
+        candidates = []
+        for lb, title_ids in self._by_length.items():
+            total = la + lb
+            if total == 0 or 2.0 * min(la, lb) / total <= t:
+                continue
+            max_indel = math.floor(total * (1 - t) + 1e-9)
+            need = max(la, lb) - 2 - 3 * max_indel
+            if need > 0:
+                candidates.extend(i for i in title_ids if shared.get(i, 0) >= need)
+            else:
+                candidates.extend(title_ids)
+
+        for title_id in sorted(candidates):
+            stored = self._titles[title_id]
+            if reverse:
+                matcher = SequenceMatcher(None, stored, query)
+            else:
+                matcher = SequenceMatcher(None, query, stored)
+            if matcher.quick_ratio() > t and matcher.ratio() > t:
+                return stored
+        return None
@@ -0,0 +1,172 @@
+"""
+Dış sağlayıcılar için havuzlu HTTP istemcisi
+
+Her sağlayıcı (Google Books, TMDB, Last.fm, Hugging Face, Google OAuth) kendi
+requests.Session'ını kullanır. Session'ın urllib3 PoolManager'ı host başına bir
+keep-alive bağlantı havuzu tutar; böylece ardışık isteklerde TCP+TLS el sıkışması
+tekrarlanmaz. Havuz boyutu sağlayıcı başına ayarlanır (fan-out'taki eşzamanlı
+istek sayısı kadar bağlantı açık tutulabilsin diye).
+
+Bağlantı yeniden kullanımı urllib3 havuz sayaçlarından okunur:
+    istek sayısı - açılan bağlantı sayısı = yeniden kullanılan bağlantı
+
+Her istemcinin bir devre kesicisi vardır (circuit_breaker.py): timeout verilmeyen
+isteklerde süre gözlenen p95 gecikmeden hesaplanır, devre açıkken istek yapılmadan
+CircuitOpenError fırlatılır. 5xx/429 yanıtları ve bağlantı hataları hata sayılır.
+"""
+
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import CircuitBreaker
+
+DEFAULT_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'User-Agent': 'Listoria/1.0 (+https://listoria-ai.onrender.com)',
+}
+
+# Sağlayıcı başına havuz boyutu (host başına açık tutulan bağlantı) ve en uzun timeout
+PROVIDER_POOLS = {
+    'google_books': {'pool_maxsize': 8, 'timeout': 10},
+    'tmdb': {'pool_maxsize': 16, 'timeout': 10},
+    'lastfm': {'pool_maxsize': 8, 'timeout': 10},
+    'huggingface': {'pool_maxsize': 2, 'timeout': 15},
+    'google': {'pool_maxsize': 4, 'timeout': 10},
+}
+
+# Tüm devre kesicilerin ortak ayarları; configure_breakers() ile değiştirilir
+BREAKER_SETTINGS = {}
+
+
+class ProviderClient:
+    """Tek sağlayıcı için keep-alive Session; gunicorn fork'undan sonra yeniden kurulur"""
+
+    def __init__(self, name, pool_maxsize=10, timeout=10, pool_connections=4):
+        self.name = name
+        self.pool_maxsize = pool_maxsize
+        self.pool_connections = pool_connections
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name, max_timeout=timeout, **BREAKER_SETTINGS)
+        self._session = None
+        self._adapter = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+
+    def _build(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=False)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        return session, adapter
+
+    @property
+    def session(self):
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    # Ebeveyn süreçten miras kalan soketler paylaşılmamalı
+                    self._session, self._adapter = self._build()
+                    self._pid = pid
+                    self._requests = 0
+                    self._errors = 0
+        return self._session
+
+    def request(self, method, url, **kwargs):
+        self.breaker.before_call()
+        kwargs.setdefault('timeout', self.breaker.timeout())
+        session = self.session
+        with self._lock:
+            self._requests += 1
+        start = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except Exception as e:
+            self.breaker.record_failure(time.monotonic() - start)
+            if isinstance(e, requests.RequestException):
+                with self._lock:
+                    self._errors += 1
+            raise
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure(time.monotonic() - start)
+        else:
+            self.breaker.record_success(time.monotonic() - start)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        """Host başına açılan bağlantı / yapılan istek sayıları ve yeniden kullanım oranı"""
+        hosts = {}
+        if self._adapter is not None and self._pid == os.getpid():
+            pools = self._adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections = pool.num_connections
+                served = pool.num_requests
+                hosts[f"{pool.scheme}://{pool.host}"] = {
+                    'connections': connections,
+                    'requests': served,
+                    'reused': max(served - connections, 0),
+                }
+        connections = sum(h['connections'] for h in hosts.values())
+        served = sum(h['requests'] for h in hosts.values())
+        return {
+            'requests': self._requests,
+            'errors': self._errors,
+            'connections': connections,
+            'reused': max(served - connections, 0),
+            'reuse_ratio': round((served - connections) / served, 3) if served else 0.0,
+            'hosts': hosts,
+            'breaker': self.breaker.stats(),
+        }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """Sağlayıcının paylaşılan istemcisini döndür (yoksa PROVIDER_POOLS ayarıyla oluştur)"""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = ProviderClient(name, **PROVIDER_POOLS.get(name, {}))
+                _clients[name] = client
+    return client
+
+
+def configure_breakers(**settings):
+    """Devre kesici ayarlarını güncelle (sonradan oluşturulan istemciler de kullanır)"""
+    BREAKER_SETTINGS.update(settings)
+    with _clients_lock:
+        for client in _clients.values():
+            for key, value in settings.items():
+                setattr(client.breaker, key, value)
+
+
+def is_available(name):
+    """Sağlayıcının devresi açık değilse True"""
+    return not get_client(name).breaker.is_open()
+
+
+def connection_stats():
+    """Tüm sağlayıcıların bağlantı sayaçları"""
+    return {name: client.stats() for name, client in sorted(_clients.items())}
@@ -0,0 +1,163 @@
+"""
+Arka plan işleri (Spotify playlist oluşturma)
+
+Uzun süren işler istek içinde değil, işi gönderen worker'ın thread havuzunda
+çalışır; route yalnızca iş kimliğini döndürür. İş durumu ve ilerlemesi SQLite
+dosyasında tutulur, böylece durum sorgusu hangi worker'a düşerse düşsün yanıt
+verilebilir:
+
+    queued -> running -> done | failed
+
+İşleyici (handler) fonksiyonu Job nesnesi ve iş parametrelerini alır;
+job.progress(...) ile ilerlemeyi yazar, döndürdüğü değer işin sonucu olur.
+İşi çalıştıran worker ölürse 'running' kalan iş `stale_after` saniye sonra
+başarısız sayılır; 'queued' işler yalnızca havuzda sıra beklediğinden bu kurala
+girmez. Son durum yazılamazsa (kilitli veritabanı, JSON'a çevrilemeyen sonuç)
+iş 'failed' olarak işaretlenir. Tamamlanan işler `keep_seconds` sonra silinir.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from fanout import FanOut
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job:
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.id = job_id
+        self._progress = {}
+
+    def progress(self, **fields):
+        """İlerleme alanlarını güncelle (öncekilerle birleştirilir)"""
+        self._progress.update(fields)
+        self.queue._update(self.id, progress=self._progress)
+
+
+class JobQueue:
+    def __init__(self, path, max_workers=2, stale_after=600, keep_seconds=86400, logger=None):
+        self.path = path
+        self.stale_after = stale_after
+        self.keep_seconds = keep_seconds
+        self.logger = logger or logging.getLogger(__name__)
+        self.pool = FanOut(max_workers=max_workers, logger=self.logger)
+        self._handlers = {}
+        self._local = threading.local()
+        self._last_sweep = 0.0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                            id TEXT PRIMARY KEY,
+                            kind TEXT NOT NULL,
+                            owner TEXT,
+                            status TEXT NOT NULL,
+                            progress TEXT,
+                            result TEXT,
+                            error TEXT,
+                            created_at REAL NOT NULL,
+                            updated_at REAL NOT NULL)''')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def register(self, kind, handler):
+        self._handlers[kind] = handler
+
+    def _update(self, job_id, status=None, progress=None, result=None, error=None):
+        fields, values = ['updated_at = ?'], [time.time()]
+        if status is not None:
+            fields.append('status = ?')
+            values.append(status)
+        if progress is not None:
+            fields.append('progress = ?')
+            values.append(json.dumps(progress))
+        if result is not None:
+            fields.append('result = ?')
+            values.append(json.dumps(result))
+        if error is not None:
+            fields.append('error = ?')
+            values.append(error[:500])
+        self._connect().execute(f"UPDATE jobs SET {', '.join(fields)} WHERE id = ?", (*values, job_id))
+
+    def submit(self, kind, owner=None, **params):
+        """İşi kuyruğa al ve hemen kimliğini döndür"""
+        handler = self._handlers[kind]
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            'INSERT INTO jobs (id, kind, owner, status, progress, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (job_id, kind, owner, QUEUED, '{}', now, now))
+        self.pool.executor().submit(self._run, job_id, handler, params)
+        self._sweep()
+        return job_id
+
+    def _run(self, job_id, handler, params):
+        job = Job(self, job_id)
+        try:
+            self._update(job_id, status=RUNNING)
+            result = handler(job, **params)
+        except Exception as e:
+            self.logger.error(f"Arka plan işi başarısız ({job_id}): {e}")
+            self._finish(job_id, FAILED, error=str(e))
+            return
+        self._finish(job_id, DONE, result=result)
+
+    def _finish(self, job_id, status, result=None, error=None):
+        # Havuzdaki hata future içinde kaybolur; iş 'running' kalmasın diye en azından 'failed' yaz
+        try:
+            self._update(job_id, status=status, result=result, error=error)
+        except Exception as e:
+            self.logger.error(f"Arka plan işinin sonucu kaydedilemedi ({job_id}): {e}")
+            try:
+                self._update(job_id, status=FAILED, error=f'İş sonucu kaydedilemedi: {e}')
+            except Exception as e:
+                self.logger.error(f"Arka plan işi başarısız olarak işaretlenemedi ({job_id}): {e}")
+
+    def get(self, job_id):
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            'id': row['id'],
+            'kind': row['kind'],
+            'owner': row['owner'],
+            'status': row['status'],
+            'progress': json.loads(row['progress'] or '{}'),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+        }
+        if job['status'] == RUNNING and time.time() - row['updated_at'] > self.stale_after:
+            # Çalıştıran worker yeniden başlamış olmalı
+            job['status'] = FAILED
+            job['error'] = 'İş yarıda kaldı'
+        return job
+
+    def _sweep(self):
+        now = time.time()
+        if now - self._last_sweep < 300:
+            return
+        self._last_sweep = now
+        try:
+            self._connect().execute('DELETE FROM jobs WHERE updated_at < ?', (now - self.keep_seconds,))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Eski işler silinemedi: {e}")
@@ -0,0 +1,218 @@
+"""
+Sürümlü şema geçişleri (SQLite ve PostgreSQL)
+
+Uygulanan sürümler schema_migrations tablosunda tutulur; her açılışta yalnızca
+bekleyen geçişler sırayla çalışır. Aynı anda açılan gunicorn worker'ları
+birbirini bekler: SQLite'ta BEGIN IMMEDIATE yazma kilidi, PostgreSQL'de oturum
+düzeyinde advisory lock.
+
+Her geçişin adımları lehçe başına SQL metni ya da cursor alan bir fonksiyondur.
+concurrent=True olan geçişler PostgreSQL'de işlem dışında (autocommit) çalışır;
+CREATE INDEX CONCURRENTLY tabloyu yazmaya kilitlemeden indeks kurar. Yarıda
+kalan CONCURRENTLY denemesi geçersiz (INVALID) bir indeks bırakır; tekrar
+denemeden önce silinir.
+
+    python db_guncelle.py   # bekleyen geçişleri elle uygula
+"""
+
+import logging
+from collections import namedtuple
+
+try:
+    from psycopg2.extensions import cursor as pg_tuple_cursor
+except ImportError:
+    pg_tuple_cursor = None
+
+# pg_advisory_lock anahtarı (sabit, uygulamaya özgü)
+ADVISORY_LOCK_ID = 0x4C697374
+
+Migration = namedtuple('Migration', 'version name sqlite postgres concurrent')
+
+
+class MigrationError(Exception):
+    """Geçiş uygulanamadı"""
+
+
+def _add_kullanici_adi_sqlite(cur):
+    # Eski db_guncelle.py'nin yaptığı: çok eski veritabanlarında sütun yok
+    columns = [row[1] for row in cur.execute('PRAGMA table_info(kullanicilar)').fetchall()]
+    if 'kullanici_adi' not in columns:
+        cur.execute('ALTER TABLE kullanicilar ADD COLUMN kullanici_adi TEXT')
+
+
+def _check_duplicate_usernames(cur):
+    cur.execute('''
+        SELECT kullanici_adi, COUNT(*) FROM kullanicilar
+        WHERE kullanici_adi IS NOT NULL
+        GROUP BY kullanici_adi HAVING COUNT(*) > 1
+        LIMIT 5
+    ''')
+    duplicates = cur.fetchall()
+    if duplicates:
+        names = ', '.join(f"{name} ({count})" for name, count in duplicates)
+        raise MigrationError(f"Tekrarlanan kullanıcı adları benzersiz indeksi engelliyor: {names}")
+
+
+def _drop_invalid_index(name):
+    def step(cur):
+        cur.execute('''
+            SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s AND NOT i.indisvalid
+        ''', (name,))
+        if cur.fetchone():
+            cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+    return step
+
+
+MIGRATIONS = [
+    Migration(1, 'kullanicilar tablosu',
+              sqlite=['''
+                  CREATE TABLE IF NOT EXISTS kullanicilar (
+                      id INTEGER PRIMARY KEY,
+                      email TEXT NOT NULL UNIQUE,
+                      kullanici_adi TEXT,
+                      sifre TEXT NOT NULL,
+                      dogum_tarihi TEXT
+                  )
+              '''],
+              postgres=['''
+                  CREATE TABLE IF NOT EXISTS kullanicilar (
+                      id SERIAL PRIMARY KEY,
+                      email TEXT NOT NULL UNIQUE,
+                      kullanici_adi TEXT,
+                      sifre TEXT NOT NULL,
+                      dogum_tarihi TEXT
+                  )
+              '''],
+              concurrent=False),
+    Migration(2, 'kullanici_adi sütunu',
+              sqlite=[_add_kullanici_adi_sqlite],
+              postgres=['ALTER TABLE kullanicilar ADD COLUMN IF NOT EXISTS kullanici_adi TEXT'],
+              concurrent=False),
+    # Dashboard, öneri ve giriş route'ları kullanici_adi ile arar. email zaten
+    # UNIQUE (indeksli), böylece email+sifre ve email OR kullanici_adi
+    # sorguları da indeksle çözülür.
+    Migration(3, 'kullanici_adi benzersiz indeksi',
+              sqlite=[_check_duplicate_usernames,
+                      'CREATE UNIQUE INDEX IF NOT EXISTS kullanicilar_kullanici_adi_key '
+                      'ON kullanicilar (kullanici_adi)'],
+              postgres=[_check_duplicate_usernames,
+                        _drop_invalid_index('kullanicilar_kullanici_adi_key'),
+                        'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS kullanicilar_kullanici_adi_key '
+                        'ON kullanicilar (kullanici_adi)'],
+              concurrent=True),
+]
+
+
+class MigrationRunner:
+    def __init__(self, database, migrations=None, logger=None):
+        self.database = database
+        self.migrations = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+        self.logger = logger or logging.getLogger(__name__)
+
+    def _param(self):
+        return '%s' if self.database.is_postgres else '?'
+
+    def _ensure_table(self, cur):
+        cur.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+    def _applied(self, cur):
+        cur.execute('SELECT version FROM schema_migrations')
+        return {row[0] for row in cur.fetchall()}
+
+    def _run_steps(self, cur, migration):
+        steps = migration.postgres if self.database.is_postgres else migration.sqlite
+        for step in steps:
+            if callable(step):
+                step(cur)
+            else:
+                cur.execute(step)
+
+    def _record(self, cur, migration):
+        p = self._param()
+        cur.execute(f'INSERT INTO schema_migrations (version, name) VALUES ({p}, {p})',
+                    (migration.version, migration.name))
+
+    def run(self):
+        """Bekleyen geçişleri uygula; uygulanan sürümlerin listesini döndür"""
+        with self.database.connection() as conn:
+            if self.database.is_postgres:
+                return self._run_postgres(conn.raw)
+            return self._run_sqlite(conn)
+
+    def _run_sqlite(self, conn):
+        applied_now = []
+        cur = conn.cursor()
+        try:
+            for migration in self.migrations:
+                # Her geçiş kendi işleminde; kilit alındıktan sonra yeniden kontrol edilir
+                cur.execute('BEGIN IMMEDIATE')
+                try:
+                    self._ensure_table(cur)
+                    if migration.version in self._applied(cur):
+                        conn.rollback()
+                        continue
+                    self._run_steps(cur, migration)
+                    self._record(cur, migration)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                applied_now.append(migration.version)
+                self.logger.info(f"Şema geçişi uygulandı: {migration.version} {migration.name}")
+        finally:
+            cur.close()
+        return applied_now
+
+    def _run_postgres(self, raw):
+        applied_now = []
+        raw.autocommit = True
+        cur = raw.cursor(cursor_factory=pg_tuple_cursor)
+        try:
+            cur.execute('SELECT pg_advisory_lock(%s)', (ADVISORY_LOCK_ID,))
+            try:
+                self._ensure_table(cur)
+                applied = self._applied(cur)
+                for migration in self.migrations:
+                    if migration.version in applied:
+                        continue
+                    if migration.concurrent:
+                        # CONCURRENTLY işlem bloğu içinde çalışamaz
+                        self._run_steps(cur, migration)
+                        self._record(cur, migration)
+                    else:
+                        cur.execute('BEGIN')
+                        try:
+                            self._run_steps(cur, migration)
+                            self._record(cur, migration)
+                            cur.execute('COMMIT')
+                        except Exception:
+                            cur.execute('ROLLBACK')
+                            raise
+                    applied_now.append(migration.version)
+                    self.logger.info(f"Şema geçişi uygulandı: {migration.version} {migration.name}")
+            finally:
+                cur.execute('SELECT pg_advisory_unlock(%s)', (ADVISORY_LOCK_ID,))
+        finally:
+            cur.close()
+            raw.autocommit = False
+        return applied_now
+
+    def status(self):
+        """[(sürüm, ad, uygulandı_mı)]"""
+        with self.database.connection() as conn:
+            raw = conn.raw if self.database.is_postgres else conn
+            cur = raw.cursor(cursor_factory=pg_tuple_cursor) if self.database.is_postgres else raw.cursor()
+            try:
+                self._ensure_table(cur)
+                applied = self._applied(cur)
+                conn.commit()
+            finally:
+                cur.close()
+        return [(m.version, m.name, m.version in applied) for m in self.migrations]
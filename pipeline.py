@@ -0,0 +1,283 @@
+"""
+Ortak öneri akışı (pipeline)
+
+generate_book/film/series/music_recommendations aynı işi dört ayrı kopya halinde
+yapıyordu; birinde yapılan iyileştirme diğerlerine geçmiyordu. Artık her kategori
+bildirimsel bir CategorySpec ile tanımlanır ve tek motor şu aşamaları çalıştırır:
+
+    terms      kullanıcı girdileri, tür ve notlardan arama terimleri
+    providers  terim başına sağlayıcı aramaları (FanOut + önbellek + süre bütçesi)
+    catalog    ters indeks sırasıyla yerel katalog adayları (erken biten tarama)
+    filter     yaş, tür ve kategoriye özgü süzgeçler
+    dedup      kullanıcı girdileri, sağlayıcı sonuçları ve birbirleriyle çakışanlar
+    score      kategorinin puanlayıcısı (mümkünse sınırlı ilk-k modunda, bkz. topk.py)
+    diversify  sağlayıcı / katalog karışımı (kategori isterse)
+    top_k      ilk `limit` öneri
+
+Katalog adayları tembel üretilir: süzgeç ve tekrar kontrolü aday başına yapılır,
+yeterli katalog önerisi bulununca tarama durur. Aşama süreleri kategori başına
+toplanır (stats) ve her istekte loglanır.
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from fuzzy import FuzzyTitleSet
+
+STAGES = ('terms', 'providers', 'catalog', 'filter', 'dedup', 'score', 'diversify', 'top_k')
+
+CategorySpec = namedtuple('CategorySpec', [
+    'kategori',               # katalog adı ('kitap', 'film', 'dizi', 'muzik')
+    'provider',               # sağlayıcı adı (devre kesici / loglar için)
+    'fetch',                  # fetch(terim, max_results) -> [öğe]
+    'enabled',                # enabled() -> sağlayıcı API anahtarı var mı
+    'score',                  # score(öğeler, istek, limit) -> puana göre sıralı (limit verilirse ilk limit) öğeler
+    'limit',                  # döndürülecek en fazla öneri
+    'input_terms',            # input_terms(girdi) -> [terim]
+    'max_terms',              # sağlayıcıya gidecek en fazla terim
+    'per_term',               # terim başına istenen sonuç
+    'catalog_limit',          # en fazla katalog önerisi
+    'degraded_catalog_limit', # sağlayıcı sonuçları eksikken en fazla katalog önerisi
+    'dedup_threshold',        # bulanık başlık eşleşmesi eşiği
+    'match_field',            # kullanıcı girdisinin geçtiği bu alan da çakışma sayılır (yazar/sanatçı)
+    'unique_field',           # sonuçlarda tekrar etmemesi gereken alan (ör. sanatçı)
+    'filters',                # katalog öğelerine ek süzgeçler: f(öğe, istek) -> bool
+    'diversify',              # diversify(puanlı öğeler, istek) -> öğeler
+    'fallback',               # hiç öneri çıkmazsa fallback(istek) -> öğeler
+], defaults=(lambda girdi: girdi.split()[:2], 3, 5, 2, 12, 0.8, None, None, (), None, None))
+
+# Akış boyunca aşamalara taşınan istek bilgisi; options kategoriye özgü alanlar (ör. sayfa aralığı)
+PipelineRequest = namedtuple('PipelineRequest', 'girdiler yas tur notlar deadline options')
+
+
+def age_allowed(item, request):
+    """13 yaş altına uygun olmayan öğeleri ele"""
+    return not (request.yas and request.yas < 13 and not item.get('yas_uygun', True))
+
+
+def quota_mix(provider_quota, catalog_quota):
+    """
+    Puan sırasını koruyarak en fazla provider_quota sağlayıcı ve catalog_quota
+    katalog öğesi seç; kalan yerleri puan sırasıyla doldur (kitaplardaki 7:1 karışımı)
+    """
+    total = provider_quota + catalog_quota
+
+    def diversify(scored, request):
+        chosen = []
+        counts = {True: 0, False: 0}
+        quotas = {True: provider_quota, False: catalog_quota}
+        for item in scored:
+            if len(chosen) >= total:
+                break
+            from_provider = bool(item.get('api_source'))
+            if counts[from_provider] < quotas[from_provider]:
+                chosen.append(item)
+                counts[from_provider] += 1
+        for item in scored:
+            if len(chosen) >= total:
+                break
+            if not any(item is c for c in chosen):
+                chosen.append(item)
+        return chosen
+    return diversify
+
+
+class _Seen:
+    """Dedup aşamasının durumu: kullanıcı girdileri ve şimdiye kadar kabul edilen öğeler"""
+
+    def __init__(self, spec, request):
+        threshold = spec.dedup_threshold
+        self.spec = spec
+        self.user_inputs = [girdi.lower().strip() for girdi in request.girdiler]
+        self.user_titles = FuzzyTitleSet(self.user_inputs, threshold=threshold)
+        self.provider_titles = FuzzyTitleSet(threshold=threshold)
+        self.provider_values = FuzzyTitleSet(threshold=threshold)
+        self.catalog_titles = FuzzyTitleSet(threshold=threshold)
+        self.catalog_values = set()
+
+    def _field(self, item, field):
+        return str(item.get(field) or '').lower().strip() if field else ''
+
+    def is_user_item(self, title, item):
+        if title in self.user_titles:
+            return True
+        match = self._field(item, self.spec.match_field)
+        return any(girdi in title or title in girdi or (match and girdi in match)
+                   for girdi in self.user_inputs)
+
+    def accept_provider(self, item):
+        title = item['baslik'].lower().strip()
+        if title in self.provider_titles or self.is_user_item(title, item):
+            return False
+        self.provider_titles.add(title)
+        value = self._field(item, self.spec.unique_field)
+        if value:
+            self.provider_values.add(value)
+        return True
+
+    def accept_catalog(self, item):
+        title = item['baslik'].lower().strip()
+        value = self._field(item, self.spec.unique_field)
+        if title in self.provider_titles or title in self.catalog_titles:
+            return False
+        if value and (value in self.provider_values or value in self.catalog_values):
+            return False
+        if self.is_user_item(title, item):
+            return False
+        self.catalog_titles.add(title)
+        if value:
+            self.catalog_values.add(value)
+        return True
+
+
+class _StageTimer:
+    def __init__(self):
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+
+    @contextmanager
+    def __call__(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - start
+
+    def add(self, stage, seconds):
+        self.seconds[stage] += seconds
+
+
+class RecommendationPipeline:
+    def __init__(self, fanout, candidates, degraded=None, logger=None):
+        """
+        candidates(kategori, girdiler, notlar, tur) katalog öğelerini ters indeks
+        sırasıyla üretir; degraded(provider, deadline) sağlayıcı sonuçları eksik mi
+        """
+        self.fanout = fanout
+        self.candidates = candidates
+        self.degraded = degraded or (lambda provider, deadline: bool(deadline and deadline.partial))
+        self.logger = logger or logging.getLogger(__name__)
+        self._specs = {}
+        self._lock = threading.Lock()
+        self._timings = {}  # kategori -> {'runs': n, aşama: toplam saniye}
+
+    def register(self, spec):
+        self._specs[spec.kategori] = spec
+        self._timings[spec.kategori] = dict(dict.fromkeys(STAGES, 0.0), runs=0)
+
+    def run(self, kategori, girdiler, yas=None, tur=None, notlar=None, deadline=None, **options):
+        spec = self._specs[kategori]
+        request = PipelineRequest(list(girdiler), yas, tur if tur and tur != 'hepsi' else None,
+                                  notlar or '', deadline, options)
+        timer = _StageTimer()
+        seen = _Seen(spec, request)
+
+        with timer('terms'):
+            terms = self.extract_terms(spec, request)
+        with timer('providers'):
+            fetched = self.fetch_providers(spec, request, terms)
+        with timer('filter'):
+            fetched = [item for item in fetched if age_allowed(item, request)]
+        with timer('dedup'):
+            provider_items = [item for item in fetched if seen.accept_provider(item)]
+        catalog_items = self.collect_catalog(spec, request, seen, timer)
+
+        items = provider_items + catalog_items
+        if not items and spec.fallback is not None:
+            items = list(spec.fallback(request))
+
+        with timer('score'):
+            # Çeşitlilik aşaması tüm sıralamaya bakar; yoksa puanlayıcı yalnızca ilk `limit`'i seçer
+            scored = spec.score(items, request, None if spec.diversify is not None else spec.limit)
+        with timer('diversify'):
+            if spec.diversify is not None:
+                scored = spec.diversify(scored, request)
+        with timer('top_k'):
+            result = scored[:spec.limit]
+
+        self._record(kategori, timer)
+        self.logger.info(
+            f"{len(result)} {kategori} önerisi hazırlandı (sağlayıcı: {len(provider_items)}, "
+            f"katalog: {len(catalog_items)}) - "
+            + ', '.join(f"{stage} {timer.seconds[stage] * 1000:.1f}ms" for stage in STAGES))
+        return result
+
+    def extract_terms(self, spec, request):
+        terms = []
+        for girdi in request.girdiler:
+            terms.extend(spec.input_terms(girdi))
+        if request.tur:
+            terms.append(request.tur)
+        if request.notlar:
+            terms.extend(request.notlar.split()[:3])
+        return terms[:spec.max_terms]
+
+    def fetch_providers(self, spec, request, terms):
+        if not terms or not spec.enabled():
+            return []
+        items = []
+        try:
+            for term, results in self.fanout.fetch_all(spec.fetch, terms, spec.per_term,
+                                                       deadline=request.deadline):
+                items.extend(results)
+            self.logger.info(f"{spec.provider} sağlayıcısından {len(items)} {spec.kategori} adayı alındı")
+        except Exception as e:
+            self.logger.error(f"{spec.provider} {spec.kategori} önerisi hatası: {str(e)}")
+        return items
+
+    def collect_catalog(self, spec, request, seen, timer):
+        """Katalog adaylarını süzgeç ve tekrar kontrolünden geçirerek yeterince topla"""
+        limit = spec.catalog_limit
+        if self.degraded(spec.provider, request.deadline):
+            # API sonuçları eksik: öneriler yerel katalogdan gelir
+            limit = max(limit, spec.degraded_catalog_limit)
+        accepted = []
+        filter_seconds = dedup_seconds = 0.0
+        start = time.perf_counter()
+        for item in self.candidates(spec.kategori, request.girdiler, request.notlar, request.tur):
+            if len(accepted) >= limit:
+                break
+            t0 = time.perf_counter()
+            allowed = self._allowed(spec, item, request)
+            t1 = time.perf_counter()
+            filter_seconds += t1 - t0
+            if not allowed:
+                continue
+            fresh = seen.accept_catalog(item)
+            dedup_seconds += time.perf_counter() - t1
+            if fresh:
+                accepted.append(item)
+        timer.add('catalog', time.perf_counter() - start - filter_seconds - dedup_seconds)
+        timer.add('filter', filter_seconds)
+        timer.add('dedup', dedup_seconds)
+        return accepted
+
+    @staticmethod
+    def _allowed(spec, item, request):
+        if not age_allowed(item, request):
+            return False
+        if request.tur and str(item.get('tur', '')).lower() != request.tur.lower():
+            return False
+        return all(check(item, request) for check in spec.filters)
+
+    def _record(self, kategori, timer):
+        with self._lock:
+            totals = self._timings[kategori]
+            totals['runs'] += 1
+            for stage, seconds in timer.seconds.items():
+                totals[stage] += seconds
+
+    def stats(self):
+        """Kategori başına çalışma sayısı ve aşama başına ortalama süre (ms)"""
+        with self._lock:
+            result = {}
+            for kategori, totals in self._timings.items():
+                runs = totals['runs']
+                result[kategori] = {
+                    'runs': runs,
+                    'stages': {stage: round(totals[stage] * 1000 / runs, 2) if runs else 0.0
+                               for stage in STAGES},
+                }
+            return result
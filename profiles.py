@@ -0,0 +1,101 @@
+"""
+Kullanıcı profili önbelleği
+
+Öneri route'ları ve dashboard yalnızca yaş (doğum tarihi) için her istekte
+kullanicilar tablosuna gidiyordu. Profil artık girişte bir kez okunur:
+
+- oturuma (session['profil']) küçük bir kopya yazılır; aynı oturumdaki
+  istekler veritabanına hiç gitmez
+- süreç içinde sınırlı boyutlu, TTL'li bir LRU önbellek de tutulur; oturumda
+  profil yoksa (eski oturumlar, başka worker) önce buraya bakılır
+
+Profil değiştiğinde invalidate() ile önbellekten düşülür. Yaş, doğum tarihinden
+tek bir yerde (compute_age) ve gün/ay dikkate alınarak hesaplanır.
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime
+
+PROFILE_FIELDS = ('kullanici_adi', 'email', 'dogum_tarihi')
+
+
+def compute_age(dogum_tarihi, today=None):
+    """'YYYY-MM-DD' (ya da yalnızca yıl) doğum tarihinden yaş; bilinmiyorsa None"""
+    if not dogum_tarihi or dogum_tarihi == 'N/A':
+        return None
+    today = today or date.today()
+    text = str(dogum_tarihi).strip()
+    try:
+        birth = datetime.strptime(text[:10], '%Y-%m-%d').date()
+    except ValueError:
+        try:
+            return today.year - int(text.split('-')[0])
+        except ValueError:
+            return None
+    return today.year - birth.year - ((today.month, today.day) < (birth.month, birth.day))
+
+
+class Profile(namedtuple('Profile', PROFILE_FIELDS + ('yas',))):
+    __slots__ = ()
+
+    @classmethod
+    def build(cls, kullanici_adi, email=None, dogum_tarihi=None):
+        return cls(kullanici_adi, email, dogum_tarihi, compute_age(dogum_tarihi))
+
+    @classmethod
+    def from_user(cls, user):
+        return cls.build(user.kullanici_adi, user.email, user.dogum_tarihi)
+
+    def to_session(self):
+        """Oturum çerezine yazılacak alanlar (yaş okunurken yeniden hesaplanır)"""
+        return {field: getattr(self, field) for field in PROFILE_FIELDS}
+
+
+class ProfileCache:
+    def __init__(self, repository, ttl=900, max_entries=1024):
+        self.repository = repository
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # kullanici_adi -> (expires_at, Profile)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def put(self, profile):
+        if profile is None or not self.ttl:
+            return profile
+        with self._lock:
+            self._entries[profile.kullanici_adi] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(profile.kullanici_adi)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return profile
+
+    def get(self, kullanici_adi):
+        """Profili önbellekten, yoksa veritabanından getir; kullanıcı yoksa None"""
+        if not kullanici_adi:
+            return None
+        with self._lock:
+            entry = self._entries.get(kullanici_adi)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(kullanici_adi)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                del self._entries[kullanici_adi]
+            self._stats['misses'] += 1
+        user = self.repository.get_by_username(kullanici_adi)
+        return self.put(Profile.from_user(user)) if user else None
+
+    def invalidate(self, kullanici_adi=None, email=None):
+        with self._lock:
+            keys = [key for key, (_, profile) in self._entries.items()
+                    if key == kullanici_adi or (email and profile.email == email)]
+            for key in keys:
+                del self._entries[key]
+            self._stats['invalidations'] += len(keys)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
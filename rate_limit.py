@@ -0,0 +1,118 @@
+"""
+Sağlayıcı başına token-bucket hız sınırlayıcı
+
+Sabit time.sleep() beklemeleri yerine her sağlayıcı için bir kova tutulur:
+kova saniyede `rate` jeton dolar, en fazla `burst` jeton biriktirir. Kota
+altındayken çağrılar hiç beklemez; kova boşsa çağıran, jetonu önceden rezerve
+edip (kova borca girer) gereken süre kadar uyur - böylece bekleyenler sıraya
+girer ve sağlayıcı tam izin verilen hızda kullanılır.
+
+TokenBucket thread'ler arasında paylaşılır. SharedTokenBucket aynı durumu bir
+SQLite dosyasında tutar; aynı makinedeki gunicorn worker'ları ve scripts/ingest_*
+çalıştırıcıları tek bir kotayı paylaşır.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class TokenBucket:
+    """Süreç içi token-bucket; tüm thread'ler aynı kovayı kullanır"""
+
+    def __init__(self, rate, burst=None, name=''):
+        self.name = name
+        self.rate = float(rate or 0)
+        self.burst = float(burst if burst else max(self.rate, 1.0))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        """Jetonları al (gerekirse borçlan); beklenecek süreyi döndür"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self, tokens=1):
+        """Jeton alınana kadar bekle; beklenen süreyi döndür. rate <= 0 ise sınırsız"""
+        if self.rate <= 0:
+            return 0.0
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Kova durumu SQLite'ta; okuma-güncelleme BEGIN IMMEDIATE ile atomik yapılır.
+    Geçici hatada ("database is locked" gibi) yalnızca o çağrı için süreç içi
+    kovaya düşülür; dosya kullanılamaz durumdaysa (bozuk, açılamıyor) ortak kova
+    bu süreçte kapatılır. İkisi de loglanır.
+    """
+
+    def __init__(self, rate, burst=None, name='', path='', logger=None):
+        super().__init__(rate, burst, name)
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''CREATE TABLE IF NOT EXISTS rate_buckets (
+                            name TEXT PRIMARY KEY,
+                            tokens REAL NOT NULL,
+                            updated REAL NOT NULL)''')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _reserve(self, tokens):
+        if not self.path:
+            return super()._reserve(tokens)
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Süreçler arası ortak saat: time.time()
+                now = time.time()
+                row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE name = ?',
+                                   (self.name,)).fetchone()
+                available = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+                available -= tokens
+                conn.execute('INSERT OR REPLACE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)',
+                             (self.name, available, now))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"Ortak hız sınırı kovasına erişilemedi ({self.name}), "
+                                f"bu çağrı süreç içi kovayla sınırlanıyor: {e}")
+            return super()._reserve(tokens)
+        except sqlite3.Error as e:
+            self.logger.error(f"Ortak hız sınırı kovası kapatıldı ({self.name}), "
+                              f"süreç içi kova kullanılacak: {e}")
+            self.path = ''
+            return super()._reserve(tokens)
+        return -available / self.rate if available < 0 else 0.0
+
+
+def make_bucket(name, rate, burst=None, shared_path='', logger=None):
+    """shared_path verilirse worker'lar arası, verilmezse süreç içi kova"""
+    if shared_path:
+        return SharedTokenBucket(rate, burst, name=name, path=shared_path, logger=logger)
+    return TokenBucket(rate, burst, name=name)
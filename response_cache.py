@@ -0,0 +1,340 @@
+"""
+Sağlayıcı aramaları için iki katmanlı yanıt önbelleği
+
+1. katman: süreç içi LRU (kayıt sayısı ve toplam bayt ile sınırlı)
+2. katman: SQLite dosyası - aynı makinedeki tüm gunicorn worker'ları paylaşır
+
+Anahtar normalize edilmiş (sağlayıcı, uç nokta, parametreler) üçlüsüdür; API
+anahtarları anahtara girmez. Değerler JSON metni olarak saklanır, her okumada
+yeni bir nesne döner (çağıranlar sonuçları değiştirebilir). Her sağlayıcının
+kendi TTL'i vardır; TTL 0 o sağlayıcı için önbelleği kapatır.
+
+Boş sonuçlar (API hatası, anahtar yok) önbelleğe alınmaz - fetch_* fonksiyonları
+hata durumunda da [] döndürdüğü için boş liste ile hata ayırt edilemiyor.
+
+Iskalarda aynı sorgu için eşzamanlı istekler birleştirilir: worker içinde
+SingleFlight, worker'lar arasında SQLite'taki kilit satırı. Kilidi başka bir
+worker tutuyorsa onun sonucu önbelleğe yazması beklenir.
+"""
+
+import copy
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from single_flight import SingleFlight
+
+
+def normalize(value):
+    """Sorgu metinlerini büyük/küçük harf ve boşluk farklarından arındır"""
+    if isinstance(value, str):
+        return ' '.join(value.lower().split())
+    return value
+
+
+def make_key(provider, endpoint, params):
+    return f"{provider}|{endpoint}|{json.dumps(params, sort_keys=True, ensure_ascii=False)}"
+
+
+class _MemoryTier:
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, text)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, text, expires_at):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, text)
+            self._bytes += len(text)
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key):
+        _, text = self._data.pop(key)
+        self._bytes -= len(text)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _DiskTier:
+    """Thread başına SQLite bağlantısı; WAL modu sayesinde worker'lar eşzamanlı okur"""
+
+    PURGE_EVERY = 200
+
+    def __init__(self, path, logger):
+        self.path = path
+        self.logger = logger
+        self.enabled = bool(path)
+        self._local = threading.local()
+        self._writes = 0
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self._init_lock:
+            if not self._initialized:
+                conn.execute('''CREATE TABLE IF NOT EXISTS provider_cache (
+                                    key TEXT PRIMARY KEY,
+                                    provider TEXT NOT NULL,
+                                    value TEXT NOT NULL,
+                                    expires_at REAL NOT NULL)''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_provider_cache_expires ON provider_cache (expires_at)')
+                conn.execute('''CREATE TABLE IF NOT EXISTS provider_locks (
+                                    key TEXT PRIMARY KEY,
+                                    owner TEXT NOT NULL,
+                                    expires_at REAL NOT NULL)''')
+                self._initialized = True
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _failed(self, e):
+        # Geçici hata ("database is locked" gibi): yalnızca bu çağrı ıska / kilitsiz sayılır
+        if isinstance(e, sqlite3.OperationalError):
+            self.logger.warning(f"Disk önbelleğine erişilemedi, bu çağrı için atlanıyor ({self.path}): {e}")
+            return
+        # Dosya kullanılamaz durumda; disk katmanı olmadan da uygulama çalışmaya devam etmeli
+        self.logger.warning(f"Disk önbelleği devre dışı ({self.path}): {e}")
+        self.enabled = False
+
+    def get(self, key, now):
+        if not self.enabled:
+            return None
+        try:
+            row = self._connect().execute(
+                'SELECT value, expires_at FROM provider_cache WHERE key = ? AND expires_at > ?',
+                (key, now)).fetchone()
+        except sqlite3.Error as e:
+            self._failed(e)
+            return None
+        return row
+
+    def set(self, key, provider, text, expires_at):
+        if not self.enabled:
+            return
+        try:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO provider_cache (key, provider, value, expires_at) VALUES (?, ?, ?, ?)',
+                         (key, provider, text, expires_at))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute('DELETE FROM provider_cache WHERE expires_at <= ?', (time.time(),))
+        except sqlite3.Error as e:
+            self._failed(e)
+
+    def try_lock(self, key, timeout):
+        """
+        Worker'lar arası kilidi almayı dene. Alınırsa sahip belirtecini, başka bir
+        worker tutuyorsa None döndürür. Disk katmanı kapalıysa kilit gerekmez.
+        """
+        owner = uuid.uuid4().hex
+        if not self.enabled:
+            return owner
+        now = time.time()
+        try:
+            conn = self._connect()
+            # Süresi dolmuş (çökmüş worker'dan kalan) kilidi devral
+            conn.execute('DELETE FROM provider_locks WHERE key = ? AND expires_at <= ?', (key, now))
+            cursor = conn.execute('INSERT OR IGNORE INTO provider_locks (key, owner, expires_at) VALUES (?, ?, ?)',
+                                  (key, owner, now + timeout))
+        except sqlite3.Error as e:
+            self._failed(e)
+            return owner
+        return owner if cursor.rowcount == 1 else None
+
+    def is_locked(self, key):
+        if not self.enabled:
+            return False
+        try:
+            row = self._connect().execute('SELECT 1 FROM provider_locks WHERE key = ? AND expires_at > ?',
+                                          (key, time.time())).fetchone()
+        except sqlite3.Error as e:
+            self._failed(e)
+            return False
+        return row is not None
+
+    def unlock(self, key, owner):
+        if not self.enabled:
+            return
+        try:
+            self._connect().execute('DELETE FROM provider_locks WHERE key = ? AND owner = ?', (key, owner))
+        except sqlite3.Error as e:
+            self._failed(e)
+
+    def clear(self):
+        if not self.enabled:
+            return
+        try:
+            self._connect().execute('DELETE FROM provider_cache')
+        except sqlite3.Error as e:
+            self._failed(e)
+
+
+class ResponseCache:
+    LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(self, path=None, ttls=None, default_ttl=3600, max_entries=2048,
+                 max_bytes=32 * 1024 * 1024, lock_timeout=10, logger=None):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.logger = logger or logging.getLogger(__name__)
+        self.memory = _MemoryTier(max_entries, max_bytes)
+        self.disk = _DiskTier(path, self.logger)
+        self.lock_timeout = lock_timeout
+        self.flight = SingleFlight()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def ttl_for(self, provider):
+        return self.ttls.get(provider, self.default_ttl)
+
+    def _count(self, provider, field):
+        with self._stats_lock:
+            stats = self._stats.setdefault(provider, {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0,
+                                                      'coalesced': 0, 'peer_waits': 0})
+            stats[field] += 1
+
+    def get(self, provider, key):
+        """Önbellekteki değeri döndür; yoksa None"""
+        now = time.time()
+        text = self.memory.get(key, now)
+        if text is not None:
+            self._count(provider, 'memory_hits')
+            return json.loads(text)
+        row = self.disk.get(key, now)
+        if row is not None:
+            text, expires_at = row
+            self.memory.set(key, text, expires_at)
+            self._count(provider, 'disk_hits')
+            return json.loads(text)
+        self._count(provider, 'misses')
+        return None
+
+    def _peek_disk(self, key):
+        row = self.disk.get(key, time.time())
+        if row is None:
+            return None
+        text, expires_at = row
+        self.memory.set(key, text, expires_at)
+        return json.loads(text)
+
+    def _wait_for_peer(self, provider, key):
+        """Kilidi tutan worker'ın sonucu yazmasını bekle; kilit bırakılır ama değer yoksa None"""
+        self._count(provider, 'peer_waits')
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            value = self._peek_disk(key)
+            if value is not None:
+                return value
+            if not self.disk.is_locked(key):
+                return self._peek_disk(key)
+            time.sleep(self.LOCK_POLL_INTERVAL)
+        return None
+
+    def _fetch_once(self, provider, key, fetch, args, kwargs):
+        """Iskada çalışan lider: worker'lar arası kilidi al, gerçek isteği yap, önbelleğe yaz"""
+        owner = self.disk.try_lock(key, self.lock_timeout)
+        if owner is None:
+            value = self._wait_for_peer(provider, key)
+            if value is not None:
+                return value
+            # Diğer worker boş sonuç aldı ya da zaman aşımı: kendimiz deneriz
+            owner = self.disk.try_lock(key, self.lock_timeout)
+        else:
+            # Kilidi almadan hemen önce başka bir worker yazmış olabilir
+            value = self._peek_disk(key)
+            if value is not None:
+                self.disk.unlock(key, owner)
+                return value
+        try:
+            value = fetch(*args, **kwargs)
+            if value:
+                self.set(provider, key, value)
+            return value
+        finally:
+            if owner is not None:
+                self.disk.unlock(key, owner)
+
+    def set(self, provider, key, value, ttl=None):
+        ttl = self.ttl_for(provider) if ttl is None else ttl
+        if ttl <= 0:
+            return
+        text = json.dumps(value, ensure_ascii=False)
+        expires_at = time.time() + ttl
+        self.memory.set(key, text, expires_at)
+        self.disk.set(key, provider, text, expires_at)
+        self._count(provider, 'stores')
+
+    def cached(self, provider, endpoint):
+        """fetch_*(query, max_results) fonksiyonlarını önbelleğe alan dekoratör"""
+        def decorator(fetch):
+            @functools.wraps(fetch)
+            def wrapper(*args, **kwargs):
+                if self.ttl_for(provider) <= 0:
+                    return fetch(*args, **kwargs)
+                params = {'args': [normalize(a) for a in args],
+                          'kwargs': {k: normalize(v) for k, v in kwargs.items()}}
+                key = make_key(provider, endpoint, params)
+                value = self.get(provider, key)
+                if value is not None:
+                    return value
+                value, shared = self.flight.do(
+                    key, lambda: self._fetch_once(provider, key, fetch, args, kwargs))
+                if shared:
+                    # Aynı sonuç nesnesi birden fazla çağırana gidiyor
+                    self._count(provider, 'coalesced')
+                    return copy.deepcopy(value)
+                return value
+            wrapper.uncached = fetch
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Sağlayıcı başına isabet/ıska sayıları"""
+        with self._stats_lock:
+            result = {}
+            for provider, stats in sorted(self._stats.items()):
+                lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+                hits = stats['memory_hits'] + stats['disk_hits']
+                result[provider] = dict(stats, hit_ratio=round(hits / lookups, 3) if lookups else 0.0)
+            return result
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
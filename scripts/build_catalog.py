@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+data/*.json kataloglarını sütunlu ikili formata (.lcat) derler.
+Uygulama .lcat dosyasını mmap ile açar; JSON ayrıştırması yapılmaz.
+"""
+
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_format import ColumnarCatalog, compile_json_file  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def main():
+    json_files = sorted(glob.glob(os.path.join(DATA_DIR, '*.json')))
+    if not json_files:
+        print("Derlenecek JSON kataloğu bulunamadı")
+        return
+
+    for json_path in json_files:
+        start = time.time()
+        try:
+            out_path = compile_json_file(json_path)
+        except Exception as e:
+            print(f"❌ {os.path.basename(json_path)} derlenemedi: {e}")
+            continue
+        rows = len(ColumnarCatalog(out_path))
+        print(f"✅ {os.path.basename(json_path)} -> {os.path.basename(out_path)} "
+              f"({rows} kayıt, {os.path.getsize(json_path)} -> {os.path.getsize(out_path)} bayt, "
+              f"{time.time() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,24 @@ Google Books API'den otomatik kitap verisi toplama
 Hedef: 1000+ kitap
 """
 
-import requests
 import json
-import time
 import random
 from typing import List, Dict
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from http_client import get_client  # noqa: E402
+from rate_limit import make_bucket  # noqa: E402
 
 class BookIngester:
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_BOOKS_API_KEY", "")
         self.base_url = "https://www.googleapis.com/books/v1/volumes"
+        self.client = get_client('google_books')  # keep-alive bağlantı havuzu
+        self.limiter = make_bucket('google_books', Config.GOOGLE_BOOKS_RATE_LIMIT, Config.GOOGLE_BOOKS_RATE_BURST, Config.RATE_LIMIT_DB)
         self.books = []
         
         # Türkçe ve İngilizce türler
@@ -40,7 +47,8 @@ class BookIngester:
         }
         
         try:
-            response = requests.get(self.base_url, params=params)
+            self.limiter.acquire()
+            response = self.client.get(self.base_url, params=params)
             if response.status_code == 200:
                 data = response.json()
                 return data.get('items', [])
@@ -253,17 +261,17 @@ class BookIngester:
                     parsed_book = self.parse_book(book)
                     if parsed_book['baslik'] not in [b['baslik'] for b in self.books]:
                         self.books.append(parsed_book)
-            
-            # API limit aşımını önle
-            time.sleep(1)
         
         print(f"Toplam {len(self.books)} kitap toplandı!")
         return self.books
 
     def save_to_json(self, filename: str = '../data/books.json'):
         """JSON dosyasına kaydet"""
-        with open(filename, 'w', encoding='utf-8') as f:
+        # Önce geçici dosyaya yaz, sonra tek adımda değiştir: çalışan uygulama yarım dosya görmesin
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
             json.dump(self.books, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_filename, filename)
         print(f"Kitaplar {filename} dosyasına kaydedildi!")
 
 def main():
@@ -4,17 +4,24 @@ TMDB API'den otomatik film verisi toplama
 Hedef: 500+ film
 """
 
-import requests
 import json
-import time
 import random
 from typing import List, Dict
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from http_client import get_client  # noqa: E402
+from rate_limit import make_bucket  # noqa: E402
 
 class MovieIngester:
     def __init__(self):
         self.api_key = os.getenv("TMDB_API_KEY", "")
         self.base_url = "https://api.themoviedb.org/3"
+        self.client = get_client('tmdb')  # keep-alive bağlantı havuzu
+        self.limiter = make_bucket('tmdb', Config.TMDB_RATE_LIMIT, Config.TMDB_RATE_BURST, Config.RATE_LIMIT_DB)
         self.movies = []
         
         # Film türleri
@@ -53,7 +60,8 @@ class MovieIngester:
         }
         
         try:
-            response = requests.get(url, params=params)
+            self.limiter.acquire()
+            response = self.client.get(url, params=params)
             if response.status_code == 200:
                 data = response.json()
                 return data.get('results', [])
@@ -74,7 +82,8 @@ class MovieIngester:
         }
         
         try:
-            response = requests.get(url, params=params)
+            self.limiter.acquire()
+            response = self.client.get(url, params=params)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -280,17 +289,17 @@ class MovieIngester:
                     parsed_movie = self.parse_movie(movie, details)
                     if parsed_movie['baslik'] not in [m['baslik'] for m in self.movies]:
                         self.movies.append(parsed_movie)
-                
-                # API limit aşımını önle
-                time.sleep(0.5)
         
         print(f"Toplam {len(self.movies)} film toplandı!")
         return self.movies
 
     def save_to_json(self, filename: str = '../data/movies.json'):
         """JSON dosyasına kaydet"""
-        with open(filename, 'w', encoding='utf-8') as f:
+        # Önce geçici dosyaya yaz, sonra tek adımda değiştir: çalışan uygulama yarım dosya görmesin
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
             json.dump(self.movies, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_filename, filename)
         print(f"Filmler {filename} dosyasına kaydedildi!")
 
 def main():
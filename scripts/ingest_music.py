@@ -4,18 +4,25 @@ Last.fm ve Spotify API'den otomatik müzik verisi toplama
 Hedef: 2000+ şarkı
 """
 
-import requests
 import json
-import time
 import random
 from typing import List, Dict
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from http_client import get_client  # noqa: E402
+from rate_limit import make_bucket  # noqa: E402
 
 class MusicIngester:
     def __init__(self):
         self.lastfm_api_key = os.getenv("LASTFM_API_KEY", "")
         self.spotify_client_id = os.getenv("SPOTIFY_CLIENT_ID", "")
         self.spotify_client_secret = os.getenv("SPOTIFY_CLIENT_SECRET", "")
+        self.client = get_client('lastfm')  # keep-alive bağlantı havuzu
+        self.limiter = make_bucket('lastfm', Config.LASTFM_RATE_LIMIT, Config.LASTFM_RATE_BURST, Config.RATE_LIMIT_DB)
         self.music = []
         
         # Müzik türleri
@@ -44,7 +51,8 @@ class MusicIngester:
         }
         
         try:
-            response = requests.get(url, params=params)
+            self.limiter.acquire()
+            response = self.client.get(url, params=params)
             if response.status_code == 200:
                 data = response.json()
                 tracks = data.get('toptracks', {}).get('track', [])
@@ -68,7 +76,8 @@ class MusicIngester:
         }
         
         try:
-            response = requests.get(url, params=params)
+            self.limiter.acquire()
+            response = self.client.get(url, params=params)
             if response.status_code == 200:
                 data = response.json()
                 return data.get('track', {})
@@ -294,17 +303,17 @@ class MusicIngester:
                 parsed_track = self.parse_track(track, track_info)
                 if parsed_track['baslik'] not in [m['baslik'] for m in self.music]:
                     self.music.append(parsed_track)
-                
-                # API limit aşımını önle
-                time.sleep(0.1)
         
         print(f"Toplam {len(self.music)} şarkı toplandı!")
         return self.music
 
     def save_to_json(self, filename: str = '../data/music.json'):
         """JSON dosyasına kaydet"""
-        with open(filename, 'w', encoding='utf-8') as f:
+        # Önce geçici dosyaya yaz, sonra tek adımda değiştir: çalışan uygulama yarım dosya görmesin
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
             json.dump(self.music, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_filename, filename)
         print(f"Müzik {filename} dosyasına kaydedildi!")
 
 def main():
@@ -4,17 +4,24 @@ TMDB API'den otomatik dizi verisi toplama
 Hedef: 500+ dizi
 """
 
-import requests
 import json
-import time
 import random
 from typing import List, Dict
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from http_client import get_client  # noqa: E402
+from rate_limit import make_bucket  # noqa: E402
 
 class SeriesIngester:
     def __init__(self):
         self.api_key = os.getenv("TMDB_API_KEY", "")
         self.base_url = "https://api.themoviedb.org/3"
+        self.client = get_client('tmdb')  # keep-alive bağlantı havuzu
+        self.limiter = make_bucket('tmdb', Config.TMDB_RATE_LIMIT, Config.TMDB_RATE_BURST, Config.RATE_LIMIT_DB)
         self.series = []
         
         # Dizi türleri
@@ -59,7 +66,8 @@ class SeriesIngester:
         }
         
         try:
-            response = requests.get(url, params=params)
+            self.limiter.acquire()
+            response = self.client.get(url, params=params)
             if response.status_code == 200:
                 data = response.json()
                 return data.get('results', [])
@@ -80,7 +88,8 @@ class SeriesIngester:
         }
         
         try:
-            response = requests.get(url, params=params)
+            self.limiter.acquire()
+            response = self.client.get(url, params=params)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -305,17 +314,17 @@ class SeriesIngester:
                     parsed_series = self.parse_series(series, details)
                     if parsed_series['baslik'] not in [s['baslik'] for s in self.series]:
                         self.series.append(parsed_series)
-                
-                # API limit aşımını önle
-                time.sleep(0.5)
         
         print(f"Toplam {len(self.series)} dizi toplandı!")
         return self.series
 
     def save_to_json(self, filename: str = '../data/series.json'):
         """JSON dosyasına kaydet"""
-        with open(filename, 'w', encoding='utf-8') as f:
+        # Önce geçici dosyaya yaz, sonra tek adımda değiştir: çalışan uygulama yarım dosya görmesin
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
             json.dump(self.series, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_filename, filename)
         print(f"Diziler {filename} dosyasına kaydedildi!")
 
 def main():
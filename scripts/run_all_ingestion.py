@@ -58,7 +58,8 @@ def main():
         ("ingest_books.py", "Kitap Verisi Toplama (Google Books API)"),
         ("ingest_movies.py", "Film Verisi Toplama (TMDB API)"),
         ("ingest_series.py", "Dizi Verisi Toplama (TMDB API)"),
-        ("ingest_music.py", "Müzik Verisi Toplama (Last.fm + Spotify API)")
+        ("ingest_music.py", "Müzik Verisi Toplama (Last.fm + Spotify API)"),
+        ("build_catalog.py", "Katalogları Sütunlu Formata Derleme (.lcat)")
     ]
     
     # Her script'i çalıştır
@@ -77,7 +78,7 @@ def main():
     print("   🎵 music.json - Müzik verileri")
     
     print("\n🔧 Sonraki adımlar:")
-    print("   1. app.py'deki get_all_*_database() fonksiyonlarını JSON okumaya güncelleyin")
+    print("   1. Çalışan uygulama yeni JSON dosyalarını birkaç saniye içinde otomatik yükler")
     print("   2. Uygulamayı test edin")
     print("   3. Gerekirse daha fazla veri ekleyin")
 
@@ -0,0 +1,119 @@
+"""
+Katalog ters indeksi (inverted index)
+
+Tema, anahtar kelime, tür, yazar/sanatçı ve tarz alanlarındaki normalize
+edilmiş token'ları kompakt kayıt-id listelerine (posting) eşler. Puanlayıcılar
+tüm kataloğu taramak yerine yalnızca kullanıcının girdileriyle en az bir token
+paylaşan kayıtlara dokunur.
+"""
+
+import re
+from array import array
+
+# Alt çizgi de ayırıcı sayılır: 'modern_fantastik' -> 'modern', 'fantastik'
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+# Neredeyse her kayıtta geçen, aday seçiminde ayırt ediciliği olmayan kelimeler
+STOPWORDS = frozenset([
+    've', 'ile', 'bir', 'bu', 'şu', 'da', 'de', 'mi', 'için', 'gibi', 'çok', 'daha',
+    'the', 'a', 'an', 'of', 'and', 'or', 'in', 'on', 'to', 'for', 'with',
+])
+
+# Kategori başına indekslenen alanlar
+INDEX_FIELDS = {
+    'kitap': ('tema', 'anahtar_kelimeler', 'tur', 'yazar', 'yazar_tarzi', 'baslik'),
+    'film': ('tema', 'anahtar_kelimeler', 'tur', 'yonetmen', 'yonetmen_tarzi', 'baslik'),
+    'dizi': ('tema', 'anahtar_kelimeler', 'tur', 'yaratici', 'yapimci_tarzi', 'baslik'),
+    'muzik': ('tema', 'anahtar_kelimeler', 'tur', 'sanatci', 'sanatci_tarzi', 'baslik'),
+}
+
+
+def tokenize(text):
+    """Metni küçük harfli token'lara böl (tek karakterlik ve stopword'ler atılır)"""
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(str(text).lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def query_tokens(texts):
+    """Kullanıcı girdilerinden (başlıklar + notlar) tekil token kümesi üret"""
+    tokens = set()
+    for text in texts:
+        tokens.update(tokenize(text))
+    return tokens
+
+
+class InvertedIndex:
+    """token -> array('I') kayıt id'leri; ayrıca tür değerine göre tam eşleşme indeksi"""
+
+    def __init__(self, items, fields):
+        self.size = len(items)
+        self._postings = {}
+        self._by_tur = {}
+
+        for item_id, item in enumerate(items):
+            tokens = set()
+            for field in fields:
+                value = item.get(field)
+                if not value:
+                    continue
+                if isinstance(value, (list, tuple)):
+                    for v in value:
+                        tokens.update(tokenize(v))
+                else:
+                    tokens.update(tokenize(value))
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = array('I')
+                postings.append(item_id)
+
+            tur = str(item.get('tur', '')).lower()
+            postings = self._by_tur.get(tur)
+            if postings is None:
+                postings = self._by_tur[tur] = array('I')
+            postings.append(item_id)
+
+    def __len__(self):
+        return self.size
+
+    def postings(self, token):
+        return self._postings.get(token, ())
+
+    def overlap(self, tokens):
+        """Her aday kayıt için paylaşılan token sayısı: {item_id: adet}"""
+        counts = {}
+        for token in tokens:
+            for item_id in self._postings.get(token, ()):
+                counts[item_id] = counts.get(item_id, 0) + 1
+        return counts
+
+    def iter_candidates(self, tokens, tur=None, pad=True):
+        """
+        Aday kayıt id'lerini üret: önce en çok token paylaşanlar (eşitlikte katalog
+        sırası), pad=True ise ardından kalan kayıtlar katalog sırasıyla. tur
+        verilirse yalnızca o türdeki kayıtlar dolaşılır. Çağıran taraf yeterli
+        sonuca ulaşınca döngüyü kırarak taramayı erken bitirir.
+        """
+        allowed = None
+        if tur:
+            allowed = self._by_tur.get(tur.lower(), ())
+            allowed_set = set(allowed)
+
+        counts = self.overlap(tokens)
+        if allowed is not None:
+            counts = {i: c for i, c in counts.items() if i in allowed_set}
+
+        for item_id in sorted(counts, key=lambda i: (-counts[i], i)):
+            yield item_id
+
+        if not pad:
+            return
+        remaining = allowed if allowed is not None else range(self.size)
+        for item_id in remaining:
+            if item_id not in counts:
+                yield item_id
+
+
+def build_index(kategori, items):
+    return InvertedIndex(items, INDEX_FIELDS[kategori])
@@ -0,0 +1,177 @@
+"""
+Sunucu tarafı oturum
+
+Çerez oturumu son aramayı (notlar dahil), Spotify token'larını ve süre bilgisini
+taşıyordu; her yanıtta imzalanıp her istekte çözülüyordu. Artık çerezde yalnızca
+imzalı, opak bir 'oturum_kimliği.yazım_jetonu' değeri var; veri süreli depoda
+(ttl_store: worker'ların paylaştığı SQLite dosyası ya da Redis) durur.
+
+- Tembel yükleme: oturuma dokunmayan istekler depoya hiç gitmez
+- Yalnızca değişince yazma: veri değişmediyse depo ve çerez güncellenmez
+- Bellek önü (LRU): yazım jetonu çerezdekiyle aynıysa veri worker belleğinden
+  okunur. Oturum her yazıldığında rastgele yeni bir jeton üretilir ve yeni çerez
+  gönderilir; aynı çerezle iki worker aynı anda yazsa bile jetonları farklı
+  olduğundan, başka bir worker'ın yazdığı güncel veri eski bellek kopyasıyla karışmaz
+- Süre: depodaki kayıt permanent_session_lifetime kadar yaşar; etkin oturumların
+  süresi ömrün onda biri geçtikçe tazelenir
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+
+
+class ServerSession(SessionMixin):
+    def __init__(self, sid=None, token=None, loader=None):
+        self.sid = sid
+        self.token = token
+        self.new = sid is None
+        self.modified = False
+        self.saved_at = None
+        self._loader = loader
+        self._data = None if loader else {}
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def _items(self):
+        if self._data is None:
+            self._data, self.saved_at = self._loader()
+            self._loader = None
+            if self.saved_at is None:
+                # Depoda yok (süresi dolmuş): eski kimlik yeniden kullanılmaz
+                self.sid, self.token, self.new = None, None, True
+        return self._data
+
+    def __getitem__(self, key):
+        return self._items()[key]
+
+    def __setitem__(self, key, value):
+        self._items()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._items()[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def __len__(self):
+        return len(self._items())
+
+    def clear(self):
+        if self._items():
+            self._data.clear()
+            self.modified = True
+
+    def __repr__(self):
+        return f"<ServerSession {self.sid!r} {self._data!r}>"
+
+
+class ServerSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+    salt = 'listoria-server-session'
+
+    def __init__(self, store, max_entries=4096, logger=None):
+        self.store = store
+        self.max_entries = max_entries
+        self.logger = logger
+        self._front = OrderedDict()  # sid -> (yazım jetonu, kayıt zamanı, serileştirilmiş veri)
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'store_reads': 0, 'writes': 0, 'touches': 0}
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt)
+
+    def _remember(self, sid, token, saved_at, text):
+        with self._lock:
+            self._front[sid] = (token, saved_at, text)
+            self._front.move_to_end(sid)
+            while len(self._front) > self.max_entries:
+                self._front.popitem(last=False)
+
+    def _forget(self, sid):
+        with self._lock:
+            self._front.pop(sid, None)
+
+    def _load(self, sid, token):
+        with self._lock:
+            cached = self._front.get(sid)
+            if cached is not None and cached[0] == token:
+                self._front.move_to_end(sid)
+                self._stats['memory_hits'] += 1
+                return self.serializer.loads(cached[2]), cached[1]
+        self._stats['store_reads'] += 1
+        record = self.store.get(sid)
+        if record is None:
+            return {}, None
+        self._remember(sid, record['g'], record['t'], record['d'])
+        return self.serializer.loads(record['d']), record['t']
+
+    def open_session(self, app, request):
+        value = request.cookies.get(self.get_cookie_name(app))
+        if not value or not app.secret_key:
+            return ServerSession()
+        try:
+            sid, _, token = self._signer(app).unsign(value).decode('ascii').partition('.')
+        except (BadSignature, UnicodeDecodeError):
+            return ServerSession()
+        if not sid or not token:
+            return ServerSession()
+        return ServerSession(sid, token, loader=lambda: self._load(sid, token))
+
+    def _lifetime(self, app):
+        return int(app.permanent_session_lifetime.total_seconds())
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session.loaded and not session.modified:
+            return
+
+        if not session:
+            if session.modified and session.sid:
+                self.store.pop(session.sid)
+                self._forget(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        lifetime = self._lifetime(app)
+        now = time.time()
+        touch = session.saved_at is not None and now - session.saved_at > lifetime / 10
+        if not session.modified and not touch:
+            return
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        # Sayaç değil rastgele jeton: aynı çerezden yazan iki worker aynı değeri üretemez
+        session.token = secrets.token_hex(8)
+        text = self.serializer.dumps(dict(session))
+        self.store.set(session.sid, {'g': session.token, 't': now, 'd': text}, ttl=lifetime)
+        self._remember(session.sid, session.token, now, text)
+        self._stats['writes' if session.modified else 'touches'] += 1
+
+        value = self._signer(app).sign(f"{session.sid}.{session.token}").decode('ascii')
+        response.set_cookie(name, value,
+                            expires=self.get_expiration_time(app, session),
+                            httponly=self.get_cookie_httponly(app),
+                            domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
+        response.vary.add('Cookie')
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, cached=len(self._front))
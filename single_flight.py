@@ -0,0 +1,60 @@
+"""
+Tekil uçuş (single-flight): aynı anahtar için eşzamanlı çağrıları birleştirir
+
+Aynı worker içinde aynı sağlayıcı sorgusunu isteyen thread'lerden yalnızca ilki
+(lider) gerçek çağrıyı yapar; diğerleri onun bitmesini bekler ve aynı sonucu
+paylaşır. Lider hata alırsa bekleyenlere de aynı hata iletilir.
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        fn()'i anahtar başına tek seferde çalıştır; (sonuç, paylaşıldı_mı) döndür.
+        paylaşıldı_mı True ise sonuç başka bir çağıranla aynı nesnedir.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, call.waiters > 0
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,158 @@
+"""
+Spotify şarkı çözümleme (şarkı adı + sanatçı -> track URI)
+
+create_spotify_playlist 15+ şarkıyı tek tek, art arda sp.search ile arıyordu.
+Çözümleyici:
+
+- önce kalıcı çözüm önbelleğine bakar (anahtar: normalize edilmiş
+  "şarkı - sanatçı"); bulunamayan şarkılar da ('bulunamadı') daha kısa bir
+  süreyle saklanır, tekrar eden şarkılar hiç API çağrısı yapmaz
+- ıskaları sınırlı bir thread havuzunda (FanOut) aynı anda arar
+- 429 yanıtında Retry-After süresi kadar TÜM aramaları durdurur (tek tek
+  thread'lerin ayrı ayrı sunucuya yüklenmesini önler) ve yeniden dener
+
+Geçici hatalar (ağ, 5xx) önbelleğe yazılmaz; şarkı bu istek için bulunamamış sayılır.
+"""
+
+import logging
+import threading
+import time
+
+from response_cache import normalize
+
+try:
+    from spotipy.exceptions import SpotifyException
+except ImportError:
+    SpotifyException = None
+
+
+def split_song(sarki):
+    """'Şarkı - Sanatçı' metnini (şarkı, sanatçı) çiftine ayır"""
+    if ' - ' in sarki:
+        sarki_adi, sanatci = sarki.split(' - ', 1)
+        return sarki_adi.strip(), sanatci.strip()
+    return sarki.strip(), ''
+
+
+def track_info(item):
+    return {
+        'uri': item['uri'],
+        'id': item['id'],
+        'name': item['name'],
+        'artist': item['artists'][0]['name'],
+        'album': item['album']['name'],
+        'image': item['album']['images'][0]['url'] if item['album']['images'] else None,
+        'preview_url': item.get('preview_url'),
+    }
+
+
+class SpotifyResolver:
+    def __init__(self, store, fanout, limiter=None, found_ttl=30 * 86400, not_found_ttl=86400,
+                 max_retries=3, max_retry_after=30, logger=None):
+        self.store = store
+        self.fanout = fanout
+        self.limiter = limiter
+        self.found_ttl = found_ttl
+        self.not_found_ttl = not_found_ttl
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.logger = logger or logging.getLogger(__name__)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'cache_hits': 0, 'searches': 0, 'rate_limited': 0, 'errors': 0}
+
+    @staticmethod
+    def key(sarki_adi, sanatci=''):
+        return normalize(f"{sarki_adi} - {sanatci}" if sanatci else sarki_adi)
+
+    def _wait_if_paused(self):
+        with self._lock:
+            wait = self._paused_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _retry_after(self, error):
+        headers = getattr(error, 'headers', None) or {}
+        try:
+            seconds = float(headers.get('Retry-After', 1))
+        except (TypeError, ValueError):
+            seconds = 1.0
+        return min(max(seconds, 0.5), self.max_retry_after)
+
+    def _search(self, sp, sarki_adi, sanatci):
+        """Spotify'da ara; (bulundu_mu_kesin, track_info) - geçici hatada (False, None)"""
+        query = f"{sarki_adi} {sanatci}".strip()
+        for attempt in range(self.max_retries + 1):
+            self._wait_if_paused()
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                self._stats['searches'] += 1
+                results = sp.search(q=query, type='track', limit=3)
+            except Exception as e:
+                if SpotifyException is not None and isinstance(e, SpotifyException) and e.http_status == 429:
+                    seconds = self._retry_after(e)
+                    self._stats['rate_limited'] += 1
+                    self.logger.warning(f"Spotify hız sınırı, {seconds:.1f}s bekleniyor ({attempt + 1}. deneme)")
+                    self._pause(seconds)
+                    continue
+                self._stats['errors'] += 1
+                self.logger.error(f"Spotify şarkı arama hatası: {str(e)}")
+                return False, None
+            items = results['tracks']['items']
+            return True, (track_info(items[0]) if items else None)
+        self._stats['errors'] += 1
+        return False, None
+
+    def _resolve_remote(self, key, sp, songs):
+        sarki_adi, sanatci = songs[key]
+        definite, info = self._search(sp, sarki_adi, sanatci)
+        if definite:
+            self.store.set(key, {'track': info}, ttl=self.found_ttl if info else self.not_found_ttl)
+        return info
+
+    def resolve_all(self, sp, pairs, on_result=None):
+        """
+        [(şarkı, sanatçı)] için aynı sırada [track_info ya da None]. on_result
+        verilirse her şarkı çözüldükçe on_result(sıra, track_info) çağrılır.
+        """
+        keys = [self.key(sarki_adi, sanatci) for sarki_adi, sanatci in pairs]
+        positions = {}
+        for index, key in enumerate(keys):
+            positions.setdefault(key, []).append(index)
+        resolved = {}
+        songs = {}
+
+        def done(key, info):
+            resolved[key] = info
+            if on_result is not None:
+                for index in positions[key]:
+                    on_result(index, info)
+
+        for key, pair in zip(keys, pairs):
+            if key in resolved or key in songs:
+                continue
+            cached = self.store.get(key)
+            if cached is not None:
+                self._stats['cache_hits'] += 1
+                done(key, cached['track'])
+            else:
+                songs[key] = pair
+        if songs:
+            for key, info in self.fanout.fetch_all(self._resolve_remote, list(songs), sp, songs):
+                done(key, info)
+            for key in songs:
+                if key not in resolved:
+                    # Hata veren arama: bulunamadı say
+                    done(key, None)
+        return [resolved.get(key) for key in keys]
+
+    def resolve(self, sp, sarki_adi, sanatci=''):
+        return self.resolve_all(sp, [(sarki_adi, sanatci)])[0]
+
+    def stats(self):
+        return dict(self._stats)
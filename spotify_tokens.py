@@ -0,0 +1,181 @@
+"""
+Spotify erişim token'ı yöneticisi
+
+spotify_callback access/refresh token'ı ve bitiş zamanını oturuma yazıyor ama
+kimse okumuyordu: token süresi dolunca playlist akışı yarıda kalıp kullanıcı
+yeniden OAuth'a gönderiliyordu. Yönetici:
+
+- kullanıcı başına tek, yeniden kullanılan bir spotipy.Spotify istemcisi verir;
+  istemcinin auth_manager'ı her Spotify çağrısından önce expires_at'e bakar
+- bitişe `refresh_margin` saniyeden az kaldıysa çağrıdan önce yeniler;
+  `proactive_window` içine girildiyse eski token'la devam edip arka planda yeniler
+- aynı kullanıcı için eşzamanlı yenilemeleri birleştirir (SingleFlight)
+- yenilenen token'ı tutar; istek içinde oturuma geri yazılır (token_info)
+
+Refresh token geçersizse SpotifyTokenError fırlatılır; çağıran bunu 'oturum
+sona erdi' olarak ele alır.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from fanout import FanOut
+from single_flight import SingleFlight
+
+try:
+    import spotipy
+    from spotipy.cache_handler import MemoryCacheHandler
+    from spotipy.oauth2 import SpotifyOAuth
+except ImportError:
+    spotipy = None
+
+
+class SpotifyTokenError(Exception):
+    """Token yenilenemedi; kullanıcının yeniden bağlanması gerekiyor"""
+
+
+class _UserAuth:
+    """spotipy auth_manager arayüzü: her çağrıda geçerli access token'ı döndürür"""
+
+    def __init__(self, manager, user):
+        self.manager = manager
+        self.user = user
+
+    def get_access_token(self, as_dict=False):
+        info = self.manager.fresh_token(self.user)
+        return info if as_dict else info['access_token']
+
+
+class SpotifyTokenManager:
+    def __init__(self, client_id, client_secret, refresh_margin=60, proactive_window=300,
+                 max_users=1024, requests_timeout=10, logger=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self.proactive_window = proactive_window
+        self.max_users = max_users
+        self.requests_timeout = requests_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.flight = SingleFlight()
+        self.background = FanOut(max_workers=2, logger=self.logger)
+        self._users = OrderedDict()  # kullanıcı -> {'token': {...}, 'client': Spotify}
+        self._lock = threading.Lock()
+        self._stats = {'refreshes': 0, 'background_refreshes': 0, 'failures': 0}
+
+    def _entry(self, user):
+        with self._lock:
+            entry = self._users.get(user)
+            if entry is not None:
+                self._users.move_to_end(user)
+            return entry
+
+    def remember(self, user, token_info):
+        """Oturumdaki token'ı yöneticiye bildir; yöneticideki daha yeniyse o korunur"""
+        if not token_info or not token_info.get('access_token'):
+            return None
+        with self._lock:
+            entry = self._users.get(user)
+            if entry is None:
+                entry = {'token': dict(token_info), 'client': None}
+                self._users[user] = entry
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            elif (token_info.get('expires_at') or 0) > (entry['token'].get('expires_at') or 0):
+                entry['token'] = dict(token_info)
+            self._users.move_to_end(user)
+            return dict(entry['token'])
+
+    def token_info(self, user):
+        entry = self._entry(user)
+        return dict(entry['token']) if entry else None
+
+    def forget(self, user):
+        with self._lock:
+            self._users.pop(user, None)
+
+    def client(self, user, token_info=None):
+        """Kullanıcının paylaşılan spotipy istemcisi (token'ı kendiliğinden yenilenir)"""
+        if token_info is not None:
+            self.remember(user, token_info)
+        entry = self._entry(user)
+        if entry is None:
+            raise SpotifyTokenError("Spotify token'ı yok")
+        if entry['client'] is None:
+            with self._lock:
+                if entry['client'] is None:
+                    entry['client'] = spotipy.Spotify(auth_manager=_UserAuth(self, user),
+                                                      requests_timeout=self.requests_timeout)
+        return entry['client']
+
+    def fresh_token(self, user):
+        """Geçerli token; bitişe yakınsa yenile (gerekirse arka planda)"""
+        entry = self._entry(user)
+        if entry is None:
+            raise SpotifyTokenError("Spotify token'ı yok")
+        token = entry['token']
+        remaining = (token.get('expires_at') or 0) - time.time()
+        if remaining <= self.refresh_margin:
+            return self._refresh(user)
+        if remaining <= self.proactive_window:
+            self.refresh_in_background(user)
+        return dict(token)
+
+    def refresh_in_background(self, user):
+        entry = self._entry(user)
+        with self._lock:
+            if entry is None or entry.get('pending'):
+                return
+            entry['pending'] = True
+
+        def run():
+            try:
+                self._refresh(user)
+                self._stats['background_refreshes'] += 1
+            except SpotifyTokenError:
+                pass
+            finally:
+                entry['pending'] = False
+        self.background.executor().submit(run)
+
+    def _refresh(self, user):
+        def refresh():
+            entry = self._entry(user)
+            if entry is None:
+                raise SpotifyTokenError("Spotify token'ı yok")
+            token = entry['token']
+            # Bu arada başka bir thread yenilediyse tekrar gitme
+            if (token.get('expires_at') or 0) - time.time() > self.proactive_window:
+                return dict(token)
+            refresh_token = token.get('refresh_token')
+            if not refresh_token:
+                raise SpotifyTokenError("Refresh token yok")
+            oauth = SpotifyOAuth(client_id=self.client_id, client_secret=self.client_secret,
+                                 redirect_uri='http://localhost/spotify-callback',
+                                 cache_handler=MemoryCacheHandler(),
+                                 requests_timeout=self.requests_timeout)
+            try:
+                new_token = oauth.refresh_access_token(refresh_token)
+            except Exception as e:
+                self._stats['failures'] += 1
+                self.logger.error(f"Spotify token yenilenemedi ({user}): {e}")
+                raise SpotifyTokenError(str(e))
+            info = {
+                'access_token': new_token['access_token'],
+                # Spotify yeni refresh token vermeyebilir; eskisi geçerli kalır
+                'refresh_token': new_token.get('refresh_token') or refresh_token,
+                'expires_at': new_token.get('expires_at') or int(time.time()) + int(new_token.get('expires_in', 3600)),
+            }
+            with self._lock:
+                entry['token'] = info
+            self._stats['refreshes'] += 1
+            self.logger.info(f"Spotify token yenilendi: {user}")
+            return dict(info)
+
+        result, _ = self.flight.do(user, refresh)
+        return dict(result)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, users=len(self._users))
@@ -0,0 +1,50 @@
+"""
+Sınırlı ilk-k (top-k) seçimi
+
+Puanlayıcılar tüm aday listesini sıralıyor, çağıran ise yalnızca ilk 8-20
+öneriyi tutuyordu. TopK en fazla k öğelik bir min-heap tutar; sonuç
+sorted(..., reverse=True)[:k] ile birebir aynıdır (eşit puanlarda giriş sırası
+korunur).
+
+Puanlayıcı bir öğenin alabileceği en yüksek puanı (üst sınır) ucuza
+hesaplayabiliyorsa, kesin puanı hesaplamadan önce can_enter(üst_sınır) sorulur:
+heap dolu ve üst sınır heap'teki en düşük puanı geçemiyorsa öğe atlanır.
+"""
+
+import heapq
+
+
+class TopK:
+    def __init__(self, k):
+        self.k = k
+        self._heap = []  # (puan, -sıra, öğe): en kötü öğe heap'in başında
+        self._seq = 0
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def can_enter(self, bound):
+        """
+        Puanı en fazla `bound` olabilecek bir sonraki öğe ilk k'ya girebilir mi.
+        Eşit puanda önce gelen öğe önde kaldığından heap'in en düşüğünü aşmalı.
+        """
+        if len(self._heap) < self.k:
+            return True
+        if self._heap and bound > self._heap[0][0]:
+            return True
+        self._seq += 1
+        self.skipped += 1
+        return False
+
+    def push(self, score, item):
+        entry = (score, -self._seq, item)
+        self._seq += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif self._heap and entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        """İlk k öğe, puana göre azalan sırada"""
+        return [item for score, seq, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
@@ -0,0 +1,234 @@
+"""
+Süreli anahtar-değer deposu (doğrulama ve şifre sıfırlama kodları)
+
+Kodlar modül düzeyindeki dict'lerde tutulunca her gunicorn worker'ı yalnızca
+kendi ürettiği kodu görüyordu ve kayıtlar hiç silinmiyordu. Depolar:
+
+- SQLiteTTLStore: aynı sunucudaki tüm worker'ların paylaştığı SQLite dosyası (WAL)
+- RedisTTLStore: birden çok sunucu için ağ deposu (redis paketi isteğe bağlı);
+  TTL'yi Redis'in kendisi uygular
+- MemoryTTLStore: tek süreç içi yerel yedek / geliştirme
+
+Hepsi dict gibi kullanılır (`in`, [], get, pop, del); yazarken TTL verilmezse
+deponun varsayılanı geçerlidir. Süresi dolan kayıtlar okunurken görünmez ve
+`sweep_interval` saniyede bir toplu olarak silinir. Değerler JSON'a çevrilir.
+
+    codes = make_ttl_store('dogrulama', url=..., path=..., default_ttl=900)
+    codes.set(email, {'code': '123456'}, ttl=900)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # Ağ deposu kullanılmıyorsa gerekmez
+    redis = None
+
+
+class TTLStore:
+    def __init__(self, namespace, default_ttl=900, sweep_interval=60):
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+
+    # Alt sınıfların uyguladığı işlemler
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, text, ttl):
+        raise NotImplementedError
+
+    def _pop(self, key):
+        raise NotImplementedError
+
+    def sweep(self):
+        """Süresi dolan kayıtları sil; silinen sayısını döndür"""
+        return 0
+
+    def _maybe_sweep(self):
+        if time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = time.monotonic()
+            self.sweep()
+        finally:
+            self._sweep_lock.release()
+
+    def get(self, key, default=None):
+        text = self._get(key)
+        return json.loads(text) if text is not None else default
+
+    def set(self, key, value, ttl=None):
+        self._set(key, json.dumps(value), ttl or self.default_ttl)
+        self._maybe_sweep()
+
+    def pop(self, key, default=None):
+        text = self._pop(key)
+        return json.loads(text) if text is not None else default
+
+    def __contains__(self, key):
+        return self._get(key) is not None
+
+    def __getitem__(self, key):
+        text = self._get(key)
+        if text is None:
+            raise KeyError(key)
+        return json.loads(text)
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        if self._pop(key) is None:
+            raise KeyError(key)
+
+
+class MemoryTTLStore(TTLStore):
+    """Tek süreç içi depo (ağ deposu yokken yerel yedek)"""
+
+    def __init__(self, namespace, default_ttl=900, sweep_interval=60):
+        super().__init__(namespace, default_ttl, sweep_interval)
+        self._items = {}  # key -> (expires_at, text)
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.time():
+                del self._items[key]
+                return None
+            return item[1]
+
+    def _set(self, key, text, ttl):
+        with self._lock:
+            self._items[key] = (time.time() + ttl, text)
+
+    def _pop(self, key):
+        with self._lock:
+            item = self._items.pop(key, None)
+        if item is None or item[0] <= time.time():
+            return None
+        return item[1]
+
+    def sweep(self):
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._items.items() if expires_at <= now]
+            for key in expired:
+                del self._items[key]
+        return len(expired)
+
+
+class SQLiteTTLStore(TTLStore):
+    """Aynı sunucudaki worker'ların paylaştığı dosya tabanlı depo"""
+
+    def __init__(self, namespace, path, default_ttl=900, sweep_interval=60, logger=None):
+        super().__init__(namespace, default_ttl, sweep_interval)
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('''CREATE TABLE IF NOT EXISTS ttl_store (
+                            namespace TEXT NOT NULL,
+                            key TEXT NOT NULL,
+                            value TEXT NOT NULL,
+                            expires_at REAL NOT NULL,
+                            PRIMARY KEY (namespace, key))''')
+        conn.execute('CREATE INDEX IF NOT EXISTS ttl_store_expires ON ttl_store (expires_at)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM ttl_store WHERE namespace = ? AND key = ? AND expires_at > ?',
+            (self.namespace, key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key, text, ttl):
+        self._connect().execute(
+            'INSERT OR REPLACE INTO ttl_store (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+            (self.namespace, key, text, time.time() + ttl))
+
+    def _pop(self, key):
+        # Okuma ve silme tek işlemde: aynı kodu iki worker birden tüketemez
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT value, expires_at FROM ttl_store WHERE namespace = ? AND key = ?',
+                (self.namespace, key)).fetchone()
+            if row:
+                conn.execute('DELETE FROM ttl_store WHERE namespace = ? AND key = ?', (self.namespace, key))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0]
+
+    def sweep(self):
+        try:
+            cursor = self._connect().execute('DELETE FROM ttl_store WHERE expires_at <= ?', (time.time(),))
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            self.logger.warning(f"Süreli depo temizliği başarısız: {e}")
+            return 0
+
+
+class RedisTTLStore(TTLStore):
+    """Sunucular arası paylaşılan depo; süre dolumunu Redis yapar"""
+
+    def __init__(self, namespace, url, default_ttl=900, sweep_interval=60):
+        if redis is None:
+            raise RuntimeError("Redis deposu için redis paketi gerekli")
+        super().__init__(namespace, default_ttl, sweep_interval)
+        self.client = redis.Redis.from_url(url)
+
+    def _key(self, key):
+        return f"listoria:{self.namespace}:{key}"
+
+    def _get(self, key):
+        value = self.client.get(self._key(key))
+        return value.decode('utf-8') if value is not None else None
+
+    def _set(self, key, text, ttl):
+        self.client.set(self._key(key), text, ex=max(1, int(ttl)))
+
+    def _pop(self, key):
+        value = self.client.getdel(self._key(key))
+        return value.decode('utf-8') if value is not None else None
+
+
+def make_ttl_store(namespace, url='', path='', default_ttl=900, sweep_interval=60, logger=None):
+    """url redis:// ise ağ deposu, 'memory' ise süreç içi depo, yoksa SQLite dosyası"""
+    logger = logger or logging.getLogger(__name__)
+    if url.startswith(('redis://', 'rediss://')):
+        if redis is not None:
+            return RedisTTLStore(namespace, url, default_ttl, sweep_interval)
+        logger.warning("redis paketi yüklü değil, süreli depo yerel dosyaya düşüyor")
+    elif url == 'memory':
+        return MemoryTTLStore(namespace, default_ttl, sweep_interval)
+    return SQLiteTTLStore(namespace, path, default_ttl, sweep_interval, logger)
@@ -0,0 +1,129 @@
+"""
+kullanicilar tablosu için veri erişim katmanı
+
+Route'lar SQL lehçesiyle (SQLite '?' / PostgreSQL '%s') uğraşmaz; her sorgu
+tek bir yerde, lehçeden bağımsız yazılır ve lehçeye göre bir kez derlenip
+önbelleğe alınır:
+
+- SQLite: '?1' parametreli metin; sqlite3'ün kendi deyim önbelleği tekrar
+  ayrıştırmayı önler (bağlantılar thread başına kalıcı olduğu için)
+- PostgreSQL: bağlantı başına bir kez PREPARE edilir, sonra yalnızca
+  EXECUTE ad(...) gönderilir - sunucu sorguyu her istekte yeniden planlamaz
+
+Satırlar hafif namedtuple (User) olarak döner.
+"""
+
+import weakref
+from collections import namedtuple
+
+try:
+    from psycopg2.extensions import cursor as pg_tuple_cursor
+except ImportError:
+    pg_tuple_cursor = None
+
+COLUMNS = ('id', 'email', 'kullanici_adi', 'sifre', 'dogum_tarihi')
+User = namedtuple('User', COLUMNS)
+
+_SELECT = f"SELECT {', '.join(COLUMNS)} FROM kullanicilar"
+
+# {0}, {1}... parametre yerleri; lehçeye göre ?1 (SQLite) ya da $1 (PostgreSQL) olur
+STATEMENTS = {
+    'get_by_username': _SELECT + " WHERE kullanici_adi = {0}",
+    'get_by_email': _SELECT + " WHERE email = {0}",
+    'get_by_credentials': _SELECT + " WHERE email = {0} AND sifre = {1}",
+    'get_by_email_or_username': _SELECT + " WHERE email = {0} OR kullanici_adi = {1}",
+    'insert': "INSERT INTO kullanicilar (email, kullanici_adi, sifre, dogum_tarihi) VALUES ({0}, {1}, {2}, {3})",
+    'update_password': "UPDATE kullanicilar SET sifre = {1} WHERE email = {0}",
+}
+
+
+def _arity(template):
+    count = 0
+    while '{%d}' % count in template:
+        count += 1
+    return count
+
+
+class UserRepository:
+    def __init__(self, database):
+        self.database = database
+        self._compiled = {}
+        # PostgreSQL bağlantısı -> PREPARE edilmiş deyim adları
+        self._prepared = weakref.WeakKeyDictionary()
+
+    def _statement(self, name):
+        """Deyimi bu lehçe için bir kez derle: (metin, parametre sayısı)"""
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            template = STATEMENTS[name]
+            arity = _arity(template)
+            if self.database.is_postgres:
+                compiled = (template.format(*(f'${i + 1}' for i in range(arity))), arity)
+            else:
+                # Numaralı '?N': şablondaki sıra parametre sırasından farklı olabilir
+                compiled = (template.format(*(f'?{i + 1}' for i in range(arity))), arity)
+            self._compiled[name] = compiled
+        return compiled
+
+    def _execute(self, conn, name, params):
+        """Deyimi çalıştır, imleci döndür"""
+        sql, arity = self._statement(name)
+        if not self.database.is_postgres:
+            return conn.execute(sql, params)
+
+        raw = getattr(conn, 'raw', conn)
+        prepared = self._prepared.setdefault(raw, set())
+        cursor = raw.cursor(cursor_factory=pg_tuple_cursor)
+        statement_name = f"kullanicilar_{name}"
+        if name not in prepared:
+            cursor.execute(f"PREPARE {statement_name} AS {sql}")
+            prepared.add(name)
+        placeholders = ', '.join(['%s'] * arity)
+        cursor.execute(f"EXECUTE {statement_name} ({placeholders})", params)
+        return cursor
+
+    def _fetch_one(self, name, *params):
+        with self.database.connection() as conn:
+            cursor = self._execute(conn, name, params)
+            row = cursor.fetchone()
+            cursor.close()
+        return User._make(row) if row is not None else None
+
+    def _write(self, name, *params):
+        with self.database.connection() as conn:
+            try:
+                cursor = self._execute(conn, name, params)
+                rowcount = cursor.rowcount
+                cursor.close()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return rowcount
+
+    def get_by_username(self, kullanici_adi):
+        return self._fetch_one('get_by_username', kullanici_adi)
+
+    def get_by_email(self, email):
+        return self._fetch_one('get_by_email', email)
+
+    def get_by_credentials(self, email, sifre):
+        return self._fetch_one('get_by_credentials', email, sifre)
+
+    def get_by_email_or_username(self, email, kullanici_adi):
+        return self._fetch_one('get_by_email_or_username', email, kullanici_adi)
+
+    def available_username(self, kullanici_adi):
+        """kullanici_adi boştaysa kendisi, değilse ilk boş 'ad2', 'ad3'..."""
+        candidate, suffix = kullanici_adi, 1
+        while self.get_by_username(candidate) is not None:
+            suffix += 1
+            candidate = f"{kullanici_adi}{suffix}"
+        return candidate
+
+    def insert(self, email, kullanici_adi, sifre, dogum_tarihi):
+        return self._write('insert', email, kullanici_adi, sifre, dogum_tarihi)
+
+    def update_password(self, email, sifre):
+        """Güncellenen satır sayısını döndür"""
+        return self._write('update_password', email, sifre)
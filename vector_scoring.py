@@ -0,0 +1,180 @@
+"""
+NumPy tabanlı vektörel puanlama motoru
+
+calculate_*_similarity fonksiyonlarının öğe öğe Python döngüleriyle yaptığı
+hesabı özellik matrisleri + ağırlık vektörü ile yapar:
+
+    puan = F @ w + rastgelelik
+
+F'nin sütunları tema/tür/tarz/başlık eşleşmelerinin sayılarıdır; tema ve başlık
+kelimeleri torba (bag-of-token) matrisleriyle, tür/tarz/yazar gibi tekil alanlar
+one-hot indeksle temsil edilir. Alt dize (`in`) testleri kayıt başına değil,
+sözlük (vocabulary) girdisi başına bir kez yapılır.
+
+Rastgelelik bileşeni Python'un `random` modülünden aynı sırayla çekilir; aynı
+seed ile Python (referans) yolu ve bu motor birebir aynı sıralamayı üretir.
+SCORING_BACKEND=numpy ile seçilir; numpy kurulu değilse Python yolu kullanılır.
+"""
+
+import random
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsiyonel bağımlılık
+    np = None
+
+available = np is not None
+
+# Kitap puanı bileşenleri ve ağırlıkları (calculate_smart_book_similarity ile aynı)
+BOOK_FEATURES = (
+    'not_tema',        # notlarda geçen her tema
+    'not_tur',         # tür notlarda geçiyor
+    'not_tarz',        # yazar tarzı notlarda geçiyor
+    'not_baslik',      # başlık kelimesi olarak geçen her not kelimesi
+    'tercih_yazar',    # yazar kullanıcı kitabında geçiyor (kitap başına)
+    'tercih_tema',     # tema kullanıcı kitabında geçiyor (kitap başına)
+    'tercih_tur',      # tür kullanıcı kitabının son kelimesi
+    'yas_genc',        # yaş < 25 ve 'genç' nedeni
+    'yas_klasik',      # yaş >= 25 ve klasik tür
+)
+BOOK_WEIGHTS = (15, 20, 10, 5, 25, 8, 10, 8, 10)
+
+# Film/dizi/müzik puanı bileşenleri ve ağırlıkları
+MEDIA_FEATURES = (
+    'not_tema',     # not kelimesi temalarda geçiyor
+    'not_tarz',     # not kelimesi yönetmen/yapımcı/sanatçı tarzında geçiyor
+    'not_neden',    # not kelimesi öneri nedeninde geçiyor
+    'not_baslik',   # not kelimesi başlıkta geçiyor
+    'tercih_tema',  # temalardan biri kullanıcı girdisinde geçiyor
+)
+MEDIA_WEIGHTS = (15, 10, 20, 25, 5)
+
+
+def _bag(values_per_item):
+    """Liste alanları için (sözlük, n x |sözlük| sayım matrisi)"""
+    vocab = {}
+    rows, cols = [], []
+    for i, values in enumerate(values_per_item):
+        for value in values:
+            rows.append(i)
+            cols.append(vocab.setdefault(value, len(vocab)))
+    matrix = np.zeros((len(values_per_item), len(vocab)), dtype=np.int32)
+    if rows:
+        np.add.at(matrix, (np.array(rows), np.array(cols)), 1)
+    return list(vocab), matrix
+
+
+def _categorical(values):
+    """Tekil alanlar için (sözlük, kayıt başına sözlük indeksi)"""
+    vocab = {}
+    idx = np.fromiter((vocab.setdefault(v, len(vocab)) for v in values), dtype=np.int64, count=len(values))
+    return list(vocab), idx
+
+
+def _mask(vocab, predicate):
+    return np.fromiter((predicate(v) for v in vocab), dtype=np.int32, count=len(vocab))
+
+
+def _contains(strings, word):
+    """Her kayıt için `word in string` (np.char.find ile vektörel)"""
+    if not len(strings):
+        return np.zeros(0, dtype=bool)
+    return np.char.find(strings, word) >= 0
+
+
+def _order(scores, limit=None):
+    # Python'un kararlı sorted(reverse=True) davranışıyla aynı sıra
+    if limit is None or limit >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    if limit <= 0:
+        return np.zeros(0, dtype=np.int64)
+    # İlk `limit`: k'ıncı en yüksek puan argpartition ile bulunur, yalnızca ona eşit ya da
+    # daha yüksek puanlı kayıtlar (eşitlikler dahil) kararlı sıralanır
+    esik = scores[np.argpartition(-scores, limit - 1)[limit - 1]]
+    aday = np.flatnonzero(scores >= esik)
+    return aday[np.argsort(-scores[aday], kind='stable')][:limit]
+
+
+def score_books(kitaplar, kullanici_kitaplari, notlar, yas, limit=None):
+    """calculate_smart_book_similarity'nin vektörel karşılığı; puanlı kopyaları sıralı döndürür"""
+    kitaplar = [dict(kitap) for kitap in kitaplar]
+    valid = [i for i, kitap in enumerate(kitaplar) if 'baslik' in kitap and 'tur' in kitap]
+    items = [kitaplar[i] for i in valid]
+    n = len(items)
+
+    F = np.zeros((n, len(BOOK_FEATURES)), dtype=np.int64)
+    tema_vocab, T = _bag([kitap.get('tema', []) for kitap in items])
+    tur_vocab, tur_idx = _categorical([kitap.get('tur', '').lower() for kitap in items])
+
+    if notlar and notlar.strip():
+        notlar_lower = notlar.lower()
+        notlar_kelimeleri = notlar_lower.split()
+        tarz_vocab, tarz_idx = _categorical([kitap.get('yazar_tarzi', '').lower() for kitap in items])
+        kelime_vocab, W = _bag([set(kitap['baslik'].lower().split()) for kitap in items])
+        kelime_sayilari = {}
+        for kelime in notlar_kelimeleri:
+            kelime_sayilari[kelime] = kelime_sayilari.get(kelime, 0) + 1
+
+        F[:, 0] = T @ _mask(tema_vocab, lambda t: t.lower() in notlar_lower)
+        F[:, 1] = _mask(tur_vocab, lambda t: t in notlar_lower)[tur_idx]
+        F[:, 2] = _mask(tarz_vocab, lambda t: t in notlar_lower)[tarz_idx]
+        F[:, 3] = W @ _mask(kelime_vocab, lambda k: kelime_sayilari.get(k, 0))
+
+    yazar_vocab, yazar_idx = _categorical([kitap.get('yazar', '').lower() for kitap in items])
+    for kullanici_kitap in kullanici_kitaplari:
+        kullanici_lower = kullanici_kitap.lower()
+        son_kelime = kullanici_kitap.split()[-1].lower()
+        F[:, 4] += _mask(yazar_vocab, lambda y: y in kullanici_lower)[yazar_idx]
+        F[:, 5] += T @ _mask(tema_vocab, lambda t: t in kullanici_lower)
+        F[:, 6] += _mask(tur_vocab, lambda t: t == son_kelime)[tur_idx]
+
+    if yas and n:
+        if yas < 25:
+            nedenler = np.array([kitap.get('neden', '').lower() for kitap in items])
+            F[:, 7] = _contains(nedenler, 'genç')
+        else:
+            F[:, 8] = _mask(tur_vocab, lambda t: 'klasik' in t)[tur_idx]
+
+    jitter = np.array([random.randint(1, 10) for _ in range(n)], dtype=np.int64)
+    scores = F @ np.array(BOOK_WEIGHTS, dtype=np.int64) + jitter
+
+    puanlar = np.zeros(len(kitaplar), dtype=np.int64)
+    puanlar[valid] = scores
+    for kitap, puan in zip(kitaplar, puanlar.tolist()):
+        kitap['puan'] = puan
+    return [kitaplar[i] for i in _order(puanlar, limit)]
+
+
+def score_media(ogeler, kullanici_girdileri, notlar, tarz_alani, jitter_max=8, limit=None):
+    """Film/dizi/müzik puanlayıcılarının vektörel karşılığı; sıralı öğeleri döndürür"""
+    items = [oge for oge in ogeler if 'baslik' in oge and 'tur' in oge]
+    n = len(items)
+
+    F = np.zeros((n, len(MEDIA_FEATURES)), dtype=np.int64)
+    tema_vocab, T = _bag([oge.get('tema', []) for oge in items])
+    tema_var = (T > 0).astype(np.int32)
+
+    if notlar and notlar.strip() and n:
+        kelime_sayilari = {}
+        for kelime in notlar.lower().split():
+            kelime_sayilari[kelime] = kelime_sayilari.get(kelime, 0) + 1
+        tarzlar = np.array([oge.get(tarz_alani, '').lower() for oge in items])
+        nedenler = np.array([oge.get('neden', '').lower() for oge in items])
+        basliklar = np.array([oge['baslik'].lower() for oge in items])
+        tema_lower = [t.lower() for t in tema_vocab]
+
+        for kelime, adet in kelime_sayilari.items():
+            # Kelime boşluk içermediği için birleştirilmiş tema metninde geçmesi,
+            # temalardan birinde geçmesine denktir
+            F[:, 0] += adet * ((tema_var @ _mask(tema_lower, lambda t: kelime in t)) > 0)
+            F[:, 1] += adet * _contains(tarzlar, kelime)
+            F[:, 2] += adet * _contains(nedenler, kelime)
+            F[:, 3] += adet * _contains(basliklar, kelime)
+
+    for girdi in kullanici_girdileri:
+        girdi_lower = girdi.lower()
+        F[:, 4] += (tema_var @ _mask(tema_vocab, lambda t: t in girdi_lower)) > 0
+
+    jitter = np.array([random.randint(1, jitter_max) for _ in range(n)], dtype=np.int64)
+    scores = F @ np.array(MEDIA_WEIGHTS, dtype=np.int64) + jitter
+    return [items[i] for i in _order(scores, limit)]